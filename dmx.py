@@ -46,155 +46,3537 @@ jpn - 20170231
 
 import os
 import sys
+import atexit
 import platform
 import json
+import logging
 import base64
+import collections
+import contextlib
+import mmap
+import copy
+import functools
 import configparser
 import hashlib
 import argparse
+import csv
+import sqlite3
+import concurrent.futures
+import multiprocessing
 import urllib.request
 import urllib.parse
 import urllib.error
 import http.cookiejar
+import io
+import threading
+import socket
+import itertools
+import random
+import re
+from types import ModuleType
+from xml.sax.saxutils import escape, quoteattr
+import time
 from timeit import default_timer as timer
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 
 
 ## define global variables
-VERBOSE = False     # VERBOSE mode (True|False)
-AUTHTYPE = 'Basic'  # set http authentication header authtype (Basic|LDAP|...)
-JSESSIONID = None   # the first result of get_session_id
-wsid_cache = {}     # global dictionary to cache worspace ids
-config = configparser.ConfigParser()
+WORKERS = 8         # number of concurrent requests in bulk operations
+BATCH_OPERATIONS = (  # client methods allowed in batch files
+    'create_ws', 'create_member', 'create_user', 'create_topicmap', 'create_note',
+    'send_data', 'create_assoc', 'reveal_topic', 'reveal_assoc', 'send_post',
+    'delete_topic', 'get_ws_id', 'get_topicmap_id', 'get_topic_id_by_name',
+    'update_topic'
+)
+## the vcard TYPE parameters of the phone numbers and addresses of persons
+## by their DMX labels, the first TYPE is the one written to vcards
+VCARD_PHONE_TYPES = (
+    ('dmx.contacts.home_phone', [["HOME", "VOICE"], ["VOICE", "HOME"], ["HOME"], ["VOICE"]]),
+    ('dmx.contacts.work_phone', [["WORK", "VOICE"], ["VOICE", "WORK"], ["WORK"]]),
+    ('dmx.contacts.mobile', [["CELL", "VOICE"], ["VOICE", "CELL"], ["CELL"], ["MOBILE"], ["MOBIL"]])
+)
+VCARD_ADDRESS_TYPES = (
+    ('dmx.contacts.home_address', [["HOME"], ["PRIVATE"]]),
+    ('dmx.contacts.work_address', [["WORK"], ["OFFICE"]])
+)
+VCARD_ADDRESS_FIELDS = (  # vcard address fields and the children of an address
+    ('box', None), ('extended', None), ('street', 'dmx.contacts.street'),
+    ('city', 'dmx.contacts.city'), ('region', 'dmx.contacts.region'),
+    ('code', 'dmx.contacts.postal_code'), ('country', 'dmx.contacts.country')
+)
+LOAD_OPERATIONS = (  # client methods allowed in the mix of load_test
+    'create_note', 'get_topic', 'get_related', 'reveal_topic', 'send_data'
+)
+JOURNAL_OPERATIONS = (  # batch operations which are journaled with --journal
+    'create_ws', 'create_member', 'create_user', 'create_topicmap', 'create_note',
+    'send_data', 'create_assoc', 'reveal_topic', 'reveal_assoc', 'send_post', 'delete_topic',
+    'update_topic'
+)
+BULK_OPERATIONS = (  # client methods which give the timeout to every record or poll
+    'validate_file', 'import_file', 'import_vcards', 'import_edges', 'update_topics',
+    'sync_notes', 'run_batch', 'provision', 'get_items', 'get_topics', 'export_topicmap',
+    'load_test', 'mirror', 'export_vcards', 'audit', 'watch'
+)
+
+## loggers of the subsystems, see configure_logging
+LOG_HTTP = logging.getLogger('dmx.http')       # requests and responses
+LOG_SESSION = logging.getLogger('dmx.session') # login and sessions
+LOG_CONFIG = logging.getLogger('dmx.config')   # config files and host urls
+LOG_LOOKUP = logging.getLogger('dmx.lookup')   # ids of workspaces, topics and types
+LOG_WRITE = logging.getLogger('dmx.write')     # creating, updating and deleting topics
+LOG_BULK = logging.getLogger('dmx.bulk')       # imports, exports, batches and watches
+LOG_MAIN = logging.getLogger('dmx.main')       # the command line
+LOG_SUBSYSTEMS = ('http', 'session', 'config', 'lookup', 'write', 'bulk', 'main')
+SECRETS = set()     # passwords, credentials and session ids never to be logged
+SECRET_PATTERN = re.compile(  # values of passwords, authorization headers and session ids
+    r"""((?:password|dm_pass|authorization|jsessionid)["']?\s*[:=]\s*["']?(?:basic |ldap )?)"""
+    r"""[^"'\s,;&}]+""", re.IGNORECASE)
+SPAN_OMITTED = ('payload', 'headers', 'jsessionid')  # arguments never recorded in trace spans
+JSON_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*'                # a json string without its end
+JSON_TOKENS = re.compile(  # json without whitespace outside of strings, a cut string at the end
+    rb'(?:%s"|[^"\s]+)+|%s\\?\Z' % (JSON_STRING, JSON_STRING))
+JSON_CUT = re.compile(rb'%s\\?' % JSON_STRING)       # a string cut by the end of a chunk
+
+
+class LogFilter(logging.Filter):
+    """
+    A LogFilter removes all secrets (see add_secrets) and the values of
+    passwords, authorization headers and session ids from the records of a
+    subsystem logger. With sample n, it lets only every n-th record below
+    WARNING pass, warnings and errors always pass. A logger only filters
+    records of its enabled levels, so a disabled level costs just the
+    level check and messages are never formatted.
+    """
 
+    def __init__(self, sample=1):
+        logging.Filter.__init__(self)
+        self.sample = sample
+        self.count = itertools.count()
 
-def create_default_config():
+    def filter(self, record):
+        if (self.sample > 1 and record.levelno < logging.WARNING and
+                next(self.count) % self.sample):
+            return(False)
+        message = record.getMessage()
+        redacted = redact(message)
+        if redacted != message:
+            record.msg = redacted
+            record.args = None
+        return(True)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    A JsonFormatter writes every log record as a json object in a line.
     """
-    This function creates the initial config object.
-    """
-    global config
-    ## config is the ConfigParser instance that holds the config params
-    sample_config = """
-    [Credentials]
-    authname = admin
-    password =
-
-    [Connection]
-    protocol = http
-    server = localhost
-    port = 8080
-    path = /
-    workspace = DMX
-    """
-    config.read_string(sample_config)
-    if VERBOSE:
-        for section in config.sections():
-            for (key, val) in config.items(section):
-                print("CREATE DEFAULT CONFIG : %s: %s=%s" % (section, key, val))
-    return
 
+    def format(self, record):
+        return(json.dumps({'time': record.created, 'level': record.levelname,
+                           'subsystem': record.name.split('.', 1)[-1],
+                           'thread': record.threadName, 'message': record.getMessage()}))
 
-def read_default_config_file():
+
+LOG_FILTERS = {subsystem: LogFilter() for subsystem in LOG_SUBSYSTEMS}
+for (subsystem, log_filter) in LOG_FILTERS.items():
+    logging.getLogger('dmx.' + subsystem).addFilter(log_filter)
+logging.getLogger('dmx').addHandler(logging.NullHandler())
+
+
+class Journal(object):
+    """
+    A Journal is an append-only checkpoint file of bulk write operations.
+    Every line is a json object with the operation, the host, the input
+    file, the offset of the record in the input file and the result (e.g.
+    the id of the new topic). Every line is flushed when it is written and
+    the file is synced to disk every sync_every lines or sync_interval
+    seconds. With resume the results of an earlier run are read first, so
+    completed records can be looked up by key in constant time.
     """
-    Reads the config parameter from file ./dmx.cfg
-    """
-    global config
-    ## if parameter is empty or missing, use these parameters
-    script_dir = os.path.dirname(__file__) #<-- absolute dir the script is in
-    config_file_name = 'dmx.cfg'
-    config_file = os.path.join(script_dir, config_file_name)
-    if os.path.isfile(config_file):
-        if VERBOSE:
-            print("DEFAULT CONFIG FILE : reading file %s." % config_file)
-        config.read(config_file)
-    else:
-        if VERBOSE:
-            print("DEFAULT CONFIG FILE : Config file not found. Creating %s with default settings." % config_file)
-        config_file = open(os.path.join(script_dir, config_file_name),'w')
-        config.write(config_file)
-        config_file.close()
-    if VERBOSE:
-        for section in config.sections():
-            for (key, val) in config.items(section):
-                print("DEFAULT CONFIG FILE : %s: %s=%s" % (section, key, val))
-    return
 
+    def __init__(self, filename, resume=False, sync_every=100, sync_interval=1.0):
+        self.filename = filename
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.completed = {}          # results of the journaled operations by key
+        self.lock = threading.Lock()
+        self.unsynced = 0
+        self.last_sync = timer()
+        torn = False
+        if resume and os.path.exists(filename):
+            with open(filename, 'r') as journal_file:
+                for line in journal_file:
+                    torn = not line.endswith('\n')
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        ## the last line may be torn by a crash
+                        continue
+                    key = (entry['op'], entry['host'], entry['input'], entry['offset'])
+                    self.completed[key] = entry['result']
+        self.journal_file = open(filename, 'a' if resume else 'w')
+        if torn:
+            self.journal_file.write('\n')
+
+    def __contains__(self, key):
+        return(key in self.completed)
+
+    def __len__(self):
+        return(len(self.completed))
+
+    def get(self, key, default=None):
+        """
+        This function returns the journaled result for key.
+        """
+        return(self.completed.get(key, default))
+
+    def record(self, key, result):
+        """
+        This function appends the result for key to the journal.
+        """
+        line = json.dumps({'op': key[0], 'host': key[1], 'input': key[2],
+                           'offset': key[3], 'result': result}, default=str)
+        with self.lock:
+            self.completed[key] = result
+            self.journal_file.write(line + '\n')
+            self.journal_file.flush()
+            self.unsynced += 1
+            if (self.unsynced >= self.sync_every or
+                    timer() - self.last_sync >= self.sync_interval):
+                self.sync()
+
+    def sync(self):
+        """
+        This function writes the journal to disk (call with lock held).
+        """
+        os.fsync(self.journal_file.fileno())
+        self.unsynced = 0
+        self.last_sync = timer()
+
+    def close(self):
+        """
+        This function syncs and closes the journal.
+        """
+        with self.lock:
+            if not self.journal_file.closed:
+                self.journal_file.flush()
+                self.sync()
+                self.journal_file.close()
+
+
+class ContactIndex(object):
+    """
+    A ContactIndex maps the normalized email addresses and names of person
+    topics (see contact_keys) to their topic ids. Persons which are being
+    created map to the future of their topic id, so a person is created
+    only once even if it occurs several times in a concurrent import.
+    """
 
-def read_dmx_config_properties_file(config_file='config.properties'):
+    def __init__(self):
+        self.topic_ids = {}          # topic ids (or futures of them) by key
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return(len(self.topic_ids))
+
+    def add(self, topic_id, topic):
+        """
+        This function adds the keys of topic for topic_id, known keys are kept.
+        """
+        with self.lock:
+            for key in contact_keys(topic):
+                self.topic_ids.setdefault(key, topic_id)
+
+    def claim(self, topic):
+        """
+        This function returns (topic id or future, key) of the first known
+        key of topic. Otherwise the keys of topic are claimed for a new
+        future, which the caller has to resolve, and (None, future) is
+        returned.
+        """
+        keys = contact_keys(topic)
+        with self.lock:
+            for key in keys:
+                if key in self.topic_ids:
+                    return(self.topic_ids[key], key)
+            future = concurrent.futures.Future()
+            for key in keys:
+                self.topic_ids[key] = future
+        return(None, future)
+
+    def release(self, future):
+        """
+        This function removes the keys claimed for future, e.g. if the
+        person could not be created.
+        """
+        with self.lock:
+            for key in [key for (key, val) in self.topic_ids.items() if val is future]:
+                del self.topic_ids[key]
+
+
+class Tracer(object):
     """
-    Reads the configuration data from '/path/to/dmx/config.properties'
-    and overwrites the config settings with new values.
+    A Tracer records the calls of client functions as nested spans and
+    writes them as Chrome trace events, which can be loaded into
+    chrome://tracing or https://ui.perfetto.dev. Every span is a complete
+    event of the thread it runs in and knows the id of its parent, the span
+    open in the same thread when it began or, for tasks of a TracedExecutor,
+    the span open in the thread which submitted the task.
     """
-    global config
-    dmx_params = {}
-    if os.access(config_file, os.R_OK):
-        if VERBOSE:
-            print("DMX CONFIG PROPERTIES: reading file %s." % config_file)
-        with open(config_file) as f_in:
-            lines = [_f for _f in (line.rstrip() for line in f_in) if _f]
-    else:
-        print("ERROR! Could not read config file %s." % (config_file))
-        sys.exit(1)
-    for this_line in lines:
-        if not this_line[0] in ('', ' ', '#', ';'):
+
+    def __init__(self):
+        self.events = []             # trace events of the finished spans
+        self.lock = threading.Lock()
+        self.local = threading.local() # ids of the open spans of the current thread
+        self.ids = itertools.count(1)
+        self.threads = set()         # threads with a thread_name event
+        self.start = timer()
+        self.pid = os.getpid()
+
+    def __len__(self):
+        return(len(self.events))
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        """
+        This context manager records the time until it is left as span
+        name with args. An exception leaving the span is added to its args.
+        """
+        stack = self.local.__dict__.setdefault('stack', [])
+        args['id'] = next(self.ids)
+        args['parent'] = stack[-1] if stack else None
+        stack.append(args['id'])
+        begin = timer()
+        try:
+            yield
+        except BaseException as error_message:
+            args['error'] = redact(repr(error_message))
+            raise
+        finally:
+            end = timer()
+            stack.pop()
+            thread = threading.current_thread()
+            event = {'name': name, 'cat': 'dmx', 'ph': 'X', 'pid': self.pid,
+                     'tid': thread.ident, 'ts': (begin - self.start) * 1e6,
+                     'dur': (end - begin) * 1e6, 'args': args}
+            with self.lock:
+                if thread.ident not in self.threads:
+                    self.threads.add(thread.ident)
+                    self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid,
+                                        'tid': thread.ident, 'args': {'name': thread.name}})
+                self.events.append(event)
+
+    def current(self):
+        """
+        This function returns the id of the span open in the current thread
+        or None.
+        """
+        stack = self.local.__dict__.get('stack')
+        return(stack[-1] if stack else None)
+
+    def adopt(self, parent, function, *args, **kwargs):
+        """
+        This function calls function with args in the current thread as if
+        span parent (see current), opened in another thread, were open.
+        """
+        stack = self.local.__dict__.setdefault('stack', [])
+        stack.append(parent)
+        try:
+            return(function(*args, **kwargs))
+        finally:
+            stack.pop()
+
+    def write(self, filename):
+        """
+        This function writes all trace events recorded so far to filename.
+        """
+        with self.lock:
+            events = list(self.events)
+        with open(filename, 'w') as trace_file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, trace_file)
+
+
+def traced(function):
+    """
+    This decorator records every call of a client method as a span of the
+    Tracer of the client, if it has one, with its arguments. Payloads,
+    headers and session ids are left out, passwords are replaced by ***
+    and all other arguments are redacted (see redact). Without a Tracer,
+    it costs only a single attribute lookup.
+    """
+    names = function.__code__.co_varnames[1:function.__code__.co_argcount]
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        if self.tracer is None:
+            return(function(self, *args, **kwargs))
+        arguments = dict(zip(names, args), **kwargs)
+        with self.tracer.span(function.__name__, **{
+                name: '***' if 'pass' in name else redact(repr(val))[:200]
+                for (name, val) in arguments.items() if name not in SPAN_OMITTED}):
+            return(function(self, *args, **kwargs))
+    return(wrapper)
+
+
+class TracedExecutor(concurrent.futures.ThreadPoolExecutor):
+    """
+    A TracedExecutor is a ThreadPoolExecutor of a client whose tasks run as
+    children of the span open in the thread which submits them (see
+    Tracer.adopt), so the spans of worker threads keep their parent. This
+    also holds for executor.map and bounded_map, which use submit.
+    """
+
+    def __init__(self, client, max_workers=None):
+        super().__init__(max_workers=max_workers)
+        self.client = client
+
+    def submit(self, function, *args, **kwargs):
+        tracer = self.client.tracer
+        if tracer is None:
+            return(super().submit(function, *args, **kwargs))
+        return(super().submit(tracer.adopt, tracer.current(), function, *args, **kwargs))
+
+
+class DMXClient(object):
+    """
+    A DMXClient holds everything needed to talk to one DMX server: the
+    config params, the http authentication header authtype, the session,
+    the caches and the transport. Every client has its own session, so
+    several clients can be used side by side, e.g. for different users or
+    hosts. All methods of a client can be called from several threads.
+    """
+
+    def __init__(self, config=None, verbose=False, authtype='Basic', jsessionid=None):
+        ## config is the ConfigParser instance that holds the config params
+        if config is None:
+            config = configparser.ConfigParser()
+        self.config = config
+        self.verbose = verbose       # VERBOSE mode (True|False)
+        self.authtype = authtype     # http authentication header authtype (Basic|LDAP|...)
+        self.jsessionid = jsessionid # the first result of get_session_id
+        self.wsid_cache = {}         # dictionary to cache worspace ids
+        self.topic_id_cache = {}     # dictionary to cache topic ids resolved by name
+        self.workers = WORKERS       # number of concurrent requests in bulk operations
+        self.opener = urllib.request.build_opener()
+        self.session_lock = threading.Lock()
+        self.cache_lock = threading.Lock()
+        self.inflight = {}           # futures of the GET requests on the way
+        self.type_cache = {}         # futures of the topic and assoc type definitions
+        self.validate_payloads = False # validate payloads before sending them
+        self.journal = None          # checkpoint Journal of bulk write operations
+        self.duplicates = None       # skip, merge or flag persons found in the contact index
+        self.contact_index = None    # future of the ContactIndex (see get_contact_index)
+        self.timeout = None          # seconds per operation and request (None waits forever)
+        self.hedge = False           # send slow GET requests a second time (see hedged_request)
+        self.latencies = collections.deque(maxlen=1000) # seconds of the last GET requests
+        self.latencies_lock = threading.Lock()
+        self.hedge_executor = None   # threads of the hedged GET requests
+        self.local = threading.local() # deadline of the operation of the current thread
+        self.tracer = None           # Tracer of the spans of the client calls (see traced)
+        self.inflight_lock = threading.Lock()
+
+    def create_default_config(self):
+        """
+        This function creates the initial config object.
+        """
+        ## config is the ConfigParser instance that holds the config params
+        sample_config = """
+        [Credentials]
+        authname = admin
+        password =
+
+        [Connection]
+        protocol = http
+        server = localhost
+        port = 8080
+        path = /
+        workspace = DMX
+        """
+        self.config.read_string(sample_config)
+        if LOG_CONFIG.isEnabledFor(logging.DEBUG):
+            for section in self.config.sections():
+                for (key, val) in self.config.items(section):
+                    LOG_CONFIG.debug("CREATE DEFAULT CONFIG : %s: %s=%s", section, key, val)
+        return
+
+    def read_default_config_file(self):
+        """
+        Reads the config parameter from file ./dmx.cfg
+        """
+        ## if parameter is empty or missing, use these parameters
+        script_dir = os.path.dirname(__file__) #<-- absolute dir the script is in
+        config_file_name = 'dmx.cfg'
+        config_file = os.path.join(script_dir, config_file_name)
+        if os.path.isfile(config_file):
+            LOG_CONFIG.debug("DEFAULT CONFIG FILE : reading file %s.", config_file)
+            self.config.read(config_file)
+        else:
+            LOG_CONFIG.debug("DEFAULT CONFIG FILE : Config file not found. Creating %s with default settings.",
+                             config_file)
+            config_file = open(os.path.join(script_dir, config_file_name),'w')
+            self.config.write(config_file)
+            config_file.close()
+        if LOG_CONFIG.isEnabledFor(logging.DEBUG):
+            for section in self.config.sections():
+                for (key, val) in self.config.items(section):
+                    LOG_CONFIG.debug("DEFAULT CONFIG FILE : %s: %s=%s", section, key, val)
+        return
+
+    def read_dmx_config_properties_file(self, config_file='config.properties'):
+        """
+        Reads the configuration data from '/path/to/dmx/config.properties'
+        and overwrites the config settings with new values.
+        """
+        dmx_params = {}
+        if os.access(config_file, os.R_OK):
+            LOG_CONFIG.debug("DMX CONFIG PROPERTIES: reading file %s.", config_file)
+            with open(config_file) as f_in:
+                lines = [_f for _f in (line.rstrip() for line in f_in) if _f]
+        else:
+            print("ERROR! Could not read config file %s." % (config_file))
+            sys.exit(1)
+        for this_line in lines:
+            if not this_line[0] in ('', ' ', '#', ';'):
+                try:
+                    key, val = this_line.strip().replace(" ", "").split('=', 1)
+                except ValueError:
+                    print("INFO: No value found for %s in %s" % (key, config_file))
+                else:
+                    dmx_params[key.lower()] = val
+
+        port = dmx_params['org.osgi.service.http.port']
+        password = dmx_params['dmx.security.initial_admin_password']
+        self.config.add_section('Credentials')
+        self.config.set('Credentials', 'authname', 'admin') # usualy the admin user
+        self.config.set('Credentials', 'password', password) # usualy the admin password
+        self.config.add_section('Connection')
+        self.config.set('Connection', 'server', 'localhost') # usualy localhost
+        self.config.set('Connection', 'port', port) # usualy 8080
+        self.config.set('Connection', 'workspace', 'DMX') # usualy DMX
+
+        for mandatory in ['org.osgi.service.http.port', 'dmx.security.initial_admin_password']:
+            if mandatory not in list(dmx_params.keys()):
+                print("ERROR! Could not read %s in config file %s." % (mandatory, config_file))
+                sys.exit(1)
+        return
+
+    def check_payload(self, payload=None):
+        """
+        This function checks the payload to be send to server and makes sure
+        it is a valid json format.
+        """
+        LOG_WRITE.debug("CHECK PAYLOAD : TYPE = %s", type(payload))
+        LOG_WRITE.debug("CHECK PAYLOAD : LEN = %s", len(payload))
+        LOG_WRITE.debug("CHECK PAYLOAD : INPUT = %s", payload)
+        if isinstance(payload, dict):
+            payload = json.dumps(payload)
+        try:
+            payload = json.loads(json.dumps(payload, indent=3, sort_keys=True))
+        except:
+            print("ERROR! Could not read Payload. Not JSON?")
+            sys.exit(1)
+        else:
+            LOG_WRITE.debug("CHECK PAYLOAD : OUTPUT = %s", payload)
+            return(payload)
+
+    def read_file(self, filename):
+        """
+        Here we open the file and read the content.
+        """
+        LOG_BULK.debug("Reading file %s", filename)
+        with open(filename, 'r') as data_file:
+            data = data_file.read()
+        data_file.close()
+        LOG_BULK.debug("READ FILE DATA: \n%s", data)
+        return(data)
+
+    def check_response(self, data):
+        """
+        This function returns a nicely formatted JSON string, if possible.
+        """
+        ##
+        try:
+            response = json.loads(data)
+        except:
+            LOG_HTTP.debug('CHECK RESPONSE : is not JSON (CHECK RESPONSE exception!)')
+            LOG_HTTP.debug('CHECK RESPONSE : TYPE = %s', type(response))
+            LOG_HTTP.debug('CHECK RESPONSE : is "%s".', response)
+            LOG_HTTP.debug('CHECK RESPONSE : return "OK".')
+            return("OK")
+        else:
+            if LOG_HTTP.isEnabledFor(logging.DEBUG):
+                LOG_HTTP.debug('CHECK RESPONSE : is JSON')
+                LOG_HTTP.debug("CHECK RESPONSE : TYPE = %s", type(response))
+                LOG_HTTP.debug("CHECK RESPONSE : %s", json.dumps(response, indent=3, sort_keys=True))
+            return(response)
+
+    def get_base_64(self):
+        """
+        This function returns the authentication string for the user against DMX
+        """
+        authname = self.config.get('Credentials', 'authname') # usualy the admin user
+        password = self.config.get('Credentials', 'password') # usualy the admin password
+        LOG_SESSION.debug("GET BASE64 : authname = %s", authname)
+        authstring = bytes((str(authname + ':' + password)), 'UTF-8')
+        base64string = (base64.b64encode(authstring)).decode('UTF-8')
+        ## never log the password or the authentication string
+        add_secrets(password, base64string)
+        return(base64string)
+
+    def set_host_url(self, url):
+        """
+        This function sets the config params to a given URL.
+        """
+        host_url = urllib.parse.urlparse(url)
+        LOG_CONFIG.debug("SET HOST URL URLPARSE : Protocol = %s", host_url.scheme)
+        LOG_CONFIG.debug("SET HOST URL URLPARSE : Server = %s", host_url.hostname)
+        LOG_CONFIG.debug("SET HOST URL URLPARLE : Port = %s", host_url.port)
+        LOG_CONFIG.debug("SET HOST URL URLPARSE : Path = %s", host_url.path)
+        self.config.set('Connection', 'protocol', host_url.scheme)
+        self.config.set('Connection', 'server', host_url.hostname)
+        if host_url.scheme == 'https' and host_url.port is None:
+            self.config.set('Connection', 'port', '443')
+        elif host_url.scheme == 'http' and host_url.port is None:
+            self.config.set('Connection', 'port', '80')
+        else:
+            self.config.set('Connection', 'port', str(host_url.port))
+        if host_url.path is None:
+            self.config.set('Connection', 'path', '/')
+        else:
+            self.config.set('Connection', 'path', str(host_url.path.rstrip('/') + '/'))
+        if LOG_CONFIG.isEnabledFor(logging.DEBUG):
+            for (key, val) in self.config.items('Connection'):
+                LOG_CONFIG.debug("SET HOST URL CONFIG ITEMS : %s=%s", key, val)
+        return
+
+    def get_host_url(self):
+        """
+        This function returns the host_url string.
+        """
+        protocol = self.config.get('Connection', 'protocol')
+        server = self.config.get('Connection', 'server')
+        port = self.config.get('Connection', 'port')
+        path = self.config.get('Connection', 'path')
+        host_url = '%s://%s:%s%s' % (protocol, server, port, path)
+        LOG_CONFIG.debug('HOST_URL : %s', host_url)
+        return(str(host_url))
+
+    def get_host_names(self):
+        """
+        This function returns the names of all instances configured in
+        named [Connection:<name>] sections of the config.
+        """
+        return([section.split(':', 1)[1] for section in self.config.sections()
+                if section.startswith('Connection:')])
+
+    def for_host(self, name):
+        """
+        This function returns a new client for the named instance with its
+        own session and caches. Settings missing in [Connection:<name>] and
+        [Credentials:<name>] are taken from the [Connection] and
+        [Credentials] sections.
+        """
+        if not self.config.has_section('Connection:%s' % name):
+            print("ERROR! No section [Connection:%s] in config." % name)
+            sys.exit(1)
+        config_file = io.StringIO()
+        self.config.write(config_file)
+        host_config = configparser.ConfigParser()
+        host_config.read_string(config_file.getvalue())
+        for section in ('Connection', 'Credentials'):
+            if host_config.has_section('%s:%s' % (section, name)):
+                for (key, val) in host_config.items('%s:%s' % (section, name)):
+                    host_config.set(section, key, val)
+        host_client = DMXClient(host_config, self.verbose, self.authtype)
+        host_client.workers = self.workers
+        host_client.validate_payloads = self.validate_payloads
+        host_client.journal = self.journal
+        host_client.duplicates = self.duplicates
+        host_client.timeout = self.timeout
+        host_client.hedge = self.hedge
+        host_client.tracer = self.tracer
+        LOG_CONFIG.debug("FOR HOST : %s (%s)", name, host_client.get_host_url())
+        return(host_client)
+
+    def close(self):
+        """
+        This function stops the threads of the hedged requests (see
+        hedged_request). Requests still on the way are not waited for.
+        """
+        with self.cache_lock:
+            executor, self.hedge_executor = self.hedge_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def call_operation(self, function_name, args=()):
+        """
+        This function calls the client method function_name with args as an
+        operation of the command line. Single operations get the timeout of
+        the client as deadline for all their requests (see deadline), bulk
+        operations (BULK_OPERATIONS) give it to every record instead.
+        """
+        function = getattr(self, function_name)
+        if function_name in BULK_OPERATIONS:
+            return(function(*args))
+        with self.deadline():
+            return(function(*args))
+
+    def run_on_host(self, name, function_name, args):
+        """
+        This function calls the client method function_name with args on
+        the named instance (see call_operation). It returns a tuple of the
+        result and an error message.
+        """
+        host_client = None
+        try:
+            host_client = self.for_host(name)
+            return(host_client.call_operation(function_name, args), None)
+        except SystemExit:
+            return(None, 'ERROR! %s failed on %s.' % (function_name, name))
+        except Exception as error_message:
+            return(None, 'ERROR! %s failed on %s: %s' % (function_name, name, error_message))
+        finally:
+            if host_client is not None:
+                host_client.close()
+
+    def fan_out(self, function_name, args=(), hosts=None, workers=None, merge=False):
+        """
+        This function calls the client method function_name with args on
+        several instances in parallel, each with its own client and session.
+        hosts is a list of instance names (default: all configured instances).
+        Returns a dictionary of the results labeled by instance name or, if
+        merge is True, a single list with all list results tagged by instance.
+        """
+        if not hosts:
+            hosts = self.get_host_names()
+        if not hosts:
+            print("ERROR! No [Connection:<name>] sections in config.")
+            sys.exit(1)
+        if workers is None:
+            workers = self.workers
+        LOG_BULK.info("FAN OUT : calling %s%s on %s", function_name, tuple(args), hosts)
+        results = {}
+        errors = 0
+        with TracedExecutor(self, max_workers=max(1, min(workers, len(hosts)))) as executor:
+            futures = {
+                executor.submit(self.run_on_host, name, function_name, tuple(args)): name
+                for name in hosts
+            }
+            for future in concurrent.futures.as_completed(futures):
+                name = futures[future]
+                result, error_message = future.result()
+                if error_message:
+                    print(error_message, file=sys.stderr)
+                    errors += 1
+                results[name] = result
+        LOG_BULK.info("FAN OUT : %s of %s instances failed", errors, len(hosts))
+        if merge:
+            merged = []
+            for name in hosts:
+                result = results[name]
+                if not isinstance(result, list):
+                    result = [result]
+                for item in result:
+                    if isinstance(item, dict):
+                        item = dict(item, host=name)
+                    else:
+                        item = {'host': name, 'value': item}
+                    merged.append(item)
+            return(merged)
+        return({name: results[name] for name in hosts})
+
+    @traced
+    def open_request(self, url, payload=None, wsid=None, method='GET', headers=None):
+        """
+        Opens a request to a full URL with the current session and returns
+        the response object. If the server rejects the session (401), the
+        session is renewed once and idempotent requests (GET, HEAD, PUT and
+        DELETE) are sent again. A POST is not sent again, since it may create
+        a duplicate, and the 401 is raised after the renewal.
+        """
+        jsessionid = self.get_session_id()
+        for attempt in (1, 2):
+            req = urllib.request.Request(url)
+            if method == 'GET':
+                req.add_header("Cookie", "JSESSIONID=%s" % jsessionid)
+            else:
+                req.add_header("Cookie", "JSESSIONID=%s; dmx_workspace_id=%s" % (jsessionid, wsid))
+            req.add_header("Content-Type", "application/json")
+            for (key, val) in (headers or {}).items():
+                req.add_header(key, val)
+            req.get_method = lambda: method
             try:
-                key, val = this_line.strip().replace(" ", "").split('=', 1)
-            except ValueError:
-                print("INFO: No value found for %s in %s" % (key, config_file))
+                return(self.open_url(self.opener, req, payload))
+            except urllib.error.HTTPError as error_message:
+                if error_message.code != 401 or attempt == 2:
+                    raise
+                LOG_HTTP.debug("OPEN REQUEST : session %s was rejected, renewing session",
+                               jsessionid)
+                jsessionid = self.renew_session(jsessionid)
+                if method not in ('GET', 'HEAD', 'PUT', 'DELETE'):
+                    print("ERROR! The session was renewed, but the %s request to %s is not sent again." %
+                          (method, url))
+                    raise
+
+    def open_url(self, opener, req, payload=None):
+        """
+        Opens a request with opener and the time left until the deadline
+        (see remaining) as timeout. Timeouts and connection errors print an
+        error and exit like all request errors.
+        """
+        timeout = self.remaining()
+        try:
+            if timeout is None:
+                return(opener.open(req, payload))
+            return(opener.open(req, payload, timeout=timeout))
+        except urllib.error.HTTPError:
+            raise
+        except (urllib.error.URLError, socket.timeout, TimeoutError) as error_message:
+            print('OPEN REQUEST : Request Error: %s (%s)' % (error_message, req.full_url))
+            sys.exit(1)
+
+    @contextlib.contextmanager
+    def deadline(self, seconds=None):
+        """
+        This context manager limits an operation to seconds (default: the
+        timeout of the client). All requests sent within it by the current
+        thread, also by helpers like get_ws_id or get_session_id, get only
+        the time left as timeout and fail once it is over. Nested deadlines
+        can only be shorter than the outer one.
+        """
+        if seconds is None:
+            seconds = self.timeout
+        outer = getattr(self.local, 'deadline', None)
+        if seconds is not None:
+            deadline = timer() + seconds
+            self.local.deadline = deadline if outer is None else min(outer, deadline)
+        try:
+            yield
+        finally:
+            self.local.deadline = outer
+
+    def remaining(self):
+        """
+        This function returns the seconds left until the deadline of the
+        operation of the current thread, the timeout of the client without
+        deadline or None if there is neither. Once the deadline is over, it
+        prints an error and exits.
+        """
+        deadline = getattr(self.local, 'deadline', None)
+        if deadline is None:
+            return(self.timeout)
+        left = deadline - timer()
+        if left <= 0:
+            print('REMAINING : Deadline exceeded.')
+            sys.exit(1)
+        return(left)
+
+    def call_with_deadline(self, deadline, function, *args):
+        """
+        This function calls function with args in another thread under the
+        deadline of the thread it comes from.
+        """
+        self.local.deadline = deadline
+        try:
+            return(function(*args))
+        finally:
+            self.local.deadline = None
+
+    def hedge_delay(self):
+        """
+        This function returns the 95th percentile of the latencies of the
+        last GET requests or None, if there are less than 20 of them.
+        """
+        with self.latencies_lock:
+            if len(self.latencies) < 20:
+                return(None)
+            latencies = sorted(self.latencies)
+        return(latencies[int(len(latencies) * 0.95)])
+
+    @traced
+    def hedged_request(self, url, payload=None, wsid=None, method='GET'):
+        """
+        Sends a GET request like send_request. If there is no answer after
+        the 95th percentile of the latencies of the last GET requests (see
+        hedge_delay), the same request is sent a second time and whichever
+        answer arrives first is returned. The slower one is cancelled if it
+        has not started yet, else it runs on until its answer or the deadline
+        of the operation (see deadline) and its answer is dropped.
+        """
+        delay = self.hedge_delay()
+        if delay is None:
+            return(self.send_request(url, payload, wsid, method))
+        with self.cache_lock:
+            if self.hedge_executor is None:
+                self.hedge_executor = TracedExecutor(self, max(2, self.workers * 2))
+        deadline = getattr(self.local, 'deadline', None)
+        first = self.hedge_executor.submit(
+            self.call_with_deadline, deadline, self.send_request, url, payload, wsid, method)
+        done, pending = concurrent.futures.wait([first], timeout=delay)
+        if done:
+            return(first.result())
+        LOG_HTTP.debug("HEDGED REQUEST : no answer after %.3fs, sending %s again", delay, url)
+        second = self.hedge_executor.submit(
+            self.call_with_deadline, deadline, self.send_request, url, payload, wsid, method)
+        pending = {first, second}
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, timeout=self.remaining(),
+                return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                print('HEDGED REQUEST : Request Timeout: %s' % url)
+                sys.exit(1)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return(future.result())
+        ## both failed
+        return(first.result())
+
+    @traced
+    def renew_session(self, jsessionid):
+        """
+        Replaces a rejected session id by a new one and returns it. If many
+        threads hit the same rejected session, only the first one logs in
+        again and the others get its new session id.
+        """
+        with self.session_lock:
+            if self.jsessionid == jsessionid:
+                self.jsessionid = None
+        return(self.get_session_id())
+
+    @traced
+    def get_response(self, url='', payload=None, wsid=None, method='GET'):
+        """
+        Sends data to a given URL and returns the plain response.
+        Identical GET requests running at the same time in several threads
+        are sent only once and all of them get (a copy of) its response.
+        """
+        if method != 'GET':
+            return(self.send_request(url, payload, wsid, method))
+        with self.inflight_lock:
+            future = self.inflight.get(url)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self.inflight[url] = future
+        if not leader:
+            LOG_HTTP.debug("GET RESPONSE : waiting for identical request %s", url)
+            try:
+                return(copy.deepcopy(future.result(timeout=self.remaining())))
+            except concurrent.futures.TimeoutError:
+                print('GET RESPONSE : Request Timeout: %s' % url)
+                sys.exit(1)
+        try:
+            if self.hedge:
+                response = self.hedged_request(url, payload, wsid, method)
+            else:
+                response = self.send_request(url, payload, wsid, method)
+        except BaseException as error_message:
+            future.set_exception(error_message)
+            raise
+        else:
+            future.set_result(response)
+            return(response)
+        finally:
+            with self.inflight_lock:
+                del self.inflight[url]
+
+    @traced
+    def send_request(self, url='', payload=None, wsid=None, method='GET'):
+        """
+        Sends data to a given URL and returns the plain response.
+        """
+        host_url = self.get_host_url()
+        ## Do all relevant string replacements for url here and only here!
+        url = host_url + (url.replace(' ', '%20').replace('"', '%22'))
+        if payload is None:
+            payload = '{}'.encode('utf-8')
+        else:
+            # payload = payload.encode('utf-8')
+            payload = json.dumps(payload).encode('utf-8')
+        LOG_HTTP.debug("GET RESPONSE : Calling %s with method %s", url, method)
+        LOG_HTTP.debug("GET RESPONSE : JSESSIONID = %s, wsid = %s", self.jsessionid, wsid)
+        LOG_HTTP.debug("GET RESPONSE : Payload = %s", payload)
+        start = timer()
+        try:
+            response = self.open_request(url, payload, wsid, method).read()
+        except urllib.error.HTTPError as error_message:
+            print('GET RESPONSE : Request Data Error: '+str(error_message))
+            sys.exit(1)
+        except (socket.timeout, TimeoutError) as error_message:
+            print('GET RESPONSE : Request Timeout: %s (%s)' % (error_message, url))
+            sys.exit(1)
+        else:
+            if method == 'GET':
+                with self.latencies_lock:
+                    self.latencies.append(timer() - start)
+            LOG_HTTP.debug("GET RESPONSE : TYPE = %s, len = %s", type(response), len(response))
+            if len(response)==0 and method=='POST':
+                LOG_HTTP.debug('GET RESPONSE : return "OK" (%s)', method)
+                return("OK")
+            elif len(response)!=0 and method=='DELETE':
+                LOG_HTTP.debug('GET RESPONSE : return "OK" (%s)', method)
+                return("OK")
             else:
-                dmx_params[key.lower()] = val
-
-    port = dmx_params['org.osgi.service.http.port']
-    password = dmx_params['dmx.security.initial_admin_password']
-    config.add_section('Credentials')
-    config.set('Credentials', 'authname', 'admin') # usualy the admin user
-    config.set('Credentials', 'password', password) # usualy the admin password
-    config.add_section('Connection')
-    config.set('Connection', 'server', 'localhost') # usualy localhost
-    config.set('Connection', 'port', port) # usualy 8080
-    config.set('Connection', 'workspace', 'DMX') # usualy DMX
-
-    for mandatory in ['org.osgi.service.http.port', 'dmx.security.initial_admin_password']:
-        if mandatory not in list(dmx_params.keys()):
-            print("ERROR! Could not read %s in config file %s." % (mandatory, config_file))
+                response=self.check_response(response)
+                return(response)
+
+    @traced
+    def get_session_id(self):
+        """
+        Creates an initial session and returns the session id.
+        """
+        if self.jsessionid:
+            LOG_SESSION.debug("GET_SESSION_ID : use existing id")
+            return(self.jsessionid)
+        ## only one thread logs in, the others wait for its session
+        with self.session_lock:
+            if self.jsessionid:
+                return(self.jsessionid)
+            LOG_SESSION.debug("GET_SESSION_ID : get new id for user %s, authtype=%s",
+                              self.config.get('Credentials', 'authname'), self.authtype)
+            host_url = self.get_host_url()
+            url = host_url + 'core/topic/0'
+            LOG_SESSION.debug("GET_SESSION_ID : url = %s", url)
+            req = urllib.request.Request(url)
+            base_64_string = self.get_base_64()
+            req.add_header("Authorization", "%s %s" % (self.authtype, base_64_string))
+            req.add_header("Content-Type", "application/json")
+            cookie_jar = http.cookiejar.CookieJar()
+            opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookie_jar))
+            try:
+                self.open_url(opener, req)
+            except urllib.request.HTTPError as error_message:
+                print('Get Session ID Error: '+str(error_message))
+            else:
+                for cookie in cookie_jar:
+                    if cookie.name == "JSESSIONID":
+                        self.jsessionid = cookie.value
+                        add_secrets(self.jsessionid)
+            LOG_SESSION.debug("JSESSIONID: %s", self.jsessionid)
+        return(self.jsessionid)
+
+    @traced
+    def read_request(self, url, output=None, framing='raw'):
+        """
+        Reads the data from a given URL. If output is given, the response
+        is streamed to output (see stream_response) instead of returned.
+        """
+        ## TODO
+        ## Replace read_request with get_response
+        ##
+        LOG_HTTP.debug("READ REQUEST : url = %s", url)
+        if output is not None:
+            return(self.stream_response(url, output, framing))
+        response = self.get_response(url)
+        return(response)
+
+    @traced
+    def read_text(self, url):
+        """
+        Reads a plain text response (e.g. a username) from a given URL.
+        """
+        LOG_HTTP.debug("READ TEXT : url = %s", url)
+        try:
+            with self.open_request(self.get_host_url() + url) as response:
+                text = response.read().decode('utf-8').strip()
+        except urllib.error.HTTPError as error_message:
+            print('READ TEXT : Request Data Error: '+str(error_message))
             sys.exit(1)
-    return
+        except (socket.timeout, TimeoutError) as error_message:
+            print('READ TEXT : Request Timeout: %s (%s)' % (error_message, url))
+            sys.exit(1)
+        if text.startswith('"'):
+            text = json.loads(text)
+        return(text)
+
+    @traced
+    def stream_response(self, url, output, framing='raw', chunk_size=65536):
+        """
+        Streams the response of a GET request to a given URL in chunks to
+        output, a binary file object. With framing 'raw' the response is
+        written as it is, 'compact' removes all insignificant whitespace from
+        json and 'ndjson' writes every element of a json list in a line of
+        its own. The response is never held in memory as a whole.
+        """
+        if framing not in ('raw', 'compact', 'ndjson'):
+            print("ERROR! %s is not a valid framing." % framing)
+            sys.exit(1)
+        url = self.get_host_url() + (url.replace(' ', '%20').replace('"', '%22'))
+        LOG_HTTP.debug("STREAM RESPONSE : Calling %s with framing %s", url, framing)
+        try:
+            response = self.open_request(url)
+        except urllib.error.HTTPError as error_message:
+            print('STREAM RESPONSE : Request Data Error: '+str(error_message))
+            sys.exit(1)
+        size = 0
+        with response:
+            chunks = self.read_chunks(response, chunk_size)
+            if framing != 'raw' and 'json' in response.headers.get('Content-Type', ''):
+                chunks = reframe_json(chunks, framing == 'ndjson')
+            try:
+                for chunk in chunks:
+                    output.write(chunk)
+                    size += len(chunk)
+            except (socket.timeout, TimeoutError) as error_message:
+                print('STREAM RESPONSE : Request Timeout: %s (%s)' % (error_message, url))
+                sys.exit(1)
+        output.flush()
+        LOG_HTTP.debug("STREAM RESPONSE : %s bytes written", size)
+        return
+
+    def iter_list(self, url, chunk_size=65536):
+        """
+        This generator yields the elements of the json list from a given URL
+        one by one as they come from the server (see reframe_json), so the
+        list is never held in memory as a whole.
+        """
+        url = self.get_host_url() + (url.replace(' ', '%20').replace('"', '%22'))
+        LOG_HTTP.debug("ITER LIST : Calling %s", url)
+        try:
+            response = self.open_request(url)
+        except urllib.error.HTTPError as error_message:
+            print('ITER LIST : Request Data Error: '+str(error_message))
+            sys.exit(1)
+        with response:
+            rest = b''
+            try:
+                for chunk in reframe_json(self.read_chunks(response, chunk_size), True):
+                    lines = (rest + chunk).split(b'\n')
+                    rest = lines.pop()
+                    for line in lines:
+                        if line:
+                            yield json.loads(line)
+            except (socket.timeout, TimeoutError) as error_message:
+                print('ITER LIST : Request Timeout: %s (%s)' % (error_message, url))
+                sys.exit(1)
+            if rest.strip():
+                yield json.loads(rest)
+
+    def read_chunks(self, response, chunk_size=65536):
+        """
+        This generator yields the body of a response in chunks of chunk_size
+        as long as the deadline of the operation is not over (see remaining).
+        """
+        while True:
+            self.remaining()
+            chunk = response.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    @traced
+    def write_request(self, url, payload=None, workspace=None, method='POST', expect_json=True):
+        """
+        Writes the data to a given URL.
+        """
+        ## TODO
+        ## Replace write_request with get_response
+        ##
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        wsid = self.get_ws_id(workspace)
+        LOG_HTTP.debug("WRITE REQUEST : workspace = %s has wsid = %s", workspace, wsid)
+        response = self.get_response(url, payload, wsid, method)
+        return(response)
+
+    def delete_request(self, url):
+        """
+        Sends the request with method 'DELETE'.
+        """
+        LOG_HTTP.debug("DELETE REQUEST : url = %s", url)
+        response = self.get_response(url, method='DELETE')
+        return(response)
+
+    @traced
+    def get_ws_id(self, workspace):
+        """
+        This function gets the workspace ID for a workspace by its name.
+        It's much faster to get it by its uri, if present.
+        """
+        with self.cache_lock:
+            topic_id = self.wsid_cache.get(workspace)
+        if topic_id is not None:
+            LOG_LOOKUP.debug("GET_WS_ID : Workspace ID for workspace %s from cache: %s",
+                             workspace, topic_id)
+            return topic_id
+        ## else
+        LOG_LOOKUP.debug("GET_WS_ID : Searching Workspace ID for workspace %s", workspace)
+        url = ('core/topics/query/"%s"?topicTypeUri=dmx.workspaces.workspace_name'
+               % workspace)
+        ## find the workspace_name in the result
+        response = self.get_response(url)
+        topics = response["topics"]
+        for topic in topics:
+            ## find the workspace_name in the result
+            if topic['typeUri'] == 'dmx.workspaces.workspace_name':
+                wsnameid = (topic['id'])
+                break
+        LOG_LOOKUP.debug("GET WS ID : wsnameid = %s", wsnameid)
+        response = self.get_related(wsnameid, 'dmx.core.composition', 'dmx.core.child',
+                                    'dmx.core.parent', 'dmx.workspaces.workspace')
+        ## TODO - check if still needed:
+        ## The following is a workarround to fix
+        ## Pylint3 Error: Sequence index is not an int, slice,
+        ## or instance with __index__ (invalid-sequence-index)
+        topic = json.loads(json.dumps(response[0]))
+        topic_id = topic['id']
+        with self.cache_lock:
+            self.wsid_cache[workspace] = topic_id
+        LOG_LOOKUP.debug("WS ID = %s", topic_id)
+        return(topic_id)
+
+    @traced
+    def get_topicmap_id(self, tm_name):
+        """
+        This function gets the Topic ID for a topicmap by its name.
+        It's much faster to get it by its uri, if present.
+        """
+        LOG_LOOKUP.debug("GET_TOPICMAP_ID : Searching Topic ID for topicmap %s", tm_name)
+        url = ('core/topics/query/"%s"?topicTypeUri=dmx.topicmaps.topicmap_name'
+               % tm_name)
+        ## find the workspace_name in the result
+        response = self.get_response(url)
+        topics = response["topics"]
+        for topic in topics:
+            ## find the workspace_name in the result
+            if topic['typeUri'] == 'dmx.topicmaps.topicmap_name':
+                tm_name_id = (topic['id'])
+                # print('topicmap_id=', topic_id)
+                break
+        LOG_LOOKUP.debug("GET_TOPICMAP_ID : tm_name_id = %s", tm_name_id)
+        response = self.get_related(tm_name_id, 'dmx.core.composition', 'dmx.core.child',
+                                    'dmx.core.parent', 'dmx.topicmaps.topicmap')
+        ## TODO - check if still needed:
+        ## The following is a workarround to fix
+        ## Pylint3 Error: Sequence index is not an int, slice,
+        ## or instance with __index__ (invalid-sequence-index)
+        topic = json.loads(json.dumps(response[0]))
+        topic_id = topic['id']
+        LOG_LOOKUP.debug("WS ID = %s", topic_id)
+        LOG_LOOKUP.debug("MAP ID = %s", topic_id)
+        return(topic_id)
+
+    @traced
+    def create_user(self, dm_user='testuser', dm_pass='testpass', check=True):
+        """
+        This function creates a new user on the server. With check False
+        the existing users are not fetched first, for callers which know
+        the user is missing (see provision).
+        """
+        ## check if username exits
+        if check:
+            users = list(self.get_items('dmx.accesscontrol.username').values())
+            LOG_WRITE.debug("CREATE USER : users=%s", users)
+        else:
+            users = []
+        if dm_user in users:
+            print("ERROR! User '%s' exists." % dm_user)
+            sys.exit(1)
+        else:
+            ## create user
+            url = 'access-control/user-account'
+            hash_object = hashlib.sha256(dm_pass.encode('UTF-8'))
+            dm_pass = '-SHA256-'+hash_object.hexdigest()
+            payload = {'username' : dm_user, 'password' : dm_pass}
+            topic_id = self.write_request(url, payload)["id"]
+            LOG_WRITE.debug("CREATE USER : topic_id = %s", topic_id)
+            LOG_WRITE.debug("CREATE USER : New user '%s' was created with topic_id %s.",
+                            dm_user, topic_id)
+            return(topic_id)
+
+    @traced
+    def create_topicmap(self, tm_name, tm_type='dmx.topicmaps.topicmap', workspace=None,
+                        check=True):
+        """
+        This function creates a new topicmap on the server, unless the
+        workspace has a topicmap of that name already. With check False
+        the topicmaps of the workspace are not fetched first, for callers
+        which know the map is missing (see provision).
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        ## check if topicmap exits in the workspace
+        maps = {}
+        if check:
+            maps = dict((topic['value'], topic['id']) for topic in self.read_request(
+                'workspace/%s/topics/dmx.topicmaps.topicmap' % self.get_ws_id(workspace)))
+        LOG_WRITE.debug("CREATE TOPICMAP : %s", tm_name)
+        LOG_WRITE.debug("CREATE TOPICMAP : maps = %s", maps)
+        if tm_name in maps:
+            topic_id = maps[tm_name]
+            LOG_WRITE.debug("INFO: Map '%s' exists (ID %s).", tm_name, topic_id)
+        else:
+            url = ('topicmaps?name=%s&topicmapTypeUri=%s' % (tm_name, tm_type))
+            ## for the moment, this requires an empty json string exactly like this
+            payload = json.loads('{"": ""}')
+            topic_id = self.write_request(url, payload, workspace)["id"]
+            LOG_WRITE.debug("New topicmap '%s' was created with topic_id %s.", tm_name, topic_id)
+        return(topic_id)
+
+    @traced
+    def create_ws(self, workspace, ws_type, uri=''):
+        """
+        This function creates a workspace with workspace uri
+        (needed for id) on the server.
+        """
+        ## `uri` is optional.
+        if not uri:
+            uri = workspace.lower()+'.uri'
+        url = ('workspaces?name=%s&uri=%s&sharingModeUri=dmx.workspaces.%s' %
+               (workspace, uri, ws_type))
+        topic_id = self.write_request(url, expect_json=True)["id"]
+        with self.cache_lock:
+            self.wsid_cache[workspace] = topic_id
+        return(topic_id)
+
+    @traced
+    def create_member(self, workspace=None, dm_user='username'):
+        """
+        This function creates a user memebrship association for
+        the workspace on the server.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        LOG_WRITE.debug("CREATE MEMBER : Creating Workspace membership for user %s in %s",
+                        dm_user, workspace)
+        wsid = self.get_ws_id(workspace)
+        url = ('access-control/user/%s/workspace/%s' %
+               (dm_user, wsid))
+        response = self.write_request(url, expect_json=False)
+        return(response)
+
+    @traced
+    def create_note(self, title, body, workspace=None):
+        """
+        This function creates a new note with text body
+        in the workspace on the server.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        LOG_WRITE.debug("CREATE NOTE : Creating a new note %s with text body %s in workspace %s",
+                        title, body, workspace)
+        url = 'core/topic/'
+        payload = json.dumps(
+            {
+                "children": {
+                    "dmx.notes.text": body,
+                    "dmx.notes.title": title
+                },
+                "typeUri": "dmx.notes.note"
+            }
+        )
+        payload = json.loads(payload)
+        LOG_WRITE.debug("NEW NOTE: %s", payload)
+        topic_id = self.write_request(url, payload, workspace)["id"]
+        return(topic_id)
+
+    def update_note(self, topic_id, title, body, workspace=None):
+        """
+        This function replaces the title and the text body of the note
+        with topic_id on the server.
+        """
+        LOG_WRITE.debug("UPDATE NOTE : Updating note %s with title %s", topic_id, title)
+        url = 'core/topic/%s' % topic_id
+        payload = {
+            "id": int(topic_id),
+            "children": {
+                "dmx.notes.text": body,
+                "dmx.notes.title": title
+            },
+            "typeUri": "dmx.notes.note"
+        }
+        response = self.write_request(url, payload, workspace, method='PUT')
+        return(response)
+
+    def sync_notes(self, directory, workspace=None, manifest=None, workers=None):
+        """
+        This function mirrors the markdown files (*.md) of a directory tree
+        to notes in the workspace. The manifest file (default: .dmx_notes.json
+        in directory) keeps the topic id and the sha256 hash of every file,
+        so only notes of new, changed or deleted files are created, updated
+        or deleted, concurrently. Files with the same size and mtime as in
+        the manifest are not even read. A note of the manifest which is gone
+        from the server is created again. Returns a dictionary with the
+        number of created, updated, deleted and unchanged notes.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        if workers is None:
+            workers = self.workers
+        if manifest is None:
+            manifest = os.path.join(directory, '.dmx_notes.json')
+        if not os.path.isdir(directory):
+            print("ERROR! %s is not a directory." % directory)
+            sys.exit(1)
+        host_url = self.get_host_url()
+        files = read_manifest(manifest)
+        if files.pop('.', {'host': host_url, 'workspace': workspace}) != {
+                'host': host_url, 'workspace': workspace}:
+            print("ERROR! Manifest %s belongs to another host or workspace." % manifest)
+            sys.exit(1)
+        paths = []
+        for (dirpath, dirnames, filenames) in os.walk(directory):
+            dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+            for filename in sorted(filenames):
+                if filename.endswith('.md') and not filename.startswith('.'):
+                    paths.append(os.path.relpath(os.path.join(dirpath, filename), directory))
+
+        def scan(path):
+            ## returns (path, entry, markdown text or None if unchanged)
+            stat = os.stat(os.path.join(directory, path))
+            entry = dict(files.get(path, {}), size=stat.st_size, mtime=stat.st_mtime_ns)
+            if path in files and (files[path].get('size'), files[path].get('mtime')) == (
+                    stat.st_size, stat.st_mtime_ns):
+                return((path, entry, None))
+            with open(os.path.join(directory, path), 'rb') as data_file:
+                data = data_file.read()
+            entry['sha256'] = hashlib.sha256(data).hexdigest()
+            if path in files and files[path].get('sha256') == entry['sha256']:
+                return((path, entry, None))
+            return((path, entry, data.decode('utf-8')))
+
+        def sync(change):
+            ## returns (path, entry or None if deleted, what was done)
+            (path, entry, text) = change
+            if text is None:
+                LOG_BULK.debug("SYNC NOTES : deleting note %s of %s", entry['id'], path)
+                try:
+                    self.delete_topic(entry['id'])
+                except SystemExit:
+                    if self.topic_exists(entry['id']):
+                        raise
+                return((path, None, 'deleted'))
+            title, body = markdown_to_note(text, path)
+            if entry.get('id') is not None:
+                try:
+                    self.update_note(entry['id'], title, body, workspace)
+                    return((path, entry, 'updated'))
+                except SystemExit:
+                    if self.topic_exists(entry['id']):
+                        raise
+                LOG_BULK.info("SYNC NOTES : note %s of %s is gone, creating it again",
+                              entry['id'], path)
+            entry['id'] = self.create_note(title, body, workspace)
+            return((path, entry, 'created'))
+
+        counts = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+            changes = []
+            for (path, entry, text) in executor.map(scan, paths):
+                if text is None:
+                    files[path] = entry
+                    counts['unchanged'] += 1
+                else:
+                    changes.append((path, entry, text))
+            for path in sorted(set(files) - set(paths)):
+                changes.append((path, files[path], None))
+            LOG_BULK.info("SYNC NOTES : %s notes to sync, %s unchanged",
+                          len(changes), counts['unchanged'])
+            error = None
+            try:
+                for future in concurrent.futures.as_completed(
+                        [executor.submit(sync, change) for change in changes]):
+                    try:
+                        (path, entry, done) = future.result()
+                    except BaseException as error_message:
+                        ## wait for the other notes, so that they get into the manifest
+                        if error is None:
+                            error = error_message
+                        continue
+                    ## count only what was written
+                    counts[done] += 1
+                    if entry is None:
+                        del files[path]
+                    else:
+                        files[path] = entry
+            finally:
+                ## keep what was done, even if a request failed
+                files['.'] = {'host': host_url, 'workspace': workspace}
+                write_manifest(manifest, files)
+        LOG_BULK.info("SYNC NOTES : %s", counts)
+        if error is not None:
+            raise error
+        return(counts)
+
+    def get_type(self, type_uri, kind='topic'):
+        """
+        This function fetches the definition of a topic type (or of an assoc
+        type with kind 'assoc') by its uri and returns it, or None if there
+        is no such type. Definitions are fetched once and then cached.
+        """
+        key = (kind, type_uri)
+        with self.cache_lock:
+            future = self.type_cache.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self.type_cache[key] = future
+        if not leader:
+            return(future.result())
+        LOG_LOOKUP.debug("GET TYPE : fetching %s type %s", kind, type_uri)
+        try:
+            url = self.get_host_url() + ('core/%s-type/%s' % (kind, urllib.parse.quote(type_uri)))
+            try:
+                with self.open_request(url) as response:
+                    type_def = json.loads(response.read())
+            except urllib.error.HTTPError as error_message:
+                if error_message.code != 404:
+                    raise
+                type_def = None
+        except BaseException as error_message:
+            ## do not cache the failure, the next call fetches the type again
+            with self.cache_lock:
+                if self.type_cache.get(key) is future:
+                    del self.type_cache[key]
+            future.set_exception(error_message)
+            raise
+        future.set_result(type_def)
+        return(type_def)
+
+    def validate_payload(self, payload, type_uri=None, kind='topic', path='payload'):
+        """
+        This function checks a topic payload (or an assoc payload with kind
+        'assoc') against the type definitions from the server: the type
+        must exist, children must be defined by the type with the right
+        cardinality and values must match the data types. Returns a list of
+        error messages, which is empty if the payload is valid.
+        """
+        if not isinstance(payload, dict):
+            return(['%s: expected a json object' % path])
+        errors = []
+        if type_uri is None:
+            type_uri = payload.get('typeUri')
+            if not type_uri:
+                return(['%s: missing typeUri' % path])
+        elif payload.get('typeUri', type_uri) != type_uri:
+            errors.append('%s: typeUri %s is not %s' % (path, payload['typeUri'], type_uri))
+        ## only top level assocs have players
+        if kind == 'assoc' and path == 'payload':
+            for player in ('player1', 'player2'):
+                if not (isinstance(payload.get(player), dict) and
+                        set(payload[player]) & set(('topicId', 'topicUri', 'assocId'))):
+                    errors.append('%s: missing %s' % (path, player))
+        type_def = self.get_type(type_uri, kind)
+        if type_def is None:
+            return(errors + ['%s: unknown %s type %s' % (path, kind, type_uri)])
+        if 'value' in payload:
+            errors += self.validate_value(payload['value'], type_def, path + '/value')
+        if 'children' not in payload:
+            return(errors)
+        if not isinstance(payload['children'], dict):
+            return(errors + ['%s/children: expected a json object' % path])
+        comp_defs = {}
+        for comp_def in type_def.get('compDefs', []):
+            comp_def_uri = comp_def.get('compDefUri') or comp_def['childTypeUri']
+            if '#' not in comp_def_uri and comp_def.get('customAssocTypeUri'):
+                comp_def_uri = comp_def_uri + '#' + comp_def['customAssocTypeUri']
+            comp_defs[comp_def_uri] = comp_def
+        for (child_uri, child) in payload['children'].items():
+            child_path = '%s/%s' % (path, child_uri)
+            if child_uri not in comp_defs:
+                errors.append('%s: %s is no child of %s' % (child_path, child_uri, type_uri))
+                continue
+            if isinstance(child, list):
+                if comp_defs[child_uri].get('childCardinalityUri') != 'dmx.core.many':
+                    errors.append('%s: only one value allowed' % child_path)
+                values = child
+            else:
+                values = [child]
+            assoc_type_uri = None
+            if '#' in child_uri:
+                assoc_type_uri = child_uri.split('#', 1)[1]
+            for (number, value) in enumerate(values):
+                if isinstance(child, list):
+                    value_path = '%s[%s]' % (child_path, number)
+                else:
+                    value_path = child_path
+                if not isinstance(value, dict):
+                    child_type = self.get_type(comp_defs[child_uri]['childTypeUri'])
+                    if child_type is None:
+                        errors.append('%s: unknown topic type %s' %
+                                      (value_path, comp_defs[child_uri]['childTypeUri']))
+                    else:
+                        errors += self.validate_value(value, child_type, value_path)
+                    continue
+                if not set(value) & set(('id', 'uri', 'typeUri', 'value', 'children', 'assoc')):
+                    ## a composite child may also be given as its children only
+                    value = {'children': value}
+                if 'assoc' in value and assoc_type_uri:
+                    errors += self.validate_payload(value['assoc'], assoc_type_uri, 'assoc',
+                                                    value_path + '/assoc')
+                errors += self.validate_payload(
+                    {key: val for (key, val) in value.items() if key in ('typeUri', 'value', 'children')},
+                    comp_defs[child_uri]['childTypeUri'], path=value_path)
+        return(errors)
+
+    def validate_value(self, value, type_def, path='value'):
+        """
+        This function checks a simple value against the data type of a type
+        definition. References (ref_id:..., ref_uri:...) are always valid.
+        Returns a list of error messages.
+        """
+        if isinstance(value, str) and (value.startswith('ref_id:') or value.startswith('ref_uri:')):
+            return([])
+        data_type = type_def.get('dataTypeUri')
+        if data_type == 'dmx.core.composite':
+            return(['%s: %s is composite, expected children' % (path, type_def.get('uri'))])
+        if data_type in ('dmx.core.text', 'dmx.core.html') and not isinstance(value, str):
+            return(['%s: expected text for %s' % (path, type_def.get('uri'))])
+        if data_type == 'dmx.core.number':
+            if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                return(['%s: expected a number for %s' % (path, type_def.get('uri'))])
+            if isinstance(value, str) and value.strip():
+                try:
+                    float(value)
+                except ValueError:
+                    return(['%s: expected a number for %s' % (path, type_def.get('uri'))])
+        if data_type == 'dmx.core.boolean' and value not in (True, False, 'true', 'false'):
+            return(['%s: expected true or false for %s' % (path, type_def.get('uri'))])
+        return([])
+
+    def validate_file(self, filename, kind='topic', workers=None):
+        """
+        This function validates all payloads of a json or ndjson file (see
+        read_json_records) concurrently. Returns a list of (number, errors)
+        of the invalid payloads.
+        """
+        invalid = self.validate_records(read_json_records(filename), kind, workers)
+        LOG_WRITE.debug("VALIDATE FILE : %s invalid payloads in %s", len(invalid), filename)
+        return(invalid)
+
+    def validate_records(self, records, kind='topic', workers=None):
+        """
+        This function validates the payloads of records, an iterable of
+        (offset, payload) tuples, concurrently. Payloads which are None are
+        skipped. Returns a list of (number, errors) of the invalid payloads.
+        """
+        if workers is None:
+            workers = self.workers
+        with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+            results = bounded_map(
+                executor, lambda record: self.validate_payload(record[1], kind=kind)
+                if record[1] is not None else [], records, workers * 4)
+            return([(number, errors) for (number, errors) in enumerate(results) if errors])
+
+    def check_records(self, records, filename, kind='topic', workers=None):
+        """
+        This function validates the payloads of records (see
+        validate_records) before any of them is sent, if payload validation
+        is enabled, and exits with the errors of all invalid payloads.
+        """
+        if not self.validate_payloads:
+            return
+        invalid = self.validate_records(records, kind, workers)
+        if invalid:
+            for (number, errors) in invalid:
+                for error_message in errors:
+                    print("ERROR! #%s in file %s: %s" % (number, filename, error_message))
+            sys.exit(1)
+        return
+
+    def check_payload_types(self, payload, kind='topic'):
+        """
+        This function validates a payload before it is sent, if payload
+        validation is enabled, and exits with all errors if it is invalid.
+        """
+        if not self.validate_payloads:
+            return
+        errors = self.validate_payload(payload, kind=kind)
+        if errors:
+            for error_message in errors:
+                print("ERROR! %s" % error_message)
+            sys.exit(1)
+        return
+
+    @traced
+    def send_data(self, payload, workspace=None):
+        """
+        This function sends the topics according to payload to
+        the workspace name on the server.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        LOG_WRITE.debug("SEND DATA: sending data to workspace '%s'", workspace)
+        self.check_payload_types(payload)
+        url = 'core/topic/'
+        topic_id = self.write_request(url, payload, workspace)["id"]
+        return(topic_id)
+
+    @traced
+    def create_assoc(self, payload, workspace=None):
+        """
+        This function sends the assocs according to payload to
+        the workspace name on the server.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        LOG_WRITE.debug("SEND DATA: sending data to workspace '%s'", workspace)
+        self.check_payload_types(payload, 'assoc')
+        url = 'core/assoc/'
+        assoc_id = self.write_request(url, payload, workspace)["id"]
+        return(assoc_id)
+
+    def journal_source(self, filename):
+        """
+        This function returns the (host, input) part of the journal keys
+        of the records of file filename.
+        """
+        return((self.get_host_url(), os.path.abspath(filename)))
+
+    def journaled(self, operation, source, offset):
+        """
+        This function tells if the journal has the result of operation for
+        the record at offset of source (see journal_source).
+        """
+        return(self.journal is not None and (operation,) + source + (offset,) in self.journal)
+
+    @traced
+    def checkpoint(self, operation, source, offset, function, *args):
+        """
+        This function calls function with args and journals the result of
+        operation for the record at offset of source (see journal_source).
+        If the journal already has the result, it is returned instead. The
+        call gets the timeout of the client as deadline (see deadline).
+        """
+        if self.journal is None:
+            with self.deadline():
+                return(function(*args))
+        key = (operation,) + source + (offset,)
+        if key in self.journal:
+            LOG_BULK.debug("CHECKPOINT : %s at offset %s of %s done already",
+                           operation, offset, source[1])
+            return(self.journal.get(key))
+        with self.deadline():
+            result = function(*args)
+        self.journal.record(key, result)
+        return(result)
+
+    def send_get(self, url, output=None, framing='raw'):
+        """
+        This function sends a GET request to custom (a plugin) REST resource.
+        If output is given, the response is streamed to output.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        LOG_HTTP.debug("SEND GET : Sending GET to '%s'", url)
+        response = self.read_request(url, output, framing)
+        return(response)
+
+    def send_post(self, url, workspace=None):
+        """
+        This function sends a POST request to custom (a plugin) REST resource.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        LOG_HTTP.debug("SEND POST : Sending POST to '%s' in Workspace %s", url, workspace)
+        response = self.write_request(url, workspace)
+        return(response)
+
+    @traced
+    def reveal_topic(self, workspace, map_id, topic_id, x_val=0, y_val=0, pinned=False):
+        """
+        This function reveales a topic (id) on a topicmap (id) at
+        position x, y, pinned or unpinned
+        """
+        if pinned:
+            pinned = str('true')
+        else:
+            pinned = str('false')
+        url = ('topicmaps/%s/topic/%s' % (map_id, topic_id))
+        payload = json.loads(
+            '{ "dmx.topicmaps.x": %s, "dmx.topicmaps.y": %s, \
+            "dmx.topicmaps.visibility": true, "dmx.topicmaps.pinned": %s }'
+            % (x_val, y_val, pinned)
+        )
+        response = self.write_request(url, payload, workspace, expect_json=False)
+        return(response)
+
+    @traced
+    def reveal_assoc(self, map_id, assoc_id, workspace=None):
+        """
+        This function reveales an assoc (id) on a topicmap (id)
+        """
+        # payload = {"": ""}
+        url = ('topicmaps/%s/assoc/%s' % (map_id, assoc_id))
+        payload = json.loads(
+            '{ "dmx.topicmaps.visibility": true, "dmx.topicmaps.pinned": false }'
+        )
+        response = self.write_request(url, payload, workspace, expect_json=False)
+        return(response)
+
+    def get_topicmap(self, map_id, children=False):
+        """
+        This function fetches a topicmap (id) with all its topics and assocs
+        and their view properties (dmx.topicmaps.x, y, visibility, pinned).
+        """
+        url = ('topicmaps/%s' % map_id)
+        if children:
+            url = url + '?children=true'
+        return(self.read_request(url))
+
+    def export_topicmap(self, map_id, export_format='graphml', output=None,
+                        children=False, workers=None):
+        """
+        This function writes a topicmap (id) as graphml, dot or json graph to
+        output. With children the details of all topics are fetched
+        concurrently and added to the nodes. Nodes are written as soon as
+        their details arrive, so only a few hundred topics are kept in memory
+        at a time. Hidden topics and assocs are left out. An assoc which is
+        the player of another assoc is written as a node of its own, so that
+        every edge connects two nodes.
+        """
+        if export_format not in ('graphml', 'dot', 'json'):
+            print("ERROR! %s is not a valid export format." % export_format)
+            sys.exit(1)
+        if output is None:
+            output = sys.stdout
+        if workers is None:
+            workers = self.workers
+        topicmap = self.get_topicmap(map_id)
+
+        def visible(item):
+            return(item.get('viewProps', {}).get('dmx.topicmaps.visibility', True) is not False)
+
+        topics = [topic for topic in topicmap.get('topics', []) if visible(topic)]
+        topic_ids = set(topic['id'] for topic in topics)
+        ## drop the assocs whose players are not on the map, until none is left
+        kept = dict((assoc['id'], assoc) for assoc in topicmap.get('assocs', []) if visible(assoc))
+        dropped = True
+        while dropped:
+            dropped = False
+            for assoc in list(kept.values()):
+                for player in (assoc['player1'], assoc['player2']):
+                    if player.get('topicId') not in topic_ids and player.get('assocId') not in kept:
+                        del kept[assoc['id']]
+                        dropped = True
+                        break
+        assocs = list(kept.values())
+        linked = set(player.get('assocId') for assoc in assocs
+                     for player in (assoc['player1'], assoc['player2']))
+        assoc_nodes = [assoc for assoc in assocs if assoc['id'] in linked]
+        name = (topicmap.get('topic') or {}).get('value', str(map_id))
+        LOG_BULK.info("EXPORT TOPICMAP : %s topics and %s assocs on map %s",
+                      len(topics), len(assocs), map_id)
+
+        def nodes():
+            ## fetch the details in chunks to keep the memory bounded
+            for start in range(0, len(topics), workers * 32):
+                chunk = topics[start:start + workers * 32]
+                if children:
+                    details = self.get_topics([topic['id'] for topic in chunk], workers)
+                else:
+                    details = itertools.repeat(None)
+                for topic, detail in zip(chunk, details):
+                    yield (topic, detail)
+
+        def player_id(player):
+            return(player.get('topicId', player.get('assocId')))
+
+        if export_format == 'graphml':
+            output.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                         '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+            for (key, domain, key_type) in (
+                    ('label', 'all', 'string'), ('typeUri', 'all', 'string'),
+                    ('x', 'node', 'double'), ('y', 'node', 'double'),
+                    ('pinned', 'node', 'boolean'), ('children', 'node', 'string')):
+                output.write('  <key id="%s" for="%s" attr.name="%s" attr.type="%s"/>\n' %
+                             (key, domain, key, key_type))
+            output.write('  <graph id=%s edgedefault="undirected">\n' % quoteattr(name))
+            for topic, detail in nodes():
+                view_props = topic.get('viewProps', {})
+                output.write('    <node id="%s">\n' % topic['id'])
+                output.write('      <data key="label">%s</data>\n' % escape(str(topic.get('value', ''))))
+                output.write('      <data key="typeUri">%s</data>\n' % escape(topic.get('typeUri', '')))
+                output.write('      <data key="x">%s</data>\n' % view_props.get('dmx.topicmaps.x', 0))
+                output.write('      <data key="y">%s</data>\n' % view_props.get('dmx.topicmaps.y', 0))
+                output.write('      <data key="pinned">%s</data>\n' %
+                             str(view_props.get('dmx.topicmaps.pinned', False)).lower())
+                if detail is not None:
+                    output.write('      <data key="children">%s</data>\n' %
+                                 escape(json.dumps(detail.get('children', {}), sort_keys=True)))
+                output.write('    </node>\n')
+            for assoc in assoc_nodes:
+                output.write('    <node id="%s">\n' % assoc['id'])
+                output.write('      <data key="label">%s</data>\n' % escape(str(assoc.get('value', ''))))
+                output.write('      <data key="typeUri">%s</data>\n' % escape(assoc.get('typeUri', '')))
+                output.write('    </node>\n')
+            for assoc in assocs:
+                output.write('    <edge id="%s" source="%s" target="%s">\n' %
+                             (assoc['id'], player_id(assoc['player1']), player_id(assoc['player2'])))
+                output.write('      <data key="label">%s</data>\n' % escape(str(assoc.get('value', ''))))
+                output.write('      <data key="typeUri">%s</data>\n' % escape(assoc.get('typeUri', '')))
+                output.write('    </edge>\n')
+            output.write('  </graph>\n</graphml>\n')
+        elif export_format == 'dot':
+            def quote(value):
+                return('"%s"' % str(value).replace('\\', '\\\\').replace('"', '\\"'))
+            output.write('graph %s {\n' % quote(name))
+            for topic, detail in nodes():
+                view_props = topic.get('viewProps', {})
+                attrs = [
+                    'label=%s' % quote(topic.get('value', '')),
+                    'typeUri=%s' % quote(topic.get('typeUri', '')),
+                    'pos=%s' % quote('%s,%s%s' % (
+                        view_props.get('dmx.topicmaps.x', 0),
+                        view_props.get('dmx.topicmaps.y', 0),
+                        '!' if view_props.get('dmx.topicmaps.pinned') else ''))
+                ]
+                if detail is not None:
+                    attrs.append('children=%s' % quote(json.dumps(detail.get('children', {}), sort_keys=True)))
+                output.write('  %s [%s];\n' % (topic['id'], ', '.join(attrs)))
+            for assoc in assoc_nodes:
+                output.write('  %s [label=%s, typeUri=%s, shape=point];\n' % (
+                    assoc['id'], quote(assoc.get('value', '')), quote(assoc.get('typeUri', ''))))
+            for assoc in assocs:
+                output.write('  %s -- %s [id=%s, label=%s, typeUri=%s];\n' % (
+                    player_id(assoc['player1']), player_id(assoc['player2']), assoc['id'],
+                    quote(assoc.get('value', '')), quote(assoc.get('typeUri', ''))))
+            output.write('}\n')
+        else:
+            output.write('{"graph": {"id": %s, "label": %s, "directed": false, "nodes": {' %
+                         (json.dumps(str(map_id)), json.dumps(name)))
+            separator = '\n'
+            for topic, detail in nodes():
+                metadata = {"typeUri": topic.get('typeUri'), "viewProps": topic.get('viewProps', {})}
+                if detail is not None:
+                    metadata["children"] = detail.get('children', {})
+                output.write('%s%s: %s' % (separator, json.dumps(str(topic['id'])),
+                                           json.dumps({"label": topic.get('value', ''),
+                                                       "metadata": metadata})))
+                separator = ',\n'
+            for assoc in assoc_nodes:
+                output.write('%s%s: %s' % (separator, json.dumps(str(assoc['id'])),
+                                           json.dumps({"label": assoc.get('value', ''),
+                                                       "metadata": {"typeUri": assoc.get('typeUri'),
+                                                                    "assoc": True}})))
+                separator = ',\n'
+            output.write('\n}, "edges": [')
+            separator = '\n'
+            for assoc in assocs:
+                output.write(separator + json.dumps({
+                    "id": str(assoc['id']),
+                    "source": str(player_id(assoc['player1'])),
+                    "target": str(player_id(assoc['player2'])),
+                    "relation": assoc.get('typeUri'),
+                    "label": assoc.get('value', '')
+                }))
+                separator = ',\n'
+            output.write('\n]}}\n')
+        output.flush()
+        return
+
+    def get_topic_id_by_name(self, name):
+        """
+        This function gets the topic ID for a topic by its value (name).
+        The topic must match the name exactly and unambiguously.
+        """
+        with self.cache_lock:
+            topic_id = self.topic_id_cache.get(name)
+        if topic_id is not None:
+            LOG_LOOKUP.debug("GET_TOPIC_ID_BY_NAME : Topic ID for '%s' from cache: %s",
+                             name, topic_id)
+            return topic_id
+        ## else
+        url = ('core/topics/query/"%s"' % urllib.parse.quote(name, safe=''))
+        response = self.get_response(url)
+        topic_ids = [topic['id'] for topic in response["topics"] if topic['value'] == name]
+        if len(topic_ids) != 1:
+            print("ERROR! Found %s topics named '%s'." % (len(topic_ids), name))
+            sys.exit(1)
+        with self.cache_lock:
+            self.topic_id_cache[name] = topic_ids[0]
+        LOG_LOOKUP.debug("GET_TOPIC_ID_BY_NAME : '%s' has topic ID %s", name, topic_ids[0])
+        return(topic_ids[0])
+
+    def get_player(self, ref, role_type='dmx.core.default'):
+        """
+        This function returns the player of an assoc payload for a topic
+        reference. References may be a topic id ("1234" or "ref_id:1234"),
+        a topic uri ("ref_uri:dmx.workspaces.workspace") or a topic name
+        ("Berlin" or, for names made of digits only, "ref_name:1984").
+        """
+        name = ref_name(ref)
+        if name is not None:
+            return({"topicId": self.get_topic_id_by_name(name), "roleTypeUri": role_type})
+        ref = str(ref).strip()
+        if ref.startswith('ref_uri:'):
+            ## the server resolves uris itself, no need for a lookup
+            return({"topicUri": ref[len('ref_uri:'):], "roleTypeUri": role_type})
+        if ref.startswith('ref_id:'):
+            ref = ref[len('ref_id:'):]
+        if not ref.isdigit():
+            print("ERROR! Invalid topic id '%s'." % ref)
+            sys.exit(1)
+        return({"topicId": int(ref), "roleTypeUri": role_type})
+
+    def read_edges(self, edge_file):
+        """
+        This function reads an edge list from a csv or ndjson file and returns
+        a list of edges. Each edge has the fields player1, player2, assocTypeUri
+        and roles. Roles are optional and either a list or a space separated
+        string of the two role type uris.
+        """
+        fields = ['player1', 'player2', 'assocTypeUri', 'roles']
+        edges = []
+        with open(edge_file, 'r', newline='') as data_file:
+            first_line = data_file.readline()
+            data_file.seek(0)
+            if first_line.lstrip().startswith('{'):
+                for line in data_file:
+                    if line.strip():
+                        edges.append(json.loads(line))
+            else:
+                for row in csv.reader(data_file):
+                    if not row or row[0].strip() in ('', 'player1') or row[0].startswith('#'):
+                        continue
+                    edges.append(dict(zip(fields, [col.strip() for col in row])))
+        for edge in edges:
+            roles = edge.get('roles') or ['dmx.core.default', 'dmx.core.default']
+            if isinstance(roles, str):
+                roles = roles.split()
+            if len(roles) != 2 or not edge.get('assocTypeUri'):
+                print("ERROR! Invalid edge %s in file %s" % (edge, edge_file))
+                sys.exit(1)
+            edge['roles'] = roles
+        LOG_BULK.info("READ EDGES : %s edges from file %s", len(edges), edge_file)
+        return(edges)
+
+    @traced
+    def import_edges(self, edge_file, workspace=None, map_id=None, workers=None):
+        """
+        This function creates an assoc for every edge in edge_file and
+        optionally reveals the new assocs on a topicmap (id). Names are
+        resolved and all payloads are validated up front, so an invalid edge
+        stops the import before anything is written. The assocs are created
+        concurrently. Returns the list of assoc ids in the order of the edge
+        list.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        if workers is None:
+            workers = self.workers
+        edges = self.read_edges(edge_file)
+        source = self.journal_source(edge_file)
+        names = set()
+        for (number, edge) in enumerate(edges):
+            if self.journaled('create_assoc', source, number):
+                continue
+            for ref in (edge['player1'], edge['player2']):
+                if ref_name(ref) is not None:
+                    names.add(ref_name(ref))
+        LOG_BULK.info("IMPORT EDGES : resolving %s names with %s workers", len(names), workers)
+        with TracedExecutor(self, max_workers=workers) as executor:
+            list(executor.map(self.get_topic_id_by_name, names))
+        payloads = []
+        for (number, edge) in enumerate(edges):
+            if self.journaled('create_assoc', source, number):
+                payloads.append(None)
+                continue
+            payloads.append({
+                "typeUri": edge['assocTypeUri'],
+                "player1": self.get_player(edge['player1'], edge['roles'][0]),
+                "player2": self.get_player(edge['player2'], edge['roles'][1])
+            })
+        if self.validate_payloads:
+            with TracedExecutor(self, max_workers=workers) as executor:
+                results = list(executor.map(
+                    lambda payload: self.validate_payload(payload, kind='assoc') if payload else [],
+                    payloads))
+            invalid = [(number, errors) for (number, errors) in enumerate(results) if errors]
+            if invalid:
+                for (number, errors) in invalid:
+                    for error_message in errors:
+                        print("ERROR! edge %s in file %s: %s" % (number, edge_file, error_message))
+                sys.exit(1)
+
+        def create_edge(payload):
+            assoc_id = self.create_assoc(payload, workspace)
+            if map_id is not None:
+                self.reveal_assoc(map_id, assoc_id, workspace)
+            return(assoc_id)
+
+        with TracedExecutor(self, max_workers=workers) as executor:
+            assoc_ids = list(executor.map(
+                lambda record: self.checkpoint('create_assoc', source, record[0],
+                                               create_edge, record[1]),
+                enumerate(payloads)))
+        LOG_BULK.info("IMPORT EDGES : created %s assocs", len(assoc_ids))
+        return(assoc_ids)
+
+    def read_batch(self, batch_file):
+        """
+        This function reads a batch of operations from a json file (a list)
+        or an ndjson file (one operation per line). Every operation has an
+        "op" (the name of a client method), optional "args" (a dictionary of
+        its arguments), an optional "id" to refer to its result and an
+        optional list "after" of ids it has to wait for. Any string in args
+        may refer to the result of another operation with ${id}. Returns the
+        list of operations and a dictionary of their dependencies.
+        """
+        with open(batch_file, 'r') as data_file:
+            data = data_file.read()
+        if data.lstrip().startswith('['):
+            operations = json.loads(data)
+        else:
+            operations = [json.loads(line) for line in data.splitlines() if line.strip()]
+        ids = {}
+        for number, operation in enumerate(operations):
+            if operation.get('op') not in BATCH_OPERATIONS:
+                print("ERROR! Invalid operation %s in batch file %s" % (operation, batch_file))
+                sys.exit(1)
+            operation.setdefault('id', '#%s' % number)
+            operation.setdefault('args', {})
+            if operation['id'] in ids:
+                print("ERROR! Duplicate id %s in batch file %s" % (operation['id'], batch_file))
+                sys.exit(1)
+            ids[operation['id']] = operation
+        dependencies = {}
+        for operation in operations:
+            refs = set(re.findall(r'\$\{([^}]+)\}', json.dumps(operation['args'])))
+            refs.update(operation.get('after', []))
+            for ref in refs:
+                if ref not in ids:
+                    print("ERROR! Unknown reference %s in batch file %s" % (ref, batch_file))
+                    sys.exit(1)
+            dependencies[operation['id']] = refs
+        ## make sure there are no cycles
+        done = set()
+        todo = dict(dependencies)
+        while todo:
+            ready = [op_id for op_id, refs in todo.items() if refs <= done]
+            if not ready:
+                print("ERROR! Circular references between %s in batch file %s" %
+                      (sorted(todo), batch_file))
+                sys.exit(1)
+            for op_id in ready:
+                done.add(op_id)
+                del todo[op_id]
+        LOG_BULK.info("READ BATCH : %s operations from file %s", len(operations), batch_file)
+        return(operations, dependencies)
+
+    @traced
+    def run_batch(self, batch_file, workers=None):
+        """
+        This function runs all operations of a batch file (see read_batch).
+        Every operation starts as soon as all operations it refers to are
+        done, so independent operations run concurrently and only the
+        longest chain of references is run one after another. Operations
+        depending on a failed operation are skipped. Returns a dictionary
+        of the results by id.
+        """
+        if workers is None:
+            workers = self.workers
+        operations, dependencies = self.read_batch(batch_file)
+        source = self.journal_source(batch_file)
+        if self.validate_payloads:
+            ## validate all payloads up front, those with references are
+            ## validated again when they are sent
+            payloads = [(operation['id'], operation['args'].get('payload'),
+                         'assoc' if operation['op'] == 'create_assoc' else 'topic')
+                        for operation in operations
+                        if operation['op'] in ('send_data', 'create_assoc')
+                        and '${' not in json.dumps(operation['args'].get('payload'))]
+            with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+                invalid = [(op_id, errors) for (op_id, errors) in zip(
+                    [payload[0] for payload in payloads],
+                    executor.map(lambda payload: self.validate_payload(payload[1], kind=payload[2]),
+                                 payloads)) if errors]
+            if invalid:
+                for (op_id, errors) in invalid:
+                    for error_message in errors:
+                        print("ERROR! %s: %s" % (op_id, error_message))
+                sys.exit(1)
+        return(self.run_operations(operations, dependencies, source, workers))
+
+    def run_operations(self, operations, dependencies, source, workers=None):
+        """
+        This function runs operations (see read_batch) with the given
+        dependencies with workers concurrent requests. Every operation
+        starts as soon as all operations it depends on are done. Journaled
+        operations are checkpointed by their id for source (see
+        journal_source). Returns a dictionary of the results by id.
+        """
+        if workers is None:
+            workers = self.workers
+        by_id = {operation['id']: operation for operation in operations}
+        results = {}
+        failed = set()
+
+        def resolve(value):
+            if isinstance(value, dict):
+                return({key: resolve(val) for key, val in value.items()})
+            if isinstance(value, list):
+                return([resolve(val) for val in value])
+            if isinstance(value, str):
+                match = re.match(r'^\$\{([^}]+)\}$', value)
+                if match:
+                    return(results[match.group(1)])
+                return(re.sub(r'\$\{([^}]+)\}', lambda ref: str(results[ref.group(1)]), value))
+            return(value)
+
+        def call(operation):
+            with self.deadline():
+                return(getattr(self, operation['op'])(**resolve(operation['args'])))
+
+        def run(operation):
+            try:
+                if operation['op'] in JOURNAL_OPERATIONS:
+                    return(self.checkpoint(operation['op'], source, operation['id'],
+                                           call, operation))
+                return(call(operation))
+            except SystemExit:
+                raise RuntimeError('%s failed' % operation['op'])
+
+        waiting = {op_id: set(refs) for op_id, refs in dependencies.items()}
+        dependents = {}
+        for op_id, refs in dependencies.items():
+            for ref in refs:
+                dependents.setdefault(ref, []).append(op_id)
+
+        def skip(op_id):
+            ## skip all operations which depend on a failed one
+            for dependent in dependents.get(op_id, []):
+                if dependent in waiting:
+                    del waiting[dependent]
+                    failed.add(dependent)
+                    print("ERROR! Skipped %s because it depends on %s." % (dependent, op_id),
+                          file=sys.stderr)
+                    skip(dependent)
+
+        running = {}
+        with TracedExecutor(self, max_workers=workers) as executor:
+            for op_id in [op_id for op_id, refs in waiting.items() if not refs]:
+                del waiting[op_id]
+                running[executor.submit(run, by_id[op_id])] = op_id
+            while running:
+                finished, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    op_id = running.pop(future)
+                    try:
+                        results[op_id] = future.result()
+                    except Exception as error_message:
+                        failed.add(op_id)
+                        print("ERROR! Operation %s failed: %s" % (op_id, error_message),
+                              file=sys.stderr)
+                        skip(op_id)
+                        continue
+                    LOG_BULK.debug("RUN BATCH : %s = %s", op_id, results[op_id])
+                    for dependent in dependents.get(op_id, []):
+                        if dependent in waiting:
+                            waiting[dependent].discard(op_id)
+                            if not waiting[dependent]:
+                                del waiting[dependent]
+                                running[executor.submit(run, by_id[dependent])] = dependent
+        LOG_BULK.info("RUN BATCH : %s done, %s failed", len(results), len(failed))
+        return({operation['id']: results.get(operation['id']) for operation in operations})
+
+    @traced
+    def provision(self, spec_file, workers=None):
+        """
+        This function creates the users, workspaces, memberships, topicmaps
+        and notes of a provisioning spec (see read_spec). All existing
+        workspaces and users are fetched once up front, and the memberships,
+        topicmaps and notes of the existing workspaces of the spec, so only
+        what is missing is created and a second run creates nothing. Users
+        and topicmaps are then created without looking them up again.
+        The operations run like a batch file (see run_operations): the
+        members, topicmaps and notes of a workspace start as soon as the
+        workspace (and the users) exist and all tenants are created
+        concurrently. Returns a dictionary of the topic ids by "ws:name",
+        "user:name", "map:workspace:name" and "note:workspace:title" and of the
+        results of the new memberships by "member:workspace:name".
+        """
+        if workers is None:
+            workers = self.workers
+        spec = read_spec(spec_file)
+        with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+            (workspaces, users) = executor.map(self.get_items, (
+                'dmx.workspaces.workspace', 'dmx.accesscontrol.username'))
+            ## share the ids of the known workspaces with all operations
+            known = {name: topic_id for (topic_id, name) in workspaces.items()}
+            with self.cache_lock:
+                self.wsid_cache.update(known)
+            existing = [workspace['name'] for workspace in spec['workspaces']
+                        if workspace['name'] in known]
+            members = dict(zip(existing, executor.map(
+                lambda name: set(topic['value'] for topic in self.iter_related(
+                    known[name], 'dmx.accesscontrol.membership',
+                    others_type='dmx.accesscontrol.username')),
+                existing)))
+            maps = dict(zip(existing, executor.map(
+                lambda name: dict((topic['value'], topic['id']) for topic in self.read_request(
+                    'workspace/%s/topics/dmx.topicmaps.topicmap' % known[name])),
+                existing)))
+            notes = dict(zip(existing, executor.map(
+                lambda name: dict((topic['value'], topic['id']) for topic in self.read_request(
+                    'workspace/%s/topics/dmx.notes.note' % known[name])),
+                existing)))
+        results = {}
+        operations = []
+        dependencies = {}
+
+        def add(op_id, operation, args, after=()):
+            if op_id in dependencies:
+                return
+            operations.append({'id': op_id, 'op': operation, 'args': args})
+            dependencies[op_id] = set(ref for ref in after if ref in dependencies)
+
+        usernames = {name: topic_id for (topic_id, name) in users.items()}
+        for user in spec['users']:
+            if user['username'] in usernames:
+                results['user:%s' % user['username']] = usernames[user['username']]
+            else:
+                add('user:%s' % user['username'], 'create_user',
+                    {'dm_user': user['username'], 'dm_pass': user['password'],
+                     'check': False})
+        for workspace in spec['workspaces']:
+            name = workspace['name']
+            ws_op = 'ws:%s' % name
+            if name in known:
+                results[ws_op] = known[name]
+            else:
+                add(ws_op, 'create_ws', {'workspace': name, 'ws_type': workspace['sharing_mode'],
+                                         'uri': workspace.get('uri', '')})
+            for username in workspace.get('members', []):
+                if username in members.get(name, ()):
+                    results['member:%s:%s' % (name, username)] = None
+                else:
+                    add('member:%s:%s' % (name, username), 'create_member',
+                        {'workspace': name, 'dm_user': username},
+                        (ws_op, 'user:%s' % username))
+            for tm_name in workspace.get('topicmaps', []):
+                if tm_name in maps.get(name, {}):
+                    results['map:%s:%s' % (name, tm_name)] = maps[name][tm_name]
+                else:
+                    add('map:%s:%s' % (name, tm_name), 'create_topicmap',
+                        {'tm_name': tm_name, 'workspace': name, 'check': False}, (ws_op,))
+            for note in workspace.get('notes', []):
+                if note['title'] in notes.get(name, {}):
+                    results['note:%s:%s' % (name, note['title'])] = notes[name][note['title']]
+                else:
+                    add('note:%s:%s' % (name, note['title']), 'create_note',
+                        {'title': note['title'], 'body': note.get('body', ''),
+                         'workspace': name}, (ws_op,))
+        LOG_BULK.info("PROVISION : %s operations, %s objects exist already",
+                      len(operations), len(results))
+        results.update(self.run_operations(operations, dependencies,
+                                           self.journal_source(spec_file), workers))
+        return(results)
+
+    def get_contact_index(self):
+        """
+        This function returns the ContactIndex of all persons on the server.
+        The persons are fetched once with their children in a single
+        streamed request and the index is updated by import_person. The
+        index is built without holding the cache lock, threads which need
+        it meanwhile wait for it. A failure is not cached.
+        """
+        with self.cache_lock:
+            future = self.contact_index
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self.contact_index = future
+        if not leader:
+            return(future.result())
+        try:
+            contact_index = ContactIndex()
+            for topic in self.iter_list('core/topics/type/dmx.contacts.person?children=true'):
+                contact_index.add(topic['id'], topic)
+        except BaseException as error_message:
+            ## do not cache the failure, the next call fetches the persons again
+            with self.cache_lock:
+                if self.contact_index is future:
+                    self.contact_index = None
+            future.set_exception(error_message)
+            raise
+        LOG_LOOKUP.debug("GET CONTACT INDEX : %s keys", len(contact_index))
+        future.set_result(contact_index)
+        return(contact_index)
+
+    @traced
+    def import_person(self, payload, workspace=None):
+        """
+        This function creates a person topic from payload. If duplicates
+        is set and the contact index knows a person with the same email or
+        name, the new person is skipped ('skip'), merged into the known one
+        by an update of the non empty children ('merge') or created and
+        reported ('flag'). Returns the topic id of the new or known person.
+        """
+        if self.duplicates is None:
+            return(self.send_data(payload, workspace))
+        contact_index = self.get_contact_index()
+        (known, key) = contact_index.claim(payload)
+        if known is None:
+            future = key
+            try:
+                topic_id = self.send_data(payload, workspace)
+            except BaseException as error_message:
+                contact_index.release(future)
+                future.set_exception(error_message)
+                raise
+            future.set_result(topic_id)
+            return(topic_id)
+        if isinstance(known, concurrent.futures.Future):
+            known = known.result()
+        if self.duplicates == 'flag':
+            topic_id = self.send_data(payload, workspace)
+            print("DUPLICATE! Person %s has the same %s as person %s." %
+                  (topic_id, key.replace(':', ' '), known), file=sys.stderr)
+            return(topic_id)
+        if self.duplicates == 'merge':
+            changes = self.update_topic({'children': prune_payload(payload['children'])},
+                                        known, workspace)
+            contact_index.add(known, payload)
+            LOG_WRITE.debug("IMPORT PERSON : merged into person %s: %s", known, changes)
+        else:
+            LOG_WRITE.debug("IMPORT PERSON : skipped, same %s as person %s", key, known)
+        return(known)
+
+    def import_vcard(self, vcard_file, workspace=None):
+        """
+        This function imports data from a vcard file and creates a person topic.
+        Only the first vcard of the file is imported, like before, and a
+        warning is logged if there are more. See import_vcards to import all
+        vcards of a file.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        payload = None
+        for (start, end, vcard_data) in iter_records(vcard_file, b'BEGIN:VCARD'):
+            if payload is not None:
+                LOG_BULK.warning("IMPORT VCARD : only the first vcard of %s is imported, "
+                                 "see import_vcards", vcard_file)
+                break
+            payload = vcard_to_payload(vcard_data, self.verbose)
+        if payload is None:
+            print("ERROR! No vcard found in file %s" % vcard_file)
+            sys.exit(1)
+        LOG_BULK.debug("IMPORT VCARD : new person: %s", payload)
+        self.check_payload_types(payload)
+        topic_id = self.import_person(payload, workspace)
+        return(topic_id)
+
+    @traced
+    def import_vcards(self, vcard_file, workspace=None, workers=None):
+        """
+        This function creates a person topic for every vcard in a vcard file
+        or for every row of a contacts csv file (see csv_to_payload), which
+        is detected by its extension .csv. The vcards are converted by worker
+        processes, which get them as slices of the memory mapped file, and
+        the persons are created concurrently (see import_person). With
+        payload validation all persons are converted and checked before the
+        first one is created. Returns the list of topic ids in the order of
+        the file.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        if workers is None:
+            workers = self.workers
+        source = self.journal_source(vcard_file)
+        if vcard_file.lower().endswith('.csv'):
+            with open(vcard_file, 'r', newline='') as data_file:
+                rows = list(csv.DictReader(data_file))
+            payloads = ((number, None if self.journaled('send_data', source, number)
+                         else csv_to_payload(row)) for (number, row) in enumerate(rows))
+        else:
+            require_vobject()
+            ## vcards done already are not even converted
+            payloads = map_records(vcard_to_payload, vcard_file, b'BEGIN:VCARD', workers,
+                                   lambda offset: self.journaled('send_data', source, offset))
+        if self.validate_payloads:
+            ## all persons are checked before the first one is created
+            payloads = list(payloads)
+            self.check_records(payloads, vcard_file, 'topic', workers)
+        if self.duplicates is not None:
+            ## fetch the contact index once before the workers need it
+            self.get_contact_index()
+        with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+            topic_ids = list(bounded_map(
+                executor, lambda record: self.checkpoint(
+                    'send_data', source, record[0], self.import_person, record[1], workspace),
+                payloads, workers * 4))
+        LOG_BULK.info("IMPORT VCARDS : created %s persons from file %s",
+                      len(topic_ids), vcard_file)
+        return(topic_ids)
+
+    @traced
+    def import_file(self, filename, workspace=None, workers=None):
+        """
+        This function creates a topic for every payload in a json or ndjson
+        file (see read_json_records) concurrently and returns the list of
+        topic ids in the order of the file. With payload validation the
+        whole file is checked first and nothing is created if a payload is
+        invalid.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        if workers is None:
+            workers = self.workers
+        LOG_BULK.info("IMPORT FILE : Importing json data from file %s", filename)
+        source = self.journal_source(filename)
+        self.check_records(read_json_records(
+            filename, lambda offset: self.journaled('send_data', source, offset)),
+            filename, 'topic', workers)
+        ## records done already are not even parsed
+        payloads = read_json_records(
+            filename, lambda offset: self.journaled('send_data', source, offset))
+        with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+            topic_ids = list(bounded_map(
+                executor, lambda record: self.checkpoint(
+                    'send_data', source, record[0], self.send_data, record[1], workspace),
+                payloads, workers * 4))
+        LOG_BULK.info("IMPORT FILE : created %s topics from file %s", len(topic_ids), filename)
+        return(topic_ids)
+
+    def export_vcards(self, topictype='dmx.contacts.person', workspace=None, output=None,
+                      workers=None):
+        """
+        This function writes all persons (topics of topictype), or only
+        those in a workspace, as vcards (see person_to_vcard) to output
+        (default: stdout). The list of persons is streamed from the server
+        and at most workers * 4 persons are fetched with their children
+        concurrently, so memory use does not grow with the number of
+        persons. Returns the number of vcards.
+        """
+        if workers is None:
+            workers = self.workers
+        if output is None:
+            output = sys.stdout
+        if workspace:
+            url = ('workspace/%s/topics/%s' % (self.get_ws_id(workspace), topictype))
+        else:
+            url = ('core/topics/type/%s' % topictype)
+        topic_ids = (topic['id'] for topic in self.iter_list(url))
+
+        def fetch_vcard(topic_id):
+            with self.deadline():
+                return(person_to_vcard(self.get_topic(topic_id)))
+
+        count = 0
+        with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+            for vcard in bounded_map(executor, fetch_vcard, topic_ids, workers * 4):
+                output.write(vcard)
+                count += 1
+        output.flush()
+        LOG_BULK.info("EXPORT VCARDS : %s vcards written", count)
+        return(count)
+
+    @traced
+    def get_topic(self, topic_id, output=None, framing='raw', fields=None, depth=None):
+        """
+        This function fetches the data according to datapath from
+        the server and returns the data. If output is given, the data
+        is streamed to output. With fields and depth, only these keys
+        and children down to depth levels are returned (see project).
+        """
+        url = ('core/topic/%s' % topic_id)
+        if keeps_children(fields, depth):
+            url += '?children=true'
+        if fields is None and not depth:
+            return(self.read_request(url, output, framing))
+        topic = project(self.read_request(url), fields, depth)
+        if output is not None:
+            write_items([topic], output, framing, False)
+            return
+        return(topic)
+
+    @traced
+    def topic_exists(self, topic_id):
+        """
+        This function returns False if the server does not know topic_id
+        (404), otherwise True. Other errors exit like all request errors.
+        """
+        url = self.get_host_url() + ('core/topic/%s' % topic_id)
+        try:
+            with self.open_request(url):
+                return(True)
+        except urllib.error.HTTPError as error_message:
+            if error_message.code == 404:
+                return(False)
+            print('TOPIC EXISTS : Request Data Error: '+str(error_message))
+            sys.exit(1)
+
+    @traced
+    def get_topics(self, topic_ids, workers=None):
+        """
+        This function fetches several topics with their children at once and
+        returns them in the order of topic_ids. Every id is fetched only once
+        and at most workers topics are fetched at the same time.
+        """
+        if workers is None:
+            workers = self.workers
+        unique_ids = list(dict.fromkeys(topic_ids))
+        LOG_LOOKUP.debug("GET TOPICS : fetching %s topics with %s workers",
+                         len(unique_ids), workers)
+
+        def fetch(topic_id):
+            with self.deadline():
+                return(self.get_topic(topic_id))
+
+        with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+            topics = dict(zip(unique_ids, executor.map(fetch, unique_ids)))
+        return([topics[topic_id] for topic_id in topic_ids])
+
+    @traced
+    def update_topic(self, payload, topic_id=None, workspace=None):
+        """
+        This function updates an existing topic (topic_id or "id" of the
+        payload) to the state of payload. The current topic is fetched and
+        only the children which differ from payload are sent (see
+        diff_children), children missing in payload are left as they are.
+        Returns the dictionary of the changes sent, which is empty if the
+        topic is up to date already.
+        """
+        if topic_id is None:
+            topic_id = payload.get('id')
+        if topic_id is None:
+            print("ERROR! Missing topic id for update of %s" % payload)
+            sys.exit(1)
+        current = self.get_topic(topic_id)
+        changes = {}
+        if 'value' in payload and payload['value'] != current.get('value'):
+            changes['value'] = payload['value']
+        children = diff_children(current.get('children', {}), payload.get('children', {}))
+        if children:
+            changes['children'] = children
+        LOG_WRITE.debug("UPDATE TOPIC : changes of topic %s: %s", topic_id, changes)
+        if changes:
+            changes['id'] = int(topic_id)
+            self.write_request('core/topic/%s' % topic_id, changes, workspace, method='PUT')
+        return(changes)
+
+    def update_topics(self, filename, workspace=None, workers=None):
+        """
+        This function updates the topics of all payloads with an "id" in a
+        json or ndjson file (see read_json_records and update_topic)
+        concurrently and returns the list of the changes in the order of
+        the file.
+        """
+        if workers is None:
+            workers = self.workers
+        LOG_BULK.info("UPDATE TOPICS : Updating topics from file %s", filename)
+        source = self.journal_source(filename)
+        payloads = read_json_records(
+            filename, lambda offset: self.journaled('update_topic', source, offset))
+        with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+            changes = list(bounded_map(
+                executor, lambda record: self.checkpoint(
+                    'update_topic', source, record[0], self.update_topic, record[1], None,
+                    workspace),
+                payloads, workers * 4))
+        LOG_BULK.info("UPDATE TOPICS : changed %s of %s topics",
+                      len([change for change in changes if change]), len(changes))
+        return(changes)
+
+    @traced
+    def get_data(self, datapath, output=None, framing='raw', fields=None, depth=None):
+        """
+        This function fetches the data according to datapath from
+        the server and returns the data. If output is given, the data
+        is streamed to output. With fields and depth, the data has to be
+        a list of topics (like topics/type/<uri>). The children are only
+        requested, if they are kept, and every topic is projected (see
+        project). A streamed list is projected as soon as every topic is
+        parsed (see iter_list), a returned list is parsed as a whole, which
+        is much faster.
+        """
+        url = ('core/%s' % datapath)
+        if keeps_children(fields, depth):
+            url += '?children=true'
+        if fields is None and not depth:
+            return(self.read_request(url, output, framing))
+        if output is None:
+            return([project(topic, fields, depth) for topic in self.read_request(url)])
+        write_items((project(topic, fields, depth) for topic in self.iter_list(url)),
+                    output, framing)
+        return
+
+    @traced
+    def get_items(self, topictype, output=None, framing='raw', fields=None, depth=None):
+        """
+        This function searches for topics of the specified topictype and
+        returns the items, if exists. If output is given, the list of
+        topics (see get_data for fields and depth) is streamed to output
+        as it comes from the server instead.
+        """
+        if output is not None:
+            return(self.get_data('topics/type/%s' % topictype, output, framing, fields, depth))
+        dm_items = {} # for dictionary
+        data = self.get_data('topics/type/%s' % topictype, fields=('id', 'value'), depth=0)
+        try:
+            total = len(data)
+        except:
+            print("Error while trying to get items.")
+            total = 0
+            pass
+        if total > 0:
+            for i in range(total):
+                dm_items.update(
+                    {(data[i]["id"]): (data[i]["value"])}
+                )
+        return(dm_items)
+
+    def related_url(self, topic_id, assoc_type=None, my_role=None, others_role=None,
+                    others_type=None, assocs=False):
+        """
+        This function returns the url of the topics (or with assocs the
+        assocs) related to topic_id, filtered on the server by the type of
+        the assoc, the role types of both players and the type of the other
+        topic (or assoc).
+        """
+        filters = (('assocTypeUri', assoc_type), ('myRoleTypeUri', my_role),
+                   ('othersRoleTypeUri', others_role),
+                   ('othersAssocTypeUri' if assocs else 'othersTopicTypeUri', others_type))
+        url = ('core/topic/%s/related-%s' % (topic_id, 'assocs' if assocs else 'topics'))
+        query = urllib.parse.urlencode([(key, val) for (key, val) in filters if val])
+        if query:
+            url += '?' + query
+        return(url)
+
+    @traced
+    def get_related(self, topic_id, assoc_type=None, my_role=None, others_role=None,
+                    others_type=None, assocs=False, output=None, framing='raw'):
+        """
+        This function fetches related topics according to topic_id from
+        the server and returns the data. The filters are applied by the
+        server (see related_url). If output is given, the data is streamed
+        to output.
+        """
+        url = self.related_url(topic_id, assoc_type, my_role, others_role, others_type, assocs)
+        return(self.read_request(url, output, framing))
+
+    def iter_related(self, topic_id, assoc_type=None, my_role=None, others_role=None,
+                     others_type=None, assocs=False):
+        """
+        This generator yields the related topics (or assocs) of topic_id
+        like get_related one by one as they come from the server, so hub
+        topics with many neighbors are never held in memory as a whole.
+        """
+        url = self.related_url(topic_id, assoc_type, my_role, others_role, others_type, assocs)
+        return(self.iter_list(url))
+
+    def get_creator(self, topic_id):
+        """
+        This function fetches the username of the creator of topic_id from
+        the server and returns it.
+        """
+        url = ('access-control/object/%s/creator' % topic_id)
+        return(self.read_text(url))
+
+    def get_modifier(self, topic_id):
+        """
+        This function fetches the username of the last modifier of topic_id
+        from the server and returns it.
+        """
+        url = ('access-control/object/%s/modifier' % topic_id)
+        return(self.read_text(url))
+
+    def get_topic_ws(self, topic_id):
+        """
+        This function fetches the topic's workspace id according to topic_id from
+        the server and returns the data.
+        """
+        url = ('workspace/object/%s' % topic_id)
+        return(self.read_request(url))
+
+    def get_ws_owner(self, workspace_id):
+        """
+        This function fetches the username of the owner of a workspace id
+        from the server and returns it.
+        """
+        url = ('access-control/workspace/%s/owner' % workspace_id)
+        return(self.read_text(url))
+
+    def audit(self, topictype=None, topic_ids=None, output=None, output_format='csv',
+              workers=None):
+        """
+        This function writes the creator, the modifier, the workspace and the
+        workspace owner of all topics of topictype (or of the list topic_ids)
+        as csv or ndjson lines to output (default: stdout) as they come. The
+        topics are looked up concurrently in the given order and the owner of
+        every workspace is fetched only once. Returns the number of topics.
+        """
+        if workers is None:
+            workers = self.workers
+        if output is None:
+            output = sys.stdout
+        if topictype is not None:
+            topics = [(topic['id'], topic.get('value'))
+                      for topic in self.get_data('topics/type/%s' % topictype,
+                                                 fields=('id', 'value'), depth=0)]
+        else:
+            topics = [(topic_id, None) for topic_id in topic_ids]
+        LOG_BULK.info("AUDIT : auditing %s topics with %s workers", len(topics), workers)
+        owners = {}                  # futures of the owners by workspace id
+        owners_lock = threading.Lock()
+
+        def get_owner(workspace_id):
+            with owners_lock:
+                future = owners.get(workspace_id)
+                leader = future is None
+                if leader:
+                    future = concurrent.futures.Future()
+                    owners[workspace_id] = future
+            if leader:
+                try:
+                    future.set_result(self.get_ws_owner(workspace_id))
+                except BaseException as error_message:
+                    future.set_exception(error_message)
+                    raise
+            return(future.result())
+
+        def audit_topic(topic):
+            (topic_id, value) = topic
+            with self.deadline():
+                workspace = self.get_topic_ws(topic_id)
+                if not isinstance(workspace, dict):
+                    workspace = {}
+                return({
+                    'id': topic_id,
+                    'value': value,
+                    'creator': self.get_creator(topic_id),
+                    'modifier': self.get_modifier(topic_id),
+                    'workspace_id': workspace.get('id'),
+                    'workspace': workspace.get('value'),
+                    'owner': get_owner(workspace['id']) if workspace.get('id') else None
+                })
+
+        fields = ['id', 'value', 'creator', 'modifier', 'workspace_id', 'workspace', 'owner']
+        if output_format == 'csv':
+            writer = csv.DictWriter(output, fields)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            write = lambda row: output.write(json.dumps(row) + '\n')
+        count = 0
+        with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+            for row in bounded_map(executor, audit_topic, topics, workers * 4):
+                write(row)
+                count += 1
+        output.flush()
+        LOG_BULK.info("AUDIT : %s topics in %s workspaces", count, len(owners))
+        return(count)
+
+    def mirror(self, database, topictypes, workers=None, full=False):
+        """
+        This function mirrors all topics of the list topictypes with their
+        child values, workspaces and assocs to the local sqlite database
+        (see open_mirror). The first run (or a run with full) fetches every
+        topic with a conditional GET and streams the related topics of every
+        topic (with the assoc which connects them) concurrently. A refresh
+        asks the timestamps service for the topics and assocs modified since
+        the previous run and fetches only new and modified topics and the
+        assocs of those topics and of the players of modified assocs, so the
+        clocks of client and server should agree. Topics which did not
+        change (by etag, last-modified or hash of their json) are not
+        written again. Topics gone from the server are removed, assocs
+        deleted on the server only when one of their players changes or
+        with full. Returns a dictionary with the number of new, changed,
+        unchanged and deleted topics.
+        """
+        if workers is None:
+            workers = self.workers
+        connection = open_mirror(database)
+        counts = {'new': 0, 'changed': 0, 'unchanged': 0, 'deleted': 0}
+        for topictype in topictypes:
+            now = int(time.time() * 1000)
+            since = None
+            if not full:
+                since = (connection.execute('SELECT time FROM synced WHERE type_uri = ?',
+                                            (topictype,)).fetchone() or (None,))[0]
+            known = {row[0]: row[1:] for row in connection.execute(
+                'SELECT id, etag, last_modified, hash FROM topics WHERE type_uri = ?',
+                (topictype,))}
+            topic_ids = [topic['id'] for topic in self.get_data(
+                'topics/type/%s' % topictype, fields=('id',), depth=0)]
+            gone = set(known) - set(topic_ids)
+            for topic_id in gone:
+                delete_mirrored(connection, topic_id)
+            counts['deleted'] += len(gone)
+            if since is None:
+                refresh = players = topic_ids
+            else:
+                with self.deadline():
+                    modified = set(topic['id'] for topic in self.read_request(
+                        'timestamps/from/%s/to/%s/topics/modified' % (since, now))
+                                   if topic.get('typeUri') == topictype)
+                    linked = set(
+                        player.get('topicId', player.get('id'))
+                        for assoc in self.read_request(
+                            'timestamps/from/%s/to/%s/assocs/modified' % (since, now))
+                        for player in (assoc.get('player1') or {}, assoc.get('player2') or {}))
+                refresh = [topic_id for topic_id in topic_ids
+                           if topic_id not in known or topic_id in modified]
+                players = [topic_id for topic_id in topic_ids
+                           if topic_id not in known or topic_id in modified or topic_id in linked]
+                counts['unchanged'] += len(topic_ids) - len(refresh)
+            LOG_BULK.info("MIRROR : %s topics of type %s, %s known, %s to refresh",
+                          len(topic_ids), topictype, len(known), len(refresh))
+
+            def fetch(topic_id):
+                ## returns (topic_id, topic or None if unchanged, validators,
+                ## workspace)
+                (etag, last_modified, digest) = known.get(topic_id, (None, None, None))
+                with self.deadline():
+                    body, etag, last_modified = self.get_conditional(
+                        'core/topic/%s?children=true' % topic_id, etag, last_modified)
+                    if body is not None and hashlib.sha256(body).hexdigest() != digest:
+                        digest = hashlib.sha256(body).hexdigest()
+                        return((topic_id, json.loads(body), (etag, last_modified, digest),
+                                self.get_topic_ws(topic_id)))
+                return((topic_id, None, (etag, last_modified, digest), None))
+
+            def fetch_assocs(topic_id):
+                with self.deadline():
+                    return((topic_id, [related.get('assoc') or {}
+                                       for related in self.iter_related(topic_id)]))
+
+            with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+                for (topic_id, topic, validators, workspace) in bounded_map(
+                        executor, fetch, refresh, workers * 4):
+                    if topic is None:
+                        counts['unchanged'] += 1
+                        connection.execute(
+                            'UPDATE topics SET etag = ?, last_modified = ? WHERE id = ?',
+                            validators[:2] + (topic_id,))
+                        continue
+                    counts['changed' if topic_id in known else 'new'] += 1
+                    write_mirrored(connection, topic, validators, workspace)
+                connection.commit()
+                for (topic_id, assocs) in bounded_map(
+                        executor, fetch_assocs, players, workers * 4):
+                    write_mirrored_assocs(connection, topic_id, assocs)
+            connection.execute('INSERT OR REPLACE INTO synced VALUES (?, ?)', (topictype, now))
+            connection.commit()
+        connection.close()
+        LOG_BULK.info("MIRROR : %s", counts)
+        return(counts)
+
+    def load_test(self, mix, duration=60.0, rate=None, concurrency=None, ramp_up=0.0,
+                  workspace=None, map_id=None, report_interval=5.0, seed=None):
+        """
+        This function drives the server with a weighted mix of operations
+        (a dictionary of LOAD_OPERATIONS and their weights) for duration
+        seconds. With rate the operations are started at this rate per
+        second (open loop) by concurrency threads and latency counts from
+        the time an operation was due, so a slow server shows up as growing
+        latency. Without rate concurrency threads run operations one after
+        another (closed loop). The rate or the number of threads grows
+        linearly during ramp_up seconds. Throughput, latency percentiles
+        and error rate are printed every report_interval seconds. Reads are
+        sent with send_request, so identical reads at the same time are not
+        merged into one request like in get_response. The notes and the
+        topicmap created by the test are deleted at the end, also if it
+        fails or is interrupted. Returns a summary of the whole run.
+        """
+        ## if workspace in None, the default workspace should come from config:
+        if workspace is None:
+            workspace = self.config.get('Connection', 'workspace')
+        if concurrency is None:
+            concurrency = self.workers
+        for name in mix:
+            if name not in LOAD_OPERATIONS:
+                print("ERROR! Invalid operation %s, use one of %s." % (name, LOAD_OPERATIONS))
+                sys.exit(1)
+        names = list(mix)
+        weights = [mix[name] for name in names]
+        rng = random.Random(seed)
+        rng_lock = threading.Lock()
+        ## topics to read, related or reveal, the new notes are added
+        topic_ids = list(self.get_items('dmx.notes.note'))
+        created = []                 # ids of the notes and the topicmap made by the test
+        try:
+            if not topic_ids:
+                topic_ids.append(self.create_note('load test', '<p>load test</p>', workspace))
+                created.append(topic_ids[-1])
+            if 'reveal_topic' in mix and map_id is None:
+                map_id = self.create_topicmap('load test', workspace=workspace, check=False)
+                created.append(map_id)
+            LOG_BULK.info("LOAD TEST : %s for %ss with %s topics, rate = %s, concurrency = %s",
+                          mix, duration, len(topic_ids), rate, concurrency)
+
+            def pick():
+                with rng_lock:
+                    return(rng.choices(names, weights)[0], rng.choice(topic_ids),
+                           rng.randrange(1000), rng.randrange(1000))
+
+            def operation(name, topic_id, x_val, y_val):
+                if name == 'create_note':
+                    created.append(self.create_note(
+                        'load test %s' % x_val, '<p>load test %s</p>' % y_val, workspace))
+                    topic_ids.append(created[-1])
+                elif name == 'send_data':
+                    created.append(self.send_data({
+                        "typeUri": "dmx.notes.note",
+                        "children": {"dmx.notes.title": "load test %s" % x_val,
+                                     "dmx.notes.text": "<p>load test %s</p>" % y_val}
+                    }, workspace))
+                    topic_ids.append(created[-1])
+                elif name == 'get_topic':
+                    self.send_request('core/topic/%s' % topic_id)
+                elif name == 'get_related':
+                    self.send_request(self.related_url(topic_id))
+                elif name == 'reveal_topic':
+                    self.reveal_topic(workspace, map_id, topic_id, x_val, y_val)
+
+            samples = []                 # (end time, operation, latency, ok) of all operations
+            samples_lock = threading.Lock()
+            start = timer()
+            deadline = start + duration
+
+            def run_one(due):
+                (name, topic_id, x_val, y_val) = pick()
+                try:
+                    with self.deadline():
+                        operation(name, topic_id, x_val, y_val)
+                    ok = True
+                except (SystemExit, Exception) as error_message:
+                    ok = False
+                    LOG_BULK.debug("LOAD TEST : %s failed: %s", name, error_message)
+                end = timer()
+                with samples_lock:
+                    samples.append((end - start, name, end - due, ok))
+
+            def closed_loop(number):
+                time.sleep(ramp_up * number / concurrency)
+                while timer() < deadline:
+                    run_one(timer())
+
+            stopped = threading.Event()
+
+            def report():
+                reported = 0
+                while not stopped.wait(report_interval):
+                    with samples_lock:
+                        interval = samples[reported:]
+                        reported = len(samples)
+                    print(json.dumps(load_summary(interval, report_interval,
+                                                  elapsed=round(timer() - start, 1))))
+                    sys.stdout.flush()
+
+            reporter = threading.Thread(target=report, daemon=True)
+            reporter.start()
+            with TracedExecutor(self, max_workers=max(1, concurrency)) as executor:
+                if rate:
+                    due = start
+                    while due < deadline:
+                        now = timer()
+                        if due > now:
+                            time.sleep(due - now)
+                        executor.submit(run_one, due)
+                        ramp = min(1.0, (due - start) / ramp_up) if ramp_up else 1.0
+                        due += 1.0 / max(rate * ramp, rate / 100.0)
+                else:
+                    for number in range(concurrency):
+                        executor.submit(closed_loop, number)
+            stopped.set()
+            reporter.join()
+            summary = load_summary(samples, timer() - start)
+            summary['operations'] = {
+                name: load_summary([sample for sample in samples if sample[1] == name],
+                                   timer() - start)
+                for name in names
+            }
+            return(summary)
+        finally:
+            self.delete_topics(created, concurrency)
+
+    def delete_topics(self, topic_ids, workers=None):
+        """
+        This function deletes the topics (or topicmaps) topic_ids
+        concurrently, each with the timeout of the client as deadline.
+        Failures are logged and the ids of the topics which could not be
+        deleted are returned.
+        """
+        if workers is None:
+            workers = self.workers
+
+        def delete(topic_id):
+            try:
+                with self.deadline():
+                    self.delete_topic(topic_id)
+                return(True)
+            except (SystemExit, Exception) as error_message:
+                LOG_WRITE.warning("DELETE TOPICS : deleting %s failed: %s", topic_id, error_message)
+                return(False)
+
+        with TracedExecutor(self, max_workers=max(1, workers)) as executor:
+            failed = [topic_id for (topic_id, deleted) in zip(
+                topic_ids, executor.map(delete, topic_ids)) if not deleted]
+        LOG_WRITE.info("DELETE TOPICS : %s deleted, %s failed",
+                       len(topic_ids) - len(failed), len(failed))
+        return(failed)
+
+    @traced
+    def get_conditional(self, url, etag=None, last_modified=None):
+        """
+        This function sends a conditional GET request to a given URL and
+        returns the tuple (body, etag, last_modified). body is None if the
+        server answers 304 Not Modified.
+        """
+        url = self.get_host_url() + (url.replace(' ', '%20').replace('"', '%22'))
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        LOG_HTTP.debug("GET CONDITIONAL : Calling %s (etag = %s, last_modified = %s)",
+                       url, etag, last_modified)
+        try:
+            response = self.open_request(url, headers=headers)
+        except urllib.error.HTTPError as error_message:
+            if error_message.code == 304:
+                LOG_HTTP.debug("GET CONDITIONAL : not modified")
+                return(None, etag, last_modified)
+            print('GET CONDITIONAL : Request Data Error: '+str(error_message))
+            sys.exit(1)
+        with response:
+            body = response.read()
+            etag = response.headers.get('ETag', etag)
+            last_modified = response.headers.get('Last-Modified', last_modified)
+        return(body, etag, last_modified)
+
+    def watch(self, topictype, workspace=None, interval=1.0, max_interval=60.0,
+              children=False, polls=None, output=None):
+        """
+        This function polls all topics of a topictype, or only those in a
+        workspace, and writes an ndjson change event (created, updated or
+        deleted) to output for every change since the previous poll.
+        Created and deleted topics are found in the list of the topics,
+        which is not parsed if it did not change (304 or same content).
+        Updated topics, also those with changed children, are found by
+        their modification timestamps since the previous poll, so the
+        clocks of client and server should agree. Only created or updated
+        topics are fetched, with their children if children is True. A
+        topic which could not be fetched is fetched again at the next poll,
+        only a topic which is gone (404) is dropped. The poll interval
+        shrinks to interval while changes come in and grows up to
+        max_interval while nothing changes. Every poll gets the timeout of
+        the client as deadline (see deadline).
+        """
+        if output is None:
+            output = sys.stdout
+        if workspace:
+            url = ('workspace/%s/topics/%s' % (self.get_ws_id(workspace), topictype))
+        else:
+            url = ('core/topics/type/%s' % topictype)
+        etag = last_modified = digest = known = since = None
+        retry = {}                   # events of the topics which could not be fetched
+        delay = interval
+        count = 0
+
+        def fetch(topic_id):
+            ## returns the topic, None if it is gone or False if the fetch failed
+            topic_url = self.get_host_url() + ('core/topic/%s' % topic_id)
+            if children:
+                topic_url += '?children=true'
+            try:
+                with self.deadline():
+                    with self.open_request(topic_url) as response:
+                        return(json.loads(response.read()))
+            except urllib.error.HTTPError as error_message:
+                if error_message.code == 404:
+                    return(None)
+                LOG_BULK.warning("WATCH : fetching topic %s failed: %s", topic_id, error_message)
+            except SystemExit:
+                LOG_BULK.warning("WATCH : fetching topic %s failed", topic_id)
+            return(False)
+
+        while polls is None or count < polls:
+            if count:
+                time.sleep(delay)
+            count += 1
+            now = int(time.time() * 1000)
+            with self.deadline():
+                body, etag, last_modified = self.get_conditional(url, etag, last_modified)
+                modified = set()
+                if since is not None:
+                    modified = set(topic['id'] for topic in self.read_request(
+                        'timestamps/from/%s/to/%s/topics/modified' % (since, now))
+                                   if topic.get('typeUri') == topictype)
+            since = now
+            if body is None or hashlib.sha1(body).hexdigest() == digest:
+                topics = known
+            else:
+                digest = hashlib.sha1(body).hexdigest()
+                topics = dict((topic['id'], topic['value']) for topic in json.loads(body))
+            if known is None:
+                known = topics
+                continue
+            events = dict((topic_id, event) for (topic_id, event) in retry.items()
+                          if topic_id in topics)
+            for topic_id in topics:
+                if topic_id not in known:
+                    events.setdefault(topic_id, 'created')
+                elif topic_id in modified or topics[topic_id] != known[topic_id]:
+                    events.setdefault(topic_id, 'updated')
+            deleted = [topic_id for topic_id in known if topic_id not in topics]
+            changes = list(events.items())
+            with TracedExecutor(self, max_workers=max(1, self.workers)) as executor:
+                details = list(executor.map(fetch, [change[0] for change in changes]))
+            stamp = datetime.now(timezone.utc).isoformat()
+            for (topic_id, event), topic in zip(changes, details):
+                retry.pop(topic_id, None)
+                if topic is False:
+                    retry[topic_id] = event
+                    continue
+                if topic is None:
+                    if event == 'created':
+                        ## never reported, so it must not be reported as deleted
+                        topics = dict(topics)
+                        del topics[topic_id]
+                    continue
+                output.write(json.dumps({"event": event, "id": topic_id, "time": stamp,
+                                         "topic": topic}) + '\n')
+            for topic_id in deleted:
+                if retry.pop(topic_id, None) == 'created':
+                    ## never reported either
+                    continue
+                output.write(json.dumps({"event": "deleted", "id": topic_id, "time": stamp,
+                                         "value": known[topic_id]}) + '\n')
+            output.flush()
+            known = topics
+            if changes or deleted:
+                delay = max(interval, delay / 2)
+            else:
+                delay = min(max_interval, delay * 1.5)
+            LOG_BULK.info("WATCH : %s changes, %s to retry, next poll in %.1fs",
+                          len(changes) + len(deleted), len(retry), delay)
+        return
+
+    @traced
+    def delete_topic(self, topic_id):
+        """
+        This function deletes a topic by its id from the server.
+        """
+        LOG_WRITE.debug("DELETE TOPIC : deleting topic with id '%s'", topic_id)
+        url = ('core/topic/%s' % topic_id)
+        response = self.delete_request(url)
+        return(response)
+
+
+## The default client and the module level functions below keep the
+## function interface of dmx.py working for scripts that import it.
+default_client = DMXClient()
+config = default_client.config
+wsid_cache = default_client.wsid_cache
+topic_id_cache = default_client.topic_id_cache
+
+
+class DMXModule(ModuleType):
+    """
+    The class of this module forwards the former module globals VERBOSE,
+    AUTHTYPE and JSESSIONID to the default client, so scripts which read or
+    set dmx.VERBOSE, dmx.AUTHTYPE or dmx.JSESSIONID keep working.
+    """
+
+    @property
+    def VERBOSE(self):
+        return(default_client.verbose)
+
+    @VERBOSE.setter
+    def VERBOSE(self, verbose):
+        default_client.verbose = verbose
+        configure_logging(verbose)
+
+    @property
+    def AUTHTYPE(self):
+        return(default_client.authtype)
+
+    @AUTHTYPE.setter
+    def AUTHTYPE(self, authtype):
+        default_client.authtype = authtype
+
+    @property
+    def JSESSIONID(self):
+        return(default_client.jsessionid)
+
+    @JSESSIONID.setter
+    def JSESSIONID(self, jsessionid):
+        default_client.jsessionid = jsessionid
+        add_secrets(jsessionid)
+
+
+sys.modules[__name__].__class__ = DMXModule
+
+
+## the module level functions of earlier versions work on the default client,
+## all newer operations are methods of DMXClient only
+
+def create_default_config():
+    """
+    See DMXClient.create_default_config().
+    """
+    return(default_client.create_default_config())
+
+
+def read_default_config_file():
+    """
+    See DMXClient.read_default_config_file().
+    """
+    return(default_client.read_default_config_file())
+
+
+def read_dmx_config_properties_file(config_file='config.properties'):
+    """
+    See DMXClient.read_dmx_config_properties_file().
+    """
+    return(default_client.read_dmx_config_properties_file(config_file))
 
 
 def check_payload(payload=None):
     """
-    This function checks the payload to be send to server and makes sure
-    it is a valid json format.
+    See DMXClient.check_payload().
     """
-    if VERBOSE:
-        print("CHECK PAYLOAD : TYPE = %s" % type(payload))
-        print("CHECK PAYLOAD : LEN = %s" % len(payload))
-        print("CHECK PAYLOAD : INPUT = %s" % payload)
-    if isinstance(payload, dict):
-        payload = json.dumps(payload)
-    try:
-        payload = json.loads(json.dumps(payload, indent=3, sort_keys=True))
-    except:
-        print("ERROR! Could not read Payload. Not JSON?")
-        sys.exit(1)
-    else:
-        if VERBOSE:
-            print("CHECK PAYLOAD : OUTPUT = %s" % payload)
-        return(payload)
+    return(default_client.check_payload(payload))
+
+
+def read_file(filename):
+    """
+    See DMXClient.read_file().
+    """
+    return(default_client.read_file(filename))
+
+
+def check_response(data):
+    """
+    See DMXClient.check_response().
+    """
+    return(default_client.check_response(data))
+
+
+def get_base_64():
+    """
+    See DMXClient.get_base_64().
+    """
+    return(default_client.get_base_64())
+
+
+def set_host_url(url):
+    """
+    See DMXClient.set_host_url().
+    """
+    return(default_client.set_host_url(url))
+
+
+def get_host_url():
+    """
+    See DMXClient.get_host_url().
+    """
+    return(default_client.get_host_url())
+
+
+def get_response(url='', payload=None, wsid=None, method='GET'):
+    """
+    See DMXClient.get_response().
+    """
+    return(default_client.get_response(url, payload, wsid, method))
+
+
+def get_session_id():
+    """
+    See DMXClient.get_session_id().
+    """
+    return(default_client.get_session_id())
+
+
+def read_request(url, output=None, framing='raw'):
+    """
+    See DMXClient.read_request().
+    """
+    return(default_client.read_request(url, output, framing))
+
+
+def write_request(url, payload=None, workspace=None, method='POST', expect_json=True):
+    """
+    See DMXClient.write_request().
+    """
+    return(default_client.write_request(url, payload, workspace, method, expect_json))
+
+
+def delete_request(url):
+    """
+    See DMXClient.delete_request().
+    """
+    return(default_client.delete_request(url))
+
+
+def get_ws_id(workspace):
+    """
+    See DMXClient.get_ws_id().
+    """
+    return(default_client.get_ws_id(workspace))
+
+
+def get_topicmap_id(tm_name):
+    """
+    See DMXClient.get_topicmap_id().
+    """
+    return(default_client.get_topicmap_id(tm_name))
+
+
+def create_user(dm_user='testuser', dm_pass='testpass'):
+    """
+    See DMXClient.create_user().
+    """
+    return(default_client.create_user(dm_user, dm_pass))
+
+
+def create_topicmap(tm_name, tm_type='dmx.topicmaps.topicmap', workspace=None):
+    """
+    See DMXClient.create_topicmap().
+    """
+    return(default_client.create_topicmap(tm_name, tm_type, workspace))
+
+
+def create_ws(workspace, ws_type, uri=''):
+    """
+    See DMXClient.create_ws().
+    """
+    return(default_client.create_ws(workspace, ws_type, uri))
+
+
+def create_member(workspace=None, dm_user='username'):
+    """
+    See DMXClient.create_member().
+    """
+    return(default_client.create_member(workspace, dm_user))
+
+
+def create_note(title, body, workspace=None):
+    """
+    See DMXClient.create_note().
+    """
+    return(default_client.create_note(title, body, workspace))
+
+
+def send_data(payload, workspace=None):
+    """
+    See DMXClient.send_data().
+    """
+    return(default_client.send_data(payload, workspace))
+
+
+def create_assoc(payload, workspace=None):
+    """
+    See DMXClient.create_assoc().
+    """
+    return(default_client.create_assoc(payload, workspace))
+
+
+def send_get(url, output=None, framing='raw'):
+    """
+    See DMXClient.send_get().
+    """
+    return(default_client.send_get(url, output, framing))
+
+
+def send_post(url, workspace=None):
+    """
+    See DMXClient.send_post().
+    """
+    return(default_client.send_post(url, workspace))
+
+
+def reveal_topic(workspace, map_id, topic_id, x_val=0, y_val=0, pinned=False):
+    """
+    See DMXClient.reveal_topic().
+    """
+    return(default_client.reveal_topic(workspace, map_id, topic_id, x_val, y_val, pinned))
+
+
+def reveal_assoc(map_id, assoc_id, workspace=None):
+    """
+    See DMXClient.reveal_assoc().
+    """
+    return(default_client.reveal_assoc(map_id, assoc_id, workspace))
+
+
+def import_vcard(vcard_file, workspace=None):
+    """
+    See DMXClient.import_vcard().
+    """
+    return(default_client.import_vcard(vcard_file, workspace))
+
+
+def get_topic(topic_id, output=None, framing='raw', fields=None, depth=None):
+    """
+    See DMXClient.get_topic().
+    """
+    return(default_client.get_topic(topic_id, output, framing, fields, depth))
+
+
+def get_data(datapath, output=None, framing='raw', fields=None, depth=None):
+    """
+    See DMXClient.get_data().
+    """
+    return(default_client.get_data(datapath, output, framing, fields, depth))
+
+
+def get_items(topictype, output=None, framing='raw', fields=None, depth=None):
+    """
+    See DMXClient.get_items().
+    """
+    return(default_client.get_items(topictype, output, framing, fields, depth))
+
+
+def get_related(topic_id, assoc_type=None, my_role=None, others_role=None,
+                others_type=None, assocs=False, output=None, framing='raw'):
+    """
+    See DMXClient.get_related().
+    """
+    return(default_client.get_related(topic_id, assoc_type, my_role, others_role, others_type,
+                                      assocs, output, framing))
+
+
+def get_creator(topic_id):
+    """
+    See DMXClient.get_creator().
+    """
+    return(default_client.get_creator(topic_id))
+
+
+def get_modifier(topic_id):
+    """
+    See DMXClient.get_modifier().
+    """
+    return(default_client.get_modifier(topic_id))
+
+
+def get_topic_ws(topic_id):
+    """
+    See DMXClient.get_topic_ws().
+    """
+    return(default_client.get_topic_ws(topic_id))
+
+
+def get_ws_owner(workspace_id):
+    """
+    See DMXClient.get_ws_owner().
+    """
+    return(default_client.get_ws_owner(workspace_id))
 
 
-def read_file(filename):
+def delete_topic(topic_id):
     """
-    Here we open the file and read the content.
+    See DMXClient.delete_topic().
     """
-    if VERBOSE:
-        print("Reading file %s" % (filename))
-    with open(filename, 'r') as data_file:
-        data = data_file.read()
-    data_file.close()
-    if VERBOSE:
-        print("READ FILE DATA: \n%s" % data)
-    return(data)
+    return(default_client.delete_topic(topic_id))
 
 
 def query_yes_no(question, default="no"):
@@ -231,515 +3613,494 @@ def query_yes_no(question, default="no"):
                              "(or 'y' or 'n').\n")
 
 
-def check_response(data):
+def keeps_children(fields=None, depth=None):
     """
-    This function returns a nicely formatted JSON string, if possible.
+    This function returns True, if a projection with fields and depth (see
+    project) keeps the children of a topic.
     """
-    ##
-    try:
-        response = json.loads(data)
-    except:
-        if VERBOSE:
-            print('CHECK RESPONSE : is not JSON (CHECK RESPONSE exception!)')
-            print('CHECK RESPONSE : TYPE = %s' % type(response))
-            print('CHECK RESPONSE : is "%s".' % response)
-            print('CHECK RESPONSE : return "OK".')
-        return("OK")
-    else:
-        if VERBOSE:
-            print('CHECK RESPONSE : is JSON')
-            print("CHECK RESPONSE : TYPE = %s" % type(response))
-            pretty_print(response)
-        return(response)
+    if depth is not None:
+        return(depth > 0)
+    return(fields is None or 'children' in fields)
 
 
-def get_base_64():
+def project(topic, fields=None, depth=None):
     """
-    This function returns the authentication string for the user against DMX
+    This function returns a copy of topic with only the keys in fields
+    (default: all) and its children down to depth levels (default: all).
+    The children are projected the same way.
     """
-    authname = config.get('Credentials', 'authname') # usualy the admin user
-    password = config.get('Credentials', 'password') # usualy the admin password
-    if VERBOSE:
-        print("GET BASE64 : authname = %s, password = %s" % (authname, password))
-    authstring = bytes((str(authname + ':' + password)), 'UTF-8')
-    base64string = (base64.b64encode(authstring)).decode('UTF-8')
-    if VERBOSE:
-        print("GET BASE64 : base64string = %s" % base64string)
-    return(base64string)
-
-
-def set_host_url(url):
+    if not isinstance(topic, dict):
+        return(topic)
+    projected = {key: val for (key, val) in topic.items()
+                 if key != 'children' and (fields is None or key in fields)}
+    if 'children' in topic and keeps_children(fields, depth):
+        child_depth = None if depth is None else depth - 1
+        projected['children'] = {
+            type_uri: ([project(item, fields, child_depth) for item in child]
+                       if isinstance(child, list) else project(child, fields, child_depth))
+            for (type_uri, child) in topic['children'].items()}
+    return(projected)
+
+
+def write_items(items, output, framing='raw', many=True):
     """
-    This function sets the global config params to a given URL.
-    """
-    global config
-    host_url = urllib.parse.urlparse(url)
-    if VERBOSE:
-        print("SET HOST URL URLPARSE : Protocol = %s" % host_url.scheme)
-        print("SET HOST URL URLPARSE : Server = %s" % host_url.hostname)
-        print("SET HOST URL URLPARLE : Port = %s" % host_url.port)
-        print("SET HOST URL URLPARSE : Path = %s" % host_url.path)
-    config.set('Connection', 'protocol', host_url.scheme)
-    config.set('Connection', 'server', host_url.hostname)
-    if host_url.scheme == 'https' and host_url.port is None:
-        config.set('Connection', 'port', '443')
-    elif host_url.scheme == 'http' and host_url.port is None:
-        config.set('Connection', 'port', '80')
-    else:
-        config.set('Connection', 'port', str(host_url.port))
-    if host_url.path is None:
-        config.set('Connection', 'path', '/')
+    This function writes items as they come to output, a binary file object,
+    as a json list (or, with many False, the only item) or with framing
+    'ndjson' every item in a line of its own. Framing 'raw' is indented
+    like pretty_print, 'compact' without whitespace.
+    """
+    indent = 3 if framing == 'raw' else None
+    separators = (',', ':') if framing == 'compact' else None
+    if framing == 'ndjson':
+        for item in items:
+            output.write(json.dumps(item, separators=(',', ':')).encode('utf-8') + b'\n')
+    elif not many:
+        for item in items:
+            output.write(json.dumps(item, indent=indent, separators=separators).encode('utf-8') +
+                         b'\n')
     else:
-        config.set('Connection', 'path', str(host_url.path.rstrip('/') + '/'))
-    if VERBOSE:
-        for (key, val) in config.items('Connection'):
-            print("SET HOST URL CONFIG ITEMS : %s=%s" % (key, val))
-    return
+        output.write(b'[')
+        for number, item in enumerate(items):
+            if number:
+                output.write(b',\n' if indent else b',')
+            output.write(json.dumps(item, indent=indent, separators=separators).encode('utf-8'))
+        output.write(b']\n')
+    output.flush()
 
 
-def get_host_url():
+def reframe_json(chunks, ndjson=False):
     """
-    This function returns the host_url string.
+    This generator takes a json document in chunks of bytes and yields it
+    without insignificant whitespace. With ndjson, every element of a top
+    level list is yielded in a line of its own. The whitespace is removed
+    by a regular expression (see JSON_TOKENS) and only the elements of a
+    top level list are parsed, one at a time, so the document is never held
+    in memory as a whole and its size does not matter.
     """
-    protocol = config.get('Connection', 'protocol')
-    server = config.get('Connection', 'server')
-    port = config.get('Connection', 'port')
-    path = config.get('Connection', 'path')
-    host_url = '%s://%s:%s%s' % (protocol, server, port, path)
-    if VERBOSE:
-        print('HOST_URL : %s' % host_url)
-    return(str(host_url))
-
-
-def get_response(url='', payload=None, wsid=None, method='GET'):
+    decoder = json.JSONDecoder()
+    rest = b''                   # a string cut by the end of the last chunk
+    pending = []                 # chunks not reframed yet
+    waiting = 0                  # bytes in pending
+    text = ''                    # compact elements of the top level list not yielded yet
+    retry = 0                    # length of text before an incomplete element is parsed again
+    listed = None if ndjson else False # the document is a top level list split into lines
+    closed = False               # the top level list is over
+
+    def reframe(compact, last=False):
+        nonlocal text, retry, listed, closed
+        if listed is False:
+            return(compact)
+        if closed:
+            return(b'')
+        text += compact.decode('utf-8')
+        if listed is None:
+            if not text:
+                return(b'')
+            listed = text.startswith('[')
+            if not listed:
+                compact, text = text.encode('utf-8'), ''
+                return(compact)
+            text = text[1:]
+        if len(text) < retry and not last:
+            return(b'')
+        lines = []
+        pos = 0
+        while True:
+            if text.startswith(',', pos):
+                pos += 1
+            if text.startswith(']', pos):
+                closed = True
+                pos = len(text)
+                break
+            try:
+                end = decoder.raw_decode(text, pos)[1]
+            except ValueError:
+                break
+            if not text.startswith((',', ']'), end) and not last:
+                ## a number may go on in the next chunk
+                break
+            lines.append(text[pos:end] + '\n')
+            pos = end
+        text = text[pos:]
+        retry = 2 * len(text)
+        if last and text:
+            ## not json, pass it on as it is
+            lines.append(text)
+        return(''.join(lines).encode('utf-8'))
+
+    for chunk in chunks:
+        pending.append(chunk)
+        waiting += len(chunk)
+        if waiting < len(rest):
+            ## a long string is cut, wait for more of it than there is
+            continue
+        tokens = JSON_TOKENS.findall(rest + b''.join(pending))
+        pending = []
+        waiting = 0
+        rest = b''
+        if tokens and JSON_CUT.fullmatch(tokens[-1]):
+            ## all json syntax is ascii, so the json before a cut string
+            ## ends outside of any utf-8 sequence
+            rest = tokens.pop()
+        out = reframe(b''.join(tokens))
+        if out:
+            yield out
+    out = reframe(b''.join(JSON_TOKENS.findall(rest + b''.join(pending))), True)
+    if out:
+        yield out
+    if not listed:
+        yield b'\n'
+
+
+def plain_value(model):
     """
-    Sends data to a given URL and returns the plain response.
+    This function returns a topic model (or the value or children of a
+    payload) without ids and type uris: the value of a simple topic, a
+    dictionary of the plain children of a composite, a list for multi
+    value children. Payloads and fetched topics can be compared this way.
     """
-    jsessionid = get_session_id()
-    host_url = get_host_url()
-    ## Do all relevant string replacements for url here and only here!
-    url = host_url + (url.replace(' ', '%20').replace('"', '%22'))
-    req = urllib.request.Request(url)
-    if payload is None:
-        payload = '{}'.encode('utf-8')
-    else:
-        # payload = payload.encode('utf-8')
-        payload = json.dumps(payload).encode('utf-8')
-        print(payload)
-    if VERBOSE:
-        print("GET RESPONSE : Calling %s with method %s" % (url, method))
-        print("GET RESPONSE : JSESSIONID = %s, wsid = %s" % (jsessionid, wsid))
-        print("GET RESPONSE : Payload = %s" % payload)
-    if method == 'GET':
-        req.add_header("Cookie", "JSESSIONID=%s" % jsessionid)
-    else:
-        req.add_header("Cookie", "JSESSIONID=%s; dmx_workspace_id=%s" % (jsessionid, wsid))
-    req.add_header("Content-Type", "application/json")
-    req.get_method = lambda: method
-    try:
-        response = urllib.request.urlopen(req, payload).read()
-    except urllib.error.HTTPError as error_message:
-        print('GET RESPONSE : Request Data Error: '+str(error_message))
-        sys.exit(1)
-    else:
-        if VERBOSE:
-            print("GET RESPONSE : TYPE = %s, len = %s" % (type(response), len(response)))
-        if len(response)==0 and method=='POST':
-            if VERBOSE:
-                print('GET RESPONSE : return "OK" (%s)' % method)
-            return("OK")
-        elif len(response)!=0 and method=='DELETE':
-            if VERBOSE:
-                print('GET RESPONSE : return "OK" (%s)' % method)
-            return("OK")
-        else:
-            response=check_response(response)
-            return(response)
-
-def get_session_id():
+    if isinstance(model, list):
+        return([plain_value(item) for item in model])
+    if isinstance(model, dict):
+        if 'children' in model and model['children']:
+            return({key: plain_value(val) for key, val in model['children'].items()})
+        if 'value' in model:
+            return(model['value'])
+        if not set(model) & {'id', 'typeUri', 'uri', 'children'}:
+            return({key: plain_value(val) for key, val in model.items()})
+        return({})
+    return(model)
+
+
+def diff_children(current, desired):
     """
-    Creates an initial session and returns the session id.
-    """
-    global JSESSIONID
-    if not JSESSIONID:
-        if VERBOSE:
-            print("GET_SESSION_ID : get new id for user %s, authtype=%s" %
-                  (config.get('Credentials', 'authname'), AUTHTYPE))
-        host_url = get_host_url()
-        url = host_url + 'core/topic/0'
-        if VERBOSE:
-            print("GET_SESSION_ID : url = %s" % url)
-        req = urllib.request.Request(url)
-        base_64_string = get_base_64()
-        req.add_header("Authorization", "%s %s" % (AUTHTYPE, base_64_string))
-        req.add_header("Content-Type", "application/json")
-        cookie_jar = http.cookiejar.CookieJar()
-        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookie_jar))
-        try:
-            opener.open(req)
-        except urllib.request.HTTPError as error_message:
-            print('Get Session ID Error: '+str(error_message))
+    This function returns the children of desired which differ from the
+    children current of a fetched topic. Composite children given as a
+    dictionary of children are compared child by child, so only the
+    changed parts of them are returned. Multi value children (lists) and
+    simple values are returned as a whole if they differ.
+    """
+    changes = {}
+    for (key, want) in desired.items():
+        have = current.get(key)
+        if have is not None and plain_value(have) == plain_value(want):
+            continue
+        if (isinstance(want, dict) and isinstance(have, dict) and
+                not set(want) & {'id', 'typeUri', 'uri', 'value', 'children'}):
+            have_children = have.get('children', have)
+            sub = diff_children(have_children, want)
+            if sub:
+                changes[key] = sub
         else:
-            for cookie in cookie_jar:
-                if cookie.name == "JSESSIONID":
-                    JSESSIONID = cookie.value
-        if VERBOSE:
-            print("JSESSIONID: %s" % JSESSIONID)
-    else:
-        if VERBOSE:
-            print("GET_SESSION_ID : use existing id")
-    return(JSESSIONID)
+            changes[key] = want
+    return(changes)
 
 
-def read_request(url):
-    """
-    Reads the data from a given URL.
+def open_mirror(database):
     """
-    ## TODO
-    ## Replace read_request with get_response
-    ##
-    if VERBOSE:
-        print("READ REQUEST : url = %s" % url)
-    response = get_response(url)
-    return(response)
-
-
-def write_request(url, payload=None, workspace=None, method='POST', expect_json=True):
+    This function opens (and creates if needed) the sqlite database of
+    mirror with the tables topics, children (the values of all children
+    of a topic by path and type uri), assocs and synced (the time of the
+    last run per type in milliseconds), and returns the connection.
     """
-    Writes the data to a given URL.
+    connection = sqlite3.connect(database)
+    connection.executescript('''
+        CREATE TABLE IF NOT EXISTS topics (
+            id INTEGER PRIMARY KEY, type_uri TEXT, value TEXT, workspace_id INTEGER,
+            workspace TEXT, hash TEXT, etag TEXT, last_modified TEXT);
+        CREATE INDEX IF NOT EXISTS topics_type ON topics (type_uri, value);
+        CREATE INDEX IF NOT EXISTS topics_workspace ON topics (workspace);
+        CREATE TABLE IF NOT EXISTS children (
+            topic_id INTEGER, path TEXT, type_uri TEXT, value TEXT);
+        CREATE INDEX IF NOT EXISTS children_topic ON children (topic_id);
+        CREATE INDEX IF NOT EXISTS children_type ON children (type_uri, value);
+        CREATE INDEX IF NOT EXISTS children_path ON children (path, value);
+        CREATE TABLE IF NOT EXISTS assocs (
+            id INTEGER PRIMARY KEY, type_uri TEXT, value TEXT,
+            player1 INTEGER, role1 TEXT, player2 INTEGER, role2 TEXT);
+        CREATE INDEX IF NOT EXISTS assocs_player1 ON assocs (player1);
+        CREATE INDEX IF NOT EXISTS assocs_player2 ON assocs (player2);
+        CREATE TABLE IF NOT EXISTS synced (type_uri TEXT PRIMARY KEY, time INTEGER);
+    ''')
+    return(connection)
+
+
+def flatten_children(children, prefix=''):
     """
-    ## TODO
-    ## Replace write_request with get_response
-    ##
-    ## if workspace in None, the default workspace should come from config:
-    if workspace is None:
-        workspace = config.get('Connection', 'workspace')
-    wsid = get_ws_id(workspace)
-    if VERBOSE:
-        print("WRITE REQUEST : workspace = %s has wsid = %s" % (workspace, wsid))
-    response = get_response(url, payload, wsid, method)
-    return(response)
-
-
-def delete_request(url):
+    This generator yields (path, type_uri, value) for all children of a
+    topic model (or payload), e.g. ('dmx.contacts.person_name/
+    dmx.contacts.first_name', 'dmx.contacts.first_name', 'Marta').
+    Composite children yield their own value and those of their children.
     """
-    Sends the request with method 'DELETE'.
+    for (key, child) in children.items():
+        path = prefix + key
+        type_uri = key.split('#')[0]
+        for item in (child if isinstance(child, list) else [child]):
+            if not isinstance(item, dict):
+                yield (path, type_uri, str(item))
+                continue
+            if 'value' in item:
+                yield (path, type_uri, str(item['value']))
+            if set(item) & {'id', 'typeUri', 'uri', 'value', 'children'}:
+                item = item.get('children') or {}
+            for row in flatten_children(item, path + '/'):
+                yield row
+
+
+def write_mirrored(connection, topic, validators, workspace):
     """
-    if VERBOSE:
-        print("DELETE REQUEST : url = %s" % url)
-    response = get_response(url, method='DELETE')
-    return(response)
-
-
-def get_ws_id(workspace):
+    This function writes a topic with its children and its workspace to
+    the mirror database.
     """
-    This function gets the workspace ID for a workspace by its name.
-    It's much faster to get it by its uri, if present.
-    """
-    global wsid_cache
-    if workspace in wsid_cache:
-        if VERBOSE:
-            print("GET_WS_ID : Workspace ID for workspace %s from cache: %s" % (workspace, wsid_cache[workspace]))
-        return wsid_cache[workspace]
-    ## else
-    if VERBOSE:
-        print("GET_WS_ID : Searching Workspace ID for workspace %s" % workspace)
-    url = ('core/topics/query/"%s"?topicTypeUri=dmx.workspaces.workspace_name'
-           % workspace)
-    ## find the workspace_name in the result
-    response = get_response(url)
-    topics = response["topics"]
-    for topic in topics:
-        ## find the workspace_name in the result
-        if topic['typeUri'] == 'dmx.workspaces.workspace_name':
-            wsnameid = (topic['id'])
-            break
-    if VERBOSE:
-        print("GET WS ID : wsnameid = %s" % wsnameid)
-    url = ('core/topic/%s/related-topics'
-           '?assocTypeUri=dmx.core.composition&myRoleTypeUri='
-           'dmx.core.child&othersRoleTypeUri=dmx.core.parent&'
-           'othersTopicTypeUri=dmx.workspaces.workspace' %
-           str(wsnameid))
-    response = get_response(url)
-    ## TODO - check if still needed:
-    ## The following is a workarround to fix
-    ## Pylint3 Error: Sequence index is not an int, slice,
-    ## or instance with __index__ (invalid-sequence-index)
-    topic = json.loads(json.dumps(response[0]))
-    topic_id = topic['id']
-    wsid_cache[workspace] = topic_id
-    if VERBOSE:
-        print("WS ID = %s" % topic_id)
-    return(topic_id)
-
-
-def get_topicmap_id(tm_name):
+    if not isinstance(workspace, dict):
+        workspace = {}
+    connection.execute('DELETE FROM children WHERE topic_id = ?', (topic['id'],))
+    connection.executemany(
+        'INSERT INTO children VALUES (?, ?, ?, ?)',
+        [(topic['id'],) + row for row in flatten_children(topic.get('children') or {})])
+    connection.execute(
+        'INSERT OR REPLACE INTO topics (id, type_uri, value, workspace_id, workspace,'
+        ' etag, last_modified, hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        (topic['id'], topic.get('typeUri'), str(topic.get('value')), workspace.get('id'),
+         workspace.get('value')) + tuple(validators))
+
+
+def write_mirrored_assocs(connection, topic_id, assocs):
     """
-    This function gets the Topic ID for a topicmap by its name.
-    It's much faster to get it by its uri, if present.
-    """
-    if VERBOSE:
-        print("GET_TOPICMAP_ID : Searching Topic ID for topicmap %s" % tm_name)
-    url = ('core/topics/query/"%s"?topicTypeUri=dmx.topicmaps.topicmap_name'
-           % tm_name)
-    ## find the workspace_name in the result
-    response = get_response(url)
-    topics = response["topics"]
-    for topic in topics:
-        ## find the workspace_name in the result
-        if topic['typeUri'] == 'dmx.topicmaps.topicmap_name':
-            tm_name_id = (topic['id'])
-            # print('topicmap_id=', topic_id)
-            break
-    if VERBOSE:
-        print("GET_TOPICMAP_ID : tm_name_id = %s" % tm_name_id)
-    url = ('core/topic/%s/related-topics'
-           '?assocTypeUri=dmx.core.composition&myRoleTypeUri='
-           'dmx.core.child&othersRoleTypeUri=dmx.core.parent&'
-           'othersTopicTypeUri=dmx.topicmaps.topicmap' %
-           str(tm_name_id))
-    response = get_response(url)
-    ## TODO - check if still needed:
-    ## The following is a workarround to fix
-    ## Pylint3 Error: Sequence index is not an int, slice,
-    ## or instance with __index__ (invalid-sequence-index)
-    topic = json.loads(json.dumps(response[0]))
-    topic_id = topic['id']
-    if VERBOSE:
-        print("WS ID = %s" % topic_id)
-    if VERBOSE:
-        print("MAP ID = %s" % topic_id)
-    return(topic_id)
-
-
-def create_user(dm_user='testuser', dm_pass='testpass'):
+    This function replaces the assocs of a topic in the mirror database.
     """
-    This function creates a new user on the server.
+    connection.execute('DELETE FROM assocs WHERE player1 = ? OR player2 = ?',
+                       (topic_id, topic_id))
+    for assoc in assocs:
+        players = [assoc.get(player) or {} for player in ('player1', 'player2')]
+        connection.execute(
+            'INSERT OR REPLACE INTO assocs VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (assoc.get('id'), assoc.get('typeUri'), str(assoc.get('value', '')),
+             players[0].get('topicId', players[0].get('id')), players[0].get('roleTypeUri'),
+             players[1].get('topicId', players[1].get('id')), players[1].get('roleTypeUri')))
+
+
+def delete_mirrored(connection, topic_id):
     """
-    ## check if username exits
-    users = list(get_items('dmx.accesscontrol.username').values())
-    if VERBOSE:
-        print("CREATE USER : users=%s" % users)
-    if dm_user in users:
-        print("ERROR! User '%s' exists." % dm_user)
-        sys.exit(1)
-    else:
-        ## create user
-        url = 'access-control/user-account'
-        hash_object = hashlib.sha256(dm_pass.encode('UTF-8'))
-        dm_pass = '-SHA256-'+hash_object.hexdigest()
-        payload = {'username' : dm_user, 'password' : dm_pass}
-        topic_id = write_request(url, payload)["id"]
-        if VERBOSE:
-            print("CREATE USER : topic_id = %s" % topic_id)
-            print("CREATE USER : New user '%s' was created with topic_id %s." % (dm_user, topic_id))
-        return(topic_id)
-
-
-def create_topicmap(tm_name, tm_type='dmx.topicmaps.topicmap', workspace=None):
+    This function removes a topic with its children and assocs from the
+    mirror database.
     """
-    This function creates a new topicmap on the server.
-    """
-    ## if workspace in None, the default workspace should come from config:
-    if workspace is None:
-        workspace = config.get('Connection', 'workspace')
-    ## check if topicmap exits (globally!!!)
-    maps = list(get_items('dmx.topicmaps.topicmap').values())
-    if VERBOSE:
-        print("CREATE TOPICMAP : %s" % tm_name)
-        print("CREATE TOPICMAP : maps = %s" % maps)
-    if tm_name in maps:
-        topic_id = get_topicmap_id(tm_name)
-        if VERBOSE:
-            print("INFO: Map '%s' exists (ID %s)." % (tm_name, topic_id))
-    else:
-        url = ('topicmaps?name=%s&topicmapTypeUri=%s' % (tm_name, tm_type))
-        ## for the moment, this requires an empty json string exactly like this
-        payload = json.loads('{"": ""}')
-        topic_id = write_request(url, payload, workspace)["id"]
-        if VERBOSE:
-            print("New topicmap '%s' was created with topic_id %s." % (tm_name, topic_id))
-    return(topic_id)
+    connection.execute('DELETE FROM topics WHERE id = ?', (topic_id,))
+    connection.execute('DELETE FROM children WHERE topic_id = ?', (topic_id,))
+    connection.execute('DELETE FROM assocs WHERE player1 = ? OR player2 = ?',
+                       (topic_id, topic_id))
 
 
-def create_ws(workspace, ws_type, uri=''):
+def query_mirror(database, topictype=None, value=None, where=(), related=None,
+                 workspace=None):
     """
-    This function creates a workspace with workspace uri
-    (needed for id) on the server.
+    This function queries the mirror database (see DMXClient.mirror)
+    without asking the server and returns a list of the matching topics.
+    All filters are optional: topictype is a type uri, value a pattern of
+    the topic value (* matches anything), workspace a workspace name and
+    related a topic id the topics are associated with. Every condition in
+    where is 'child' (the topic has a child of this type uri or path),
+    '!child' (it has none) or 'child=pattern' (a child value matches).
     """
-    ## `uri` is optional.
-    if not uri:
-        uri = workspace.lower()+'.uri'
-    url = ('workspaces?name=%s&uri=%s&sharingModeUri=dmx.workspaces.%s' %
-           (workspace, uri, ws_type))
-    topic_id = write_request(url, expect_json=True)["id"]
-    return(topic_id)
-
-
-def create_member(workspace=None, dm_user='username'):
+    if not os.path.exists(database):
+        print("ERROR! Mirror database %s does not exist." % database)
+        sys.exit(1)
+    connection = open_mirror(database)
+    sql = 'SELECT id, type_uri, value, workspace FROM topics t WHERE 1'
+    params = []
+    if topictype:
+        sql += ' AND t.type_uri = ?'
+        params.append(topictype)
+    if value:
+        sql += ' AND t.value LIKE ?'
+        params.append(value.replace('*', '%'))
+    if workspace:
+        sql += ' AND t.workspace = ?'
+        params.append(workspace)
+    child = ('SELECT 1 FROM children c WHERE c.topic_id = t.id'
+             ' AND (c.type_uri = ? OR c.path = ?)')
+    for condition in where:
+        if condition.startswith('!'):
+            sql += ' AND NOT EXISTS (%s)' % child
+            params += [condition[1:], condition[1:]]
+        elif '=' in condition:
+            (path, pattern) = condition.split('=', 1)
+            sql += ' AND EXISTS (%s AND c.value LIKE ?)' % child
+            params += [path, path, pattern.replace('*', '%')]
+        else:
+            sql += ' AND EXISTS (%s)' % child
+            params += [condition, condition]
+    if related is not None:
+        sql += (' AND t.id IN (SELECT player2 FROM assocs WHERE player1 = ?'
+                ' UNION SELECT player1 FROM assocs WHERE player2 = ?)')
+        params += [related, related]
+    fields = ['id', 'type_uri', 'value', 'workspace']
+    topics = [dict(zip(fields, row)) for row in connection.execute(sql + ' ORDER BY t.id', params)]
+    connection.close()
+    return(topics)
+
+
+def load_summary(samples, seconds, **labels):
     """
-    This function creates a user memebrship association for
-    the workspace on the server.
+    This function returns the number of operations, the throughput per
+    second, the error rate and the latency percentiles in milliseconds of
+    the samples (end time, operation, latency, ok) of DMXClient.load_test.
     """
-    ## if workspace in None, the default workspace should come from config:
-    if workspace is None:
-        workspace = config.get('Connection', 'workspace')
-    if VERBOSE:
-        print("CREATE MEMBER : Creating Workspace membership for user %s in %s" %
-              (dm_user, workspace))
-    wsid = get_ws_id(workspace)
-    url = ('access-control/user/%s/workspace/%s' %
-           (dm_user, wsid))
-    response = write_request(url, expect_json=False)
-    return(response)
-
-
-def create_note(title, body, workspace=None):
+    latencies = sorted(sample[2] for sample in samples)
+    errors = len([sample for sample in samples if not sample[3]])
+
+    def percentile(rank):
+        if not latencies:
+            return(None)
+        return(round(latencies[min(len(latencies) - 1, int(len(latencies) * rank))] * 1000, 1))
+
+    summary = dict(labels)
+    summary.update({
+        'ops': len(samples),
+        'ops_per_s': round(len(samples) / seconds, 1) if seconds else None,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'p50_ms': percentile(0.5),
+        'p90_ms': percentile(0.9),
+        'p99_ms': percentile(0.99),
+        'max_ms': percentile(1.0)
+    })
+    return(summary)
+
+
+def require_vobject():
     """
-    This function creates a new note with text body
-    in the workspace on the server.
+    This function returns the vobject module needed to read vcards or exits,
+    if it is not available.
     """
-    ## if workspace in None, the default workspace should come from config:
-    if workspace is None:
-        workspace = config.get('Connection', 'workspace')
-    if VERBOSE:
-        print("CREATE NOTE : Creating a new note %s with text body %s in workspace %s" %
-              (title, body, workspace))
-    url = 'core/topic/'
-    payload = json.dumps(
-        {
-            "children": {
-                "dmx.notes.text": body,
-                "dmx.notes.title": title
-            },
-            "typeUri": "dmx.notes.note"
-        }
-    )
-    payload = json.loads(payload)
-    if VERBOSE:
-        print("NEW NOTE: %s" % payload)
-    topic_id = write_request(url, payload, workspace)["id"]
-    return(topic_id)
+    version = platform.python_version().split('.')
+    if int(version[0]) < 3 or int(version[1]) < 6:
+        print('SORRY! VCARD option requires Python 3.6 or higher.')
+        ## make pylint3 happy:
+        ModuleNotFoundError = ''
+        sys.exit(0)
+    else:
+        try:
+            import vobject
+        except ImportError as err:
+            print(err)
+            print('Please install module python3-vobject')
+            sys.exit(0)
+    return(vobject)
 
 
-def send_data(payload, workspace=None):
+def markdown_to_note(text, filename):
     """
-    This function sends the topics according to payload to
-    the workspace name on the server.
+    This function returns the title and the html body of a note from the
+    markdown text of a file. The title is the first heading or the file
+    name. The body is converted with module markdown if it is installed,
+    otherwise headings become <h1>..<h6> and every other paragraph becomes
+    a <p> of escaped text.
     """
-    ## if workspace in None, the default workspace should come from config:
-    if workspace is None:
-        workspace = config.get('Connection', 'workspace')
-    if VERBOSE:
-        print("SEND DATA: sending data to workspace '%s'" % workspace)
-    url = 'core/topic/'
-    topic_id = write_request(url, payload, workspace)["id"]
-    return(topic_id)
+    title = os.path.splitext(os.path.basename(filename))[0]
+    for line in text.splitlines():
+        if line.startswith('# '):
+            title = line[2:].strip()
+            break
+    try:
+        import markdown
+    except ImportError:
+        body = ''
+        for paragraph in re.split(r'\n\s*\n', text.strip()):
+            heading = re.match(r'^(#{1,6}) +(.*)\n?', paragraph)
+            if heading:
+                body += '<h%s>%s</h%s>' % (len(heading.group(1)), escape(heading.group(2)),
+                                           len(heading.group(1)))
+                paragraph = paragraph[heading.end():]
+            if paragraph:
+                body += '<p>%s</p>' % escape(paragraph).replace('\n', '<br>')
+    else:
+        body = markdown.markdown(text)
+    return(title, body)
 
 
-def create_assoc(payload, workspace=None):
+def read_manifest(manifest):
     """
-    This function sends the assocs according to payload to
-    the workspace name on the server.
+    This function returns the dictionary of a manifest file of sync_notes
+    or an empty dictionary, if the file does not exist yet.
     """
-    ## if workspace in None, the default workspace should come from config:
-    if workspace is None:
-        workspace = config.get('Connection', 'workspace')
-    if VERBOSE:
-        print("SEND DATA: sending data to workspace '%s'" % workspace)
-    url = 'core/assoc/'
-    assoc_id = write_request(url, payload, workspace)["id"]
-    return(assoc_id)
+    if not os.path.exists(manifest):
+        return({})
+    with open(manifest, 'r') as manifest_file:
+        return(json.load(manifest_file))
 
 
-def send_get(url):
+def write_manifest(manifest, files):
     """
-    This function sends a GET request to custom (a plugin) REST resource.
+    This function writes the manifest file of sync_notes. The file is
+    replaced as a whole, so it is never left half written.
     """
-    ## if workspace in None, the default workspace should come from config:
-    if VERBOSE:
-        print("SEND GET : Sending GET to '%s'" % url)
-    response = get_response(url)
-    return(response)
+    with open(manifest + '.tmp', 'w') as manifest_file:
+        json.dump(files, manifest_file, indent=1, sort_keys=True)
+    os.replace(manifest + '.tmp', manifest)
 
 
-def send_post(url, workspace=None):
+def ref_name(ref):
     """
-    This function sends a POST request to custom (a plugin) REST resource.
+    This function returns the topic name of a player reference (see
+    DMXClient.get_player) or None, if it refers to a topic id or uri.
     """
-    ## if workspace in None, the default workspace should come from config:
-    if workspace is None:
-        workspace = config.get('Connection', 'workspace')
-    if VERBOSE:
-        print("SEND POST : Sending POST to '%s' in Workspace %s" %
-              (url, workspace))
-    response = write_request(url, workspace)
-    return(response)
+    ref = str(ref).strip()
+    if ref.startswith('ref_name:'):
+        return(ref[len('ref_name:'):])
+    if ref.isdigit() or ref.startswith('ref_id:') or ref.startswith('ref_uri:'):
+        return(None)
+    return(ref)
 
 
-def reveal_topic(workspace, map_id, topic_id, x_val=0, y_val=0, pinned=False):
-    """
-    This function reveales a topic (id) on a topicmap (id) at
-    position x, y, pinned or unpinned
+def read_spec(spec_file):
     """
-    if pinned:
-        pinned = str('true')
-    else:
-        pinned = str('false')
-    url = ('topicmaps/%s/topic/%s' % (map_id, topic_id))
-    payload = json.loads(
-        '{ "dmx.topicmaps.x": %s, "dmx.topicmaps.y": %s, \
-        "dmx.topicmaps.visibility": true, "dmx.topicmaps.pinned": %s }'
-        % (x_val, y_val, pinned)
-    )
-    response = write_request(url, payload, workspace, expect_json=False)
-    return(response)
+    This function reads a provisioning spec (see DMXClient.provision) from
+    a json or, if the module yaml is available, a yaml file:
 
+        {"users": [{"username": "alice", "password": "secret"}],
+         "workspaces": [{"name": "Team A", "sharing_mode": "collaborative",
+                         "uri": "team_a.uri", "members": ["alice"],
+                         "topicmaps": ["Team A Map"],
+                         "notes": [{"title": "Welcome", "body": "Hello"}]}]}
 
-def reveal_assoc(map_id, assoc_id):
+    Returns the spec with the optional lists and sharing modes filled in.
     """
-    This function reveales an assoc (id) on a topicmap (id)
-    """
-    # payload = {"": ""}
-    url = ('topicmaps/%s/assoc/%s' % (map_id, assoc_id))
-    payload = json.loads(
-        '{ "dmx.topicmaps.visibility": true, "dmx.topicmaps.pinned": false }'
-    )
-    response = write_request(url, payload, expect_json=False)
-    return(response)
-
+    with open(spec_file, 'r') as data_file:
+        if spec_file.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError as err:
+                print(err)
+                print('Please install module python3-yaml')
+                sys.exit(1)
+            spec = yaml.safe_load(data_file)
+        else:
+            spec = json.load(data_file)
+    spec.setdefault('users', [])
+    spec.setdefault('workspaces', [])
+    for workspace in spec['workspaces']:
+        if 'name' not in workspace:
+            print("ERROR! Workspace without name in spec %s" % spec_file)
+            sys.exit(1)
+        workspace.setdefault('sharing_mode', 'collaborative')
+    for user in spec['users']:
+        if 'username' not in user or 'password' not in user:
+            print("ERROR! User without username or password in spec %s" % spec_file)
+            sys.exit(1)
+    return(spec)
 
 
-def import_vcard(vcard_file, workspace=None):
+def vcard_to_payload(vcard_data, verbose=False):
     """
-    This function imports data from a vcard file and creates a person topic.
+    This function converts one vcard (text, bytes or a buffer) to the
+    payload of a person topic. With verbose the vcard is logged (DEBUG).
     """
-    ## if workspace in None, the default workspace should come from config:
-    if workspace is None:
-        workspace = config.get('Connection', 'workspace')
-    version = platform.python_version().split('.')
-    if VERBOSE:
-        print("PYTHON VERSION : %s" % version)
-    if int(version[0]) < 3 or int(version[1]) < 6:
-        print('SORRY! VCARD option requires Python 3.6 or higher.')
-        ## make pylint3 happy:
-        ModuleNotFoundError = ''
-        sys.exit(0)
-    else:
-        try:
-            import vobject
-        except ImportError as err:
-            print(err)
-            print('Please install module python3-vobject')
-            sys.exit(0)
-
-    payload = read_file(vcard_file)
-    # ~ if VERBOSE:
-        # ~ print("VCARD FILE:\n%s" % payload)
-    vcard = vobject.readOne(payload)
-    if VERBOSE:
-        vcard.prettyPrint()
+    vobject = require_vobject()
+    if not isinstance(vcard_data, str):
+        vcard_data = bytes(vcard_data).decode('utf-8')
+    vcard = vobject.readOne(vcard_data)
+    if verbose and LOG_BULK.isEnabledFor(logging.DEBUG):
+        LOG_BULK.debug("VCARD TO PAYLOAD : vcard:\n%s", vcard.serialize())
 
     ## firstname
     first_name = ''
@@ -756,32 +4117,12 @@ def import_vcard(vcard_file, workspace=None):
         pass
 
     ## tel
-    tel_mobile = ''
-    tel_home = ''
-    tel_work = ''
+    phones = {label: '' for (label, types) in VCARD_PHONE_TYPES}
     try:
         for tel in vcard.contents["tel"]:
-            if tel.params["TYPE"] in [
-                    ["CELL", "VOICE"],
-                    ["VOICE", "CELL"],
-                    ["CELL"],
-                    ["MOBILE"],
-                    ["MOBIL"]
-                ]:
-                tel_mobile = tel.value
-            if tel.params["TYPE"] in [
-                    ["HOME", "VOICE"],
-                    ["VOICE", "HOME"],
-                    ["HOME"],
-                    ["VOICE"]
-                ]:
-                tel_home = tel.value
-            if tel.params["TYPE"] in [
-                    ["WORK", "VOICE"],
-                    ["VOICE", "WORK"],
-                    ["WORK"]
-                ]:
-                tel_work = tel.value
+            for (label, types) in VCARD_PHONE_TYPES:
+                if tel.params["TYPE"] in types:
+                    phones[label] = tel.value
     except KeyError:
         pass
 
@@ -804,32 +4145,14 @@ def import_vcard(vcard_file, workspace=None):
         note = ''
 
     ## address ##
-    ## home
-    adr_home_street = ''
-    adr_home_code = ''
-    adr_home_city = ''
-    adr_home_region = ''
-    adr_home_country = ''
-    ## work
-    adr_work_street = ''
-    adr_work_code = ''
-    adr_work_city = ''
-    adr_work_region = ''
-    adr_work_country = ''
+    addresses = {label: {uri: '' for (field, uri) in VCARD_ADDRESS_FIELDS if uri}
+                 for (label, types) in VCARD_ADDRESS_TYPES}
     try:
         for adr in vcard.contents["adr"]:
-            if adr.params["TYPE"] in [["HOME"], ["PRIVATE"]]:
-                adr_home_street = adr.value.street
-                adr_home_code = adr.value.code
-                adr_home_city = adr.value.city
-                adr_home_region = adr.value.region
-                adr_home_country = adr.value.country
-            if adr.params["TYPE"] in [["WORK"], ["OFFICE"]]:
-                adr_work_street = adr.value.street
-                adr_work_code = adr.value.code
-                adr_work_city = adr.value.city
-                adr_work_region = adr.value.region
-                adr_work_country = adr.value.country
+            for (label, types) in VCARD_ADDRESS_TYPES:
+                if adr.params["TYPE"] in types:
+                    addresses[label] = {uri: getattr(adr.value, field)
+                                        for (field, uri) in VCARD_ADDRESS_FIELDS if uri}
     except KeyError:
         pass
 
@@ -846,8 +4169,18 @@ def import_vcard(vcard_file, workspace=None):
         pass
     emails_to_create = json.loads(json.dumps(emails_to_create))
 
-    ## create payload
-    url = 'core/topic/'
+    payload = person_payload(first_name, last_name, phones, addresses, emails_to_create,
+                             birthday, note)
+    return(payload)
+
+
+def person_payload(first_name, last_name, phones, addresses, emails, birthday, note):
+    """
+    This function returns the payload of a person topic. phones and
+    addresses are dictionaries by the labels of VCARD_PHONE_TYPES and
+    VCARD_ADDRESS_TYPES, emails is a list of {"value": email} and birthday
+    a list [year, month, day].
+    """
     payload = json.dumps(
         {
             "typeUri": "dmx.contacts.person",
@@ -858,173 +4191,405 @@ def import_vcard(vcard_file, workspace=None):
                     "dmx.datetime.year": birthday[0]
                 },
                 "dmx.contacts.person_description": note,
-                "dmx.contacts.email_address": emails_to_create,
+                "dmx.contacts.email_address": emails,
                 "dmx.contacts.person_name": {
                     "dmx.contacts.first_name": first_name,
                     "dmx.contacts.last_name": last_name
                 },
                 "dmx.contacts.phone_number#dmx.contacts.phone_entry": [
                     {
-                        "value": tel_home,
-                        "assoc": {
-                            "children": {
-                                "dmx.contacts.phone_label": "ref_uri:dmx.contacts.home_phone"
-                            }
-                        }
-                    },
-                    {
-                        "value": tel_work,
-                        "assoc": {
-                            "children": {
-                                "dmx.contacts.phone_label": "ref_uri:dmx.contacts.work_phone"
-                            }
-                        }
-                    },
-                    {
-                        "value": tel_mobile,
+                        "value": phones[label],
                         "assoc": {
                             "children": {
-                                "dmx.contacts.phone_label": "ref_uri:dmx.contacts.mobile"
+                                "dmx.contacts.phone_label": "ref_uri:%s" % label
                             }
                         }
-                    }
+                    } for (label, types) in VCARD_PHONE_TYPES
                 ],
                 "dmx.contacts.address#dmx.contacts.address_entry": [
                     {
-                        "children": {
-                            "dmx.contacts.street": adr_home_street,
-                            "dmx.contacts.postal_code": adr_home_code,
-                            "dmx.contacts.city": adr_home_city,
-                            "dmx.contacts.region": adr_home_region,
-                            "dmx.contacts.country": adr_home_country
-                        },
+                        "children": addresses[label],
                         "assoc": {
                             "children": {
-                                "dmx.contacts.address_label": {
-                                    "value": "ref_uri:dmx.contacts.home_address"
-                                }
+                                "dmx.contacts.address_label": "ref_uri:%s" % label
                             }
                         }
-                    },
-                    {
-                        "children": {
-                            "dmx.contacts.street": adr_work_street,
-                            "dmx.contacts.postal_code": adr_work_code,
-                            "dmx.contacts.city": adr_work_city,
-                            "dmx.contacts.region": adr_work_region,
-                            "dmx.contacts.country": adr_work_country
-                        },
-                        "assoc": {
-                            "children": {
-                                "dmx.contacts.address_label": "ref_uri:dmx.contacts.work_address"
-                            }
-                        }
-                    }
+                    } for (label, types) in VCARD_ADDRESS_TYPES
                 ]
             }
         }
 
     )
     payload = json.loads(payload)
-    if VERBOSE:
-        print("IMPORT VCARD : new person: %s" % payload)
-    topic_id = write_request(url, payload, workspace)["id"]
-    return(topic_id)
+    return(payload)
+
+
+def find_child(children, type_uri):
+    """
+    This function returns the child of type_uri from the children of a
+    topic model or payload, which are keyed by type uri or by 'type
+    uri#assoc type uri', or None.
+    """
+    for (key, val) in (children or {}).items():
+        if type_uri in key.split('#'):
+            return(val)
+    return(None)
 
 
-def get_topic(topic_id):
+def csv_to_payload(row):
     """
-    This function fetches the data according to datapath from
-    the server and returns the data.
+    This function converts a row of a contacts csv file (a dictionary by
+    column names) to the payload of a person topic. The columns are
+    first_name, last_name, email (several separated by spaces), birthday
+    (yyyy-mm-dd), note, the phone labels home_phone, work_phone and mobile
+    and the address fields of the address labels, e.g. home_address_street
+    or work_address_city.
     """
-    url = ('core/topic/%s?children=true' % topic_id)
-    return(read_request(url))
+    def column(name):
+        return((row.get(name) or '').strip())
+
+    phones = {label: column(label.split('.')[-1]) for (label, types) in VCARD_PHONE_TYPES}
+    addresses = {label: {uri: column('%s_%s' % (label.split('.')[-1], field))
+                         for (field, uri) in VCARD_ADDRESS_FIELDS if uri}
+                 for (label, types) in VCARD_ADDRESS_TYPES}
+    emails = [{"value": email.lower()} for email in column('email').split()]
+    birthday = column('birthday').split('-') if column('birthday') else ['', '', '']
+    return(person_payload(column('first_name'), column('last_name'), phones, addresses,
+                          emails, birthday, column('note')))
 
 
-def get_data(datapath):
+def contact_keys(topic):
+    """
+    This function returns the keys of a person topic (fetched with its
+    children or a payload) in a ContactIndex: 'email:' and the normalized
+    email addresses, 'name:' and the normalized full name.
+    """
+    keys = []
+    emails = find_child(topic.get('children'), 'dmx.contacts.email_address')
+    for email in (emails if isinstance(emails, list) else [emails]):
+        email = plain_value(email)
+        if isinstance(email, str) and email.strip():
+            keys.append('email:' + email.strip().lower())
+    name = plain_value(find_child(topic.get('children'), 'dmx.contacts.person_name'))
+    if isinstance(name, dict):
+        full_name = ' '.join(str(name.get(uri) or '') for uri in (
+            'dmx.contacts.first_name', 'dmx.contacts.last_name')).split()
+        if full_name:
+            keys.append('name:' + ' '.join(full_name).lower())
+    return(keys)
+
+
+def prune_payload(children):
     """
-    This function fetches the data according to datapath from
-    the server and returns the data.
+    This function returns the children of a payload without empty values,
+    so they can be merged into an existing topic without clearing it.
     """
-    url = ('core/%s?children=true' % datapath)
-    return(read_request(url))
+    pruned = {}
+    for (key, val) in children.items():
+        if isinstance(val, list):
+            val = [item for item in (prune_payload({'item': item}).get('item') for item in val)
+                   if item]
+        elif isinstance(val, dict):
+            if 'children' in val or 'value' in val:
+                item = dict(val)
+                if 'children' in val:
+                    item['children'] = prune_payload(val['children'])
+                    if not item['children']:
+                        continue
+                elif val['value'] in ('', None):
+                    continue
+                val = item
+            else:
+                val = prune_payload(val)
+        if val not in ('', None, [], {}):
+            pruned[key] = val
+    return(pruned)
 
 
-def get_items(topictype):
+def person_to_vcard(topic):
+    """
+    This function converts a person topic (fetched with its children or a
+    payload like the one of vcard_to_payload) to the text of a vcard with
+    the same fields and labels vcard_to_payload reads.
     """
-    This function searches for topics of the specified topictype and
-    returns the items, if exists
+    def text(value):
+        value = '' if value is None else str(value)
+        return(value.replace('\\', '\\\\').replace('\n', '\\n').replace(
+            ',', '\\,').replace(';', '\\;'))
+
+    def label(entry):
+        ## the label uri of a phone or address entry
+        if not isinstance(entry, dict):
+            return(None)
+        label_topic = find_child((entry.get('assoc') or {}).get('children'), 'dmx.contacts.phone_label')
+        if label_topic is None:
+            label_topic = find_child((entry.get('assoc') or {}).get('children'),
+                                'dmx.contacts.address_label')
+        if isinstance(label_topic, dict):
+            label_topic = label_topic.get('uri') or label_topic.get('value')
+        return(str(label_topic or '').replace('ref_uri:', ''))
+
+    def entries(type_uri):
+        entry_list = find_child(topic.get('children'), type_uri)
+        if entry_list is None:
+            return([])
+        return(entry_list if isinstance(entry_list, list) else [entry_list])
+
+    name = plain_value(find_child(topic.get('children'), 'dmx.contacts.person_name')) or {}
+    if not isinstance(name, dict):
+        name = {}
+    first_name = name.get('dmx.contacts.first_name') or ''
+    last_name = name.get('dmx.contacts.last_name') or ''
+    lines = [
+        'BEGIN:VCARD',
+        'VERSION:3.0',
+        'N:%s;%s;;;' % (text(last_name), text(first_name)),
+        'FN:%s' % text(('%s %s' % (first_name, last_name)).strip() or topic.get('value'))
+    ]
+    for entry in entries('dmx.contacts.phone_number'):
+        number = plain_value(entry)
+        for (phone_label, types) in VCARD_PHONE_TYPES:
+            if number and label(entry) == phone_label:
+                lines.append('TEL;TYPE=%s:%s' % (','.join(types[0]), text(number)))
+    for entry in entries('dmx.contacts.address'):
+        fields = plain_value(entry)
+        for (address_label, types) in VCARD_ADDRESS_TYPES:
+            if isinstance(fields, dict) and any(fields.values()) and label(entry) == address_label:
+                lines.append('ADR;TYPE=%s:%s' % (','.join(types[0]), ';'.join(
+                    text(fields.get(uri)) for (field, uri) in VCARD_ADDRESS_FIELDS)))
+    for entry in entries('dmx.contacts.email_address'):
+        if plain_value(entry):
+            lines.append('EMAIL;TYPE=INTERNET:%s' % text(plain_value(entry)))
+    birthday = plain_value(find_child(topic.get('children'), 'dmx.contacts.date_of_birth'))
+    if isinstance(birthday, dict) and all(
+            str(birthday.get(uri) or '').isdigit()
+            for uri in ('dmx.datetime.year', 'dmx.datetime.month', 'dmx.datetime.day')):
+        lines.append('BDAY:%04d-%02d-%02d' % tuple(int(birthday[uri]) for uri in (
+            'dmx.datetime.year', 'dmx.datetime.month', 'dmx.datetime.day')))
+    note = plain_value(find_child(topic.get('children'), 'dmx.contacts.person_description'))
+    if note:
+        lines.append('NOTE:%s' % text(note))
+    lines.append('END:VCARD')
+    ## fold lines longer than 75 characters
+    folded = []
+    for line in lines:
+        while len(line) > 75:
+            folded.append(line[:75])
+            line = ' ' + line[75:]
+        folded.append(line)
+    return('\r\n'.join(folded) + '\r\n')
+
+
+def iter_records(filename, marker=None):
     """
-    dm_items = {} # for dictionary
-    data = get_data('topics/type/%s' % topictype)
+    This generator maps a file into memory and yields its records as tuples
+    (start, end, data), where data is a memoryview slice of the mapped file
+    and nothing is copied. Without marker every non empty line is a record,
+    with marker (e.g. b'BEGIN:VCARD') every record starts with marker.
+    """
+    with open(filename, 'rb') as data_file:
+        if os.fstat(data_file.fileno()).st_size == 0:
+            return
+        data_map = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(data_map)
+    size = len(data_map)
+    non_space = re.compile(rb'\S')
+    if marker is None:
+        start = 0
+        while start < size:
+            end = data_map.find(b'\n', start)
+            if end < 0:
+                end = size
+            record_end = end
+            if record_end > start and data_map[record_end - 1] == 13: # '\r'
+                record_end -= 1
+            if non_space.search(data_map, start, record_end):
+                yield (start, record_end, view[start:record_end])
+            start = end + 1
+    else:
+        start = data_map.find(marker)
+        while start >= 0:
+            end = data_map.find(marker, start + len(marker))
+            if end < 0:
+                yield (start, size, view[start:size])
+                break
+            yield (start, end, view[start:end])
+            start = end
+    view.release()
     try:
-        total = len(data)
-    except:
-        print("Error while trying to get items.")
-        total = 0
+        data_map.close()
+    except BufferError:
+        ## the caller still holds a slice, the map is closed when it is freed
         pass
-    if total > 0:
-        for i in range(total):
-            dm_items.update(
-                {(data[i]["id"]): (data[i]["value"])}
-            )
-    return(dm_items)
 
 
-def get_related(topic_id):
+def read_json_records(filename, skip=None):
     """
-    This function fetches related topics according to topic_id from
-    the server and returns the data.
+    This generator yields (offset, payload) for the payloads of a json file
+    (one payload or a list of payloads) or of an ndjson file (one payload
+    per line). ndjson files are read line by line from the memory mapped
+    file and offset is the byte offset of the line, otherwise offset is
+    the index of the payload in the list. Records at offsets for which
+    skip returns True are yielded as (offset, None) without parsing them.
     """
-    url = ('core/topic/%s/related-topics?' % topic_id)
-    return(read_request(url))
+    records = iter_records(filename)
+    for (start, end, data) in records:
+        try:
+            if bytes(data[:1]) == b'[':
+                raise ValueError('not ndjson')
+            payload = json.loads(bytes(data))
+        except ValueError:
+            ## not ndjson, so the whole file is one json document
+            with open(filename, 'rb') as data_file:
+                payload = json.load(data_file)
+            if not isinstance(payload, list):
+                payload = [payload]
+            for (number, item) in enumerate(payload):
+                if skip is not None and skip(number):
+                    item = None
+                yield (number, item)
+            return
+        if skip is not None and skip(start):
+            payload = None
+        yield (start, payload)
+        break
+    for (start, end, data) in records:
+        if skip is not None and skip(start):
+            yield (start, None)
+        else:
+            yield (start, json.loads(bytes(data)))
 
 
-def get_creator(topic_id):
+def bounded_map(executor, function, iterable, window, skip=None):
     """
-    This function fetches related topics according to topic_id from
-    the server and returns the data.
+    This generator works like executor.map, but takes items from iterable
+    only as results are consumed, so at most window items are in flight.
+    Items for which skip returns True are not submitted, their result is None.
     """
-    url = ('access-control/object/%s/creator' % topic_id)
-    return(read_request(url))
+    futures = collections.deque()
+    for item in iterable:
+        if skip is not None and skip(item):
+            future = concurrent.futures.Future()
+            future.set_result(None)
+            futures.append(future)
+        else:
+            futures.append(executor.submit(function, item))
+        if len(futures) >= window:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
 
 
-def get_modifier(topic_id):
+## the memory mapped file of a map_records worker process
+records_map = None
+
+
+def open_records_map(filename):
     """
-    This function fetches related topics according to topic_id from
-    the server and returns the data.
+    This function maps a file into memory in a map_records worker process.
     """
-    url = ('access-control/object/%s/modifier' % topic_id)
-    return(read_request(url))
+    global records_map
+    with open(filename, 'rb') as data_file:
+        records_map = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
 
 
-def get_topic_ws(topic_id):
+def call_with_record(function, offset):
     """
-    This function fetches the topic's workspace id according to topic_id from
-    the server and returns the data.
+    This function calls function with the record at offset (start, end) of
+    the memory mapped file in a map_records worker process.
     """
-    url = ('workspace/object/%s' % topic_id)
-    return(read_request(url))
+    return(function(memoryview(records_map)[offset[0]:offset[1]]))
 
 
-def get_ws_owner(workspace_id):
+def map_records(function, filename, marker=None, workers=None, skip=None):
     """
-    This function fetches the owner of a workspace id from
-    the server and returns the data.
+    This generator splits a file into records (see iter_records) and
+    yields (offset, result) with the byte offset of every record and the
+    result of function for the record in the order of the file. function
+    runs in worker processes, which map the same file into memory and get
+    only the offsets of their records, so records are never copied between
+    processes. function must be defined at module level. The worker
+    processes are started by a fork server (or spawned, where there is no
+    fork server), since forking a process with running threads may copy
+    locks in a locked state. Records at offsets for which skip returns True
+    are not passed to function, their result is None.
     """
-    url = ('access-control/workspace/%s/owner' % workspace_id)
-    return(read_request(url))
+    if workers is None:
+        workers = WORKERS
+    starts = collections.deque()
 
+    def offsets():
+        for (start, end, data) in iter_records(filename, marker):
+            starts.append(start)
+            yield (start, end)
 
-def delete_topic(topic_id):
+    if skip is not None:
+        skip_offset = lambda offset: skip(offset[0])
+    else:
+        skip_offset = None
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+    else:
+        context = multiprocessing.get_context('spawn')
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max(1, workers), mp_context=context,
+            initializer=open_records_map, initargs=(filename,)) as executor:
+        ## the results come in the order of the offsets
+        for result in bounded_map(
+                executor, functools.partial(call_with_record, function),
+                offsets(), workers * 4, skip_offset):
+            yield (starts.popleft(), result)
+
+
+def add_secrets(*secrets):
+    """
+    This function adds secrets (e.g. a password) to the strings which are
+    replaced by *** in all log messages.
+    """
+    SECRETS.update(secret for secret in secrets if secret)
+
+
+def redact(text):
+    """
+    This function returns text with all secrets (see add_secrets) and the
+    values of passwords, authorization headers and session ids replaced
+    by ***.
+    """
+    for secret in tuple(SECRETS):
+        text = text.replace(secret, '***')
+    return(SECRET_PATTERN.sub(r'\1***', text))
+
+
+def configure_logging(verbose=False, levels=None, samples=None, log_format='text'):
     """
-    This function deletes a topic by its id from the server.
+    This function writes the log records of all subsystems (see
+    LOG_SUBSYSTEMS) to stderr as text or json lines. With verbose every
+    subsystem logs everything (DEBUG), else only warnings. levels maps
+    subsystems to level names (e.g. {'http': 'INFO'}) and samples to n to
+    let only every n-th record of the subsystem pass (e.g. {'http': 100}).
     """
-    if VERBOSE:
-        print("DELETE TOPIC : deleting topic with id '%s'" % topic_id)
-    url = ('core/topic/%s' % topic_id)
-    response = delete_request(url)
-    return(response)
+    dmx_log = logging.getLogger('dmx')
+    dmx_log.setLevel(logging.DEBUG if verbose else logging.WARNING)
+    handler = logging.StreamHandler(sys.stderr)
+    if log_format == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(message)s'))
+    for old_handler in [old_handler for old_handler in dmx_log.handlers
+                        if isinstance(old_handler, logging.StreamHandler)]:
+        dmx_log.removeHandler(old_handler)
+    dmx_log.addHandler(handler)
+    for (subsystem, level) in (levels or {}).items():
+        if subsystem not in LOG_SUBSYSTEMS:
+            print("ERROR! Invalid subsystem %s, use one of %s." % (subsystem, LOG_SUBSYSTEMS))
+            sys.exit(1)
+        logging.getLogger('dmx.' + subsystem).setLevel(level.upper())
+    for (subsystem, sample) in (samples or {}).items():
+        if subsystem not in LOG_SUBSYSTEMS:
+            print("ERROR! Invalid subsystem %s, use one of %s." % (subsystem, LOG_SUBSYSTEMS))
+            sys.exit(1)
+        LOG_FILTERS[subsystem].sample = int(sample)
+    return
 
 
 def pretty_print(data):
@@ -1040,10 +4605,7 @@ def main(args):
     ToDo:
     # change_password(user, password, 'new_pass')
     """
-    global VERBOSE    # verbose mode (True|False)
-    global AUTHTYPE   # set http authentication header authtype (Basic|LDAP|...)
-    global JSESSIONID # can be entered via command line
-    global config     # the gloabl server access params
+    client = default_client # holds the server access params and the session
 
     parser = argparse.ArgumentParser(
         description='This is a Python script \
@@ -1052,44 +4614,157 @@ def main(args):
         and comes with ABSOLUTELY NO WARRANTY.'
     )
     parser.add_argument(
-        '-A', '--AUTHTYPE',
+        '-A', '--AUTHTYPE',
+        type=str,
+        help='Set http authentication header (Basic|LDAP|...).',
+        required=False,
+        default='Basic'
+    )
+    parser.add_argument(
+        '-AU', '--audit',
+        type=str,
+        help='Write creator, modifier, workspace and workspace owner of all \
+              topics of a topic type uri or of a comma separated list of topic \
+              ids to stdout or to the file given with -O.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--audit_format',
+        type=str,
+        choices=['csv', 'ndjson'],
+        help='The output format of --audit (default: csv).',
+        required=False,
+        default='csv'
+    )
+    parser.add_argument(
+        '-b', '--by_type',
+        type=str,
+        help='Get all items of a TopicType by its topic.type.uri.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '-BA', '--batch',
+        type=str,
+        help='Run all operations of a json or ndjson batch file. Operations \
+              referring to results of other operations with ${id} wait for \
+              them, all others run concurrently.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '-B', '--note_body',
+        type=str,
+        help='Provide a text for the body of a new note.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '-c', '--config_properties',
+        type=str,
+        help='Reads config data from dmx config properties file.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '-C', '--create_user',
+        help='Create a user with -u username and -p password.',
+        action='store_true',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '-d', '--delete_topic',
+        type=int,
+        help='Detele a topic by id.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--duplicates',
+        type=str,
+        choices=['skip', 'merge', 'flag'],
+        help='Look up every person of -V in an index of the email addresses \
+              and names of all persons and skip it, merge it into the known \
+              person or create it and report it, if it is known already.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--depth',
+        type=int,
+        help='Levels of children to fetch with -t and -b, 0 for none. \
+              (default: all)',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--fields',
+        type=str,
+        help='Comma separated keys of the topics to print with -t and -b, \
+              e.g. id,value. (default: all)',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--trace',
         type=str,
-        help='Set http authentication header (Basic|LDAP|...).',
+        help='Write the nested calls of all client functions with their \
+              times to a Chrome trace file for chrome://tracing or Perfetto.',
         required=False,
-        default='Basic'
+        default=None
     )
     parser.add_argument(
-        '-b', '--by_type',
+        '--log_level',
         type=str,
-        help='Get all items of a TopicType by its topic.type.uri.',
+        help='Comma separated log levels of the subsystems %s, e.g. \
+              http=DEBUG,bulk=INFO. (default: DEBUG with -v, else WARNING)' \
+              % ', '.join(LOG_SUBSYSTEMS),
         required=False,
         default=None
     )
     parser.add_argument(
-        '-B', '--note_body',
+        '--log_sample',
         type=str,
-        help='Provide a text for the body of a new note.',
+        help='Comma separated subsystems and n to log only every n-th \
+              message of the subsystem, e.g. http=100.',
         required=False,
         default=None
     )
     parser.add_argument(
-        '-c', '--config_properties',
+        '--log_format',
         type=str,
-        help='Reads config data from dmx config properties file.',
+        choices=['text', 'json'],
+        help='Write the log messages as text or as json lines. (default: text)',
+        required=False,
+        default='text'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        help='Seconds an operation (a request or a record of a bulk \
+              operation with all its requests) may take before it fails.',
         required=False,
         default=None
     )
     parser.add_argument(
-        '-C', '--create_user',
-        help='Create a user with -u username and -p password.',
+        '--hedge',
         action='store_true',
+        help='Send a GET request a second time, if it gets no answer within \
+              the 95th percentile of the latencies of the last requests, and \
+              take whichever answer comes first.',
         required=False,
-        default=None
+        default=False
     )
     parser.add_argument(
-        '-d', '--delete_topic',
-        type=int,
-        help='Detele a topic by id.',
+        '-E', '--import_edges',
+        type=str,
+        help='Create assocs from a csv or ndjson edge list file with the \
+              fields player1, player2, assocTypeUri and roles in a specified \
+              workspace with -E file name and -w workspace name. Players are \
+              topic ids, ref_uri:topic.uri or topic names. Use -o to reveal \
+              the new assocs on a topicmap.',
         required=False,
         default=None
     )
@@ -1097,7 +4772,17 @@ def main(args):
         '-f', '--file',
         type=str,
         help='Creates a new topic from json file in a specified workspace \
-              with -f file name and -w workspace name.',
+              with -f file name and -w workspace name. Creates a topic for \
+              every line of an ndjson file.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '-H', '--hosts',
+        type=str,
+        help='Run the operation on several instances in parallel. Provide a \
+              comma separated list of names of [Connection:<name>] sections \
+              in the config file or "all".',
         required=False,
         default=None
     )
@@ -1115,6 +4800,14 @@ def main(args):
         required=False,
         default=None
     )
+    parser.add_argument(
+        '--journal',
+        type=str,
+        help='Write a checkpoint journal of the bulk writes of -f, -V, -E and -BA \
+              to this file (see --resume).',
+        required=False,
+        default=None
+    )
     parser.add_argument(
         '-l', '--login',
         help='Login as -u user with password -p instead of admin.',
@@ -1122,6 +4815,46 @@ def main(args):
         required=False,
         default=None
     )
+    parser.add_argument(
+        '--load',
+        type=str,
+        help='Run a load test with a weighted mix of operations, e.g. \
+              "get_topic=80,get_related=10,create_note=5,send_data=3,reveal_topic=2", \
+              with -W threads in workspace -w (and topicmap -o) and print \
+              throughput, latency percentiles and error rate.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--load_duration',
+        type=float,
+        help='Duration of --load in seconds (default: 60).',
+        required=False,
+        default=60.0
+    )
+    parser.add_argument(
+        '--load_rate',
+        type=float,
+        help='Start the operations of --load at this rate per second instead \
+              of running -W threads as fast as possible.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--load_ramp_up',
+        type=float,
+        help='Seconds in which the rate or threads of --load grow to their \
+              full value (default: 0).',
+        required=False,
+        default=0.0
+    )
+    parser.add_argument(
+        '--load_report',
+        type=float,
+        help='Seconds between the reports of --load (default: 5).',
+        required=False,
+        default=5.0
+    )
     parser.add_argument(
         '-m', '--membership',
         help='Create a new workspace membership with -w workspace name \
@@ -1138,6 +4871,35 @@ def main(args):
         required=False,
         default=None
     )
+    parser.add_argument(
+        '--merge',
+        help='Merge the list results of all instances of -H into one list.',
+        action='store_true',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--mirror',
+        type=str,
+        help='Mirror all topics of the types of --mirror_types with their \
+              children and assocs to this sqlite database or refresh it.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--mirror_types',
+        type=str,
+        help='Comma separated list of the topic type uris of --mirror.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--mirror_full',
+        help='Refresh all topics and assocs of --mirror, not only the modified ones.',
+        action='store_true',
+        required=False,
+        default=None
+    )
     parser.add_argument(
         '-n', '--new_member',
         type=str,
@@ -1160,6 +4922,21 @@ def main(args):
         required=False,
         default=None
     )
+    parser.add_argument(
+        '-O', '--output',
+        type=str,
+        help='Write the output of -X, -XV, -AU or --stream to a file instead of stdout.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--no_validate',
+        help='Do not validate payloads against the type definitions \
+              from the server before sending them (validated by default).',
+        action='store_true',
+        required=False,
+        default=None
+    )
     parser.add_argument(
         '-p', '--password',
         type=str,
@@ -1167,6 +4944,54 @@ def main(args):
         required=False,
         default=None
     )
+    parser.add_argument(
+        '--provision',
+        type=str,
+        help='Create the users, workspaces, members, topicmaps and notes of \
+              a json (or yaml) spec file, which do not exist yet, with -W \
+              concurrent requests.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--query',
+        type=str,
+        help='Query the sqlite database of --mirror with --query_type, \
+              --query_value, --query_where, --query_related and -w workspace \
+              name and print the matching topics as json lines.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--query_type',
+        type=str,
+        help='Topic type uri of the topics of --query.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--query_value',
+        type=str,
+        help='Value of the topics of --query (* matches anything).',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--query_where',
+        type=str,
+        action='append',
+        help='Child condition of --query: "child uri" (has such a child), \
+              "!child uri" (has none) or "child uri=value". May be repeated.',
+        required=False,
+        default=[]
+    )
+    parser.add_argument(
+        '--query_related',
+        type=int,
+        help='Topic id the topics of --query are associated with.',
+        required=False,
+        default=None
+    )
     parser.add_argument(
         '-r', '--get_related',
         type=int,
@@ -1174,6 +4999,52 @@ def main(args):
         required=False,
         default=None
     )
+    parser.add_argument(
+        '--related_assocs',
+        help='Get the related assocs instead of the related topics with -r.',
+        action='store_true',
+        required=False,
+        default=False
+    )
+    parser.add_argument(
+        '--assoc_type',
+        type=str,
+        help='Get only the items of -r related by assocs of this type uri, \
+              e.g. dmx.core.composition.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--my_role',
+        type=str,
+        help='Get only the items of -r where the topic of -r has this role \
+              type uri, e.g. dmx.core.parent.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--others_role',
+        type=str,
+        help='Get only the items of -r with this role type uri, e.g. \
+              dmx.core.child.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--others_type',
+        type=str,
+        help='Get only the related topics (or assocs) of -r of this type uri.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--resume',
+        help='Resume an interrupted bulk write with the journal of --journal \
+              and skip all records done already.',
+        action='store_true',
+        required=False,
+        default=None
+    )
     parser.add_argument(
         '-R', '--reveal_topic',
         help='Reveal a topic on a topicmap in a specified workspace \
@@ -1215,6 +5086,34 @@ def main(args):
               Use in conjunction with -w for e.g. triggering imports.',
         default=None
     )
+    parser.add_argument(
+        '--stream',
+        type=str,
+        choices=['raw', 'compact', 'ndjson'],
+        help='Stream the response of -SG, -t or -b to stdout or to the file \
+              given with -O instead of loading and pretty printing it. The \
+              response is written as it is (raw), without whitespace (compact) \
+              or with every list element in a line of its own (ndjson). With \
+              -b the list of topics is written as it comes from the server.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--sync_notes',
+        type=str,
+        help='Create, update or delete the notes of all changed markdown files \
+              (*.md) of a directory in workspace -w.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--manifest',
+        type=str,
+        help='The manifest file of --sync_notes (default: .dmx_notes.json in \
+              the directory).',
+        required=False,
+        default=None
+    )
     parser.add_argument(
         '-t', '--get_topic',
         type=int,
@@ -1222,6 +5121,13 @@ def main(args):
         required=False,
         default=None
     )
+    parser.add_argument(
+        '--get_topics',
+        type=str,
+        help='Get all data of several topics by a comma separated list of ids.',
+        required=False,
+        default=None
+    )
     parser.add_argument(
         '-T', '--ws_type',
         type=str,
@@ -1236,6 +5142,14 @@ def main(args):
         required=False,
         default=None
     )
+    parser.add_argument(
+        '-UP', '--update',
+        type=str,
+        help='Update the existing topics of all payloads with an "id" in a json \
+              or ndjson file and send only the changed children.',
+        required=False,
+        default=None
+    )
     parser.add_argument(
         '-U', '--URL',
         type=str,
@@ -1245,7 +5159,7 @@ def main(args):
     )
     parser.add_argument(
         '-v', '--VERBOSE',
-        help='Enable VERBOSE mode.',
+        help='Enable VERBOSE mode: log the messages of all subsystems to stderr.',
         action='store_true',
         required=False,
         default=None
@@ -1254,7 +5168,17 @@ def main(args):
         '-V', '--import_vcard',
         type=str,
         help='Create a new person topic in a specified workspace \
-              from given vcard file, -V filename and and -w workspace name.',
+              from given vcard file, -V filename and and -w workspace name. \
+              Creates a person for every vcard in the file or for every row \
+              of a contacts csv file (*.csv).',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--validate',
+        type=str,
+        help='Validate all topic payloads of a json or ndjson file against the \
+              type definitions from the server without sending them.',
         required=False,
         default=None
     )
@@ -1266,6 +5190,36 @@ def main(args):
         required=False,
         default=None
     )
+    parser.add_argument(
+        '-W', '--workers',
+        type=int,
+        help='Number of concurrent requests in bulk operations. (default: %s)' % WORKERS,
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '-WA', '--watch',
+        type=str,
+        help='Watch all topics of a topic type by its topic.type.uri, optionally \
+              only in workspace -w, and print every change as ndjson event.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--watch_children',
+        help='Write the watched topics with their children.',
+        action='store_true',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--watch_interval',
+        type=float,
+        help='Minimal poll interval in seconds for -WA. The interval grows \
+              up to 60 times this value while nothing changes. (default: 1)',
+        required=False,
+        default=1.0
+    )
     parser.add_argument(
         '-x', '--topicmap_x',
         type=str,
@@ -1273,6 +5227,38 @@ def main(args):
         required=False,
         default=None
     )
+    parser.add_argument(
+        '-X', '--export_topicmap',
+        type=int,
+        help='Export a topicmap by id with all its topics, assocs and positions.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '-XV', '--export_vcards',
+        type=str,
+        nargs='?',
+        const='dmx.contacts.person',
+        help='Write all persons (or topics of the given person type), or only \
+              those in workspace -w, as vcards to stdout or to the file given \
+              with -O.',
+        required=False,
+        default=None
+    )
+    parser.add_argument(
+        '--export_format',
+        type=str,
+        help='Set the format of -X (graphml|dot|json). (default: graphml)',
+        required=False,
+        default='graphml'
+    )
+    parser.add_argument(
+        '--export_children',
+        help='Fetch the details of all topics for -X concurrently and add their children.',
+        action='store_true',
+        required=False,
+        default=None
+    )
     parser.add_argument(
         '-y', '--topicmap_y',
         type=str,
@@ -1299,13 +5285,46 @@ def main(args):
     ## arguments and then call a funtion (ideally named like argument) to do
     ## the computing.
     ##
-    ## enable VERBOSE mode
+    ## enable VERBOSE mode and set the log levels of the subsystems
     if argsdict['VERBOSE']:
-        VERBOSE = True
+        client.verbose = True
+    log_levels = dict(item.split('=', 1) for item in (argsdict['log_level'] or '').split(',') if item)
+    log_samples = dict(item.split('=', 1) for item in (argsdict['log_sample'] or '').split(',') if item)
+    configure_logging(argsdict['VERBOSE'], log_levels, log_samples, argsdict['log_format'])
 
     ## set http authentication header authtype (Basic|LDAP|...)
     if argsdict['AUTHTYPE']:
-        AUTHTYPE = (argsdict['AUTHTYPE'])
+        client.authtype = (argsdict['AUTHTYPE'])
+
+    ## set the number of concurrent requests in bulk operations
+    if argsdict['workers']:
+        client.workers = argsdict['workers']
+
+    ## validate payloads before sending them
+    client.validate_payloads = not argsdict['no_validate']
+
+    ## look up persons in the contact index before creating them
+    client.duplicates = argsdict['duplicates']
+
+    ## limit every operation to the timeout and hedge slow GET requests
+    client.timeout = argsdict['timeout']
+    client.hedge = argsdict['hedge']
+    atexit.register(client.close)
+
+    ## record the spans of all client calls and write them at exit
+    if argsdict['trace']:
+        client.tracer = Tracer()
+        atexit.register(client.tracer.write, argsdict['trace'])
+
+    ## journal the bulk writes to resume them after a crash
+    if argsdict['journal']:
+        client.journal = Journal(argsdict['journal'], argsdict['resume'])
+        atexit.register(client.journal.close)
+        LOG_MAIN.info("MAIN : %s records done already in journal %s",
+                      len(client.journal), argsdict['journal'])
+    elif argsdict['resume']:
+        print("ERROR! --resume needs the journal file of --journal.")
+        sys.exit(1)
 
     ## create initial config instance from ConfigParser with defaults
     create_default_config()
@@ -1326,7 +5345,8 @@ def main(args):
 
     ## if a JESSIONID is entered via command line, then use it.
     if argsdict['JSESSIONID']:
-        JSESSIONID = (argsdict['JSESSIONID'])
+        client.jsessionid = (argsdict['JSESSIONID'])
+        add_secrets(client.jsessionid)
 
     ## if a URL. is entered via command line, then use it.
     if argsdict['URL']:
@@ -1339,50 +5359,146 @@ def main(args):
     ## login is next, as one may want to manually set who logs in
     if argsdict['login']:
         if (argsdict['user'] != None) and (argsdict['password'] != None):
-            config.set('Credentials', 'authname', argsdict['user']) # usualy the admin
-            config.set('Credentials', 'password', argsdict['password']) # usualy the admin password
+            client.config.set('Credentials', 'authname', argsdict['user']) # usualy the admin
+            client.config.set('Credentials', 'password', argsdict['password']) # usualy the admin password
         else:
             print("ERROR! Missing username and/or password.")
 
+    ## with -H the following operations run on several instances in parallel
+    if argsdict['hosts'] == 'all':
+        hosts = client.get_host_names()
+        if not hosts:
+            print("ERROR! No [Connection:<name>] sections in config for -H all.")
+            sys.exit(1)
+    elif argsdict['hosts']:
+        hosts = [name.strip() for name in argsdict['hosts'].split(',')]
+    else:
+        hosts = None
+
+    ## these operations write to a single output, ask before they act or only
+    ## read the local mirror, so they run on the instance of [Connection] only
+    if hosts:
+        local_only = [option for (option, used) in (
+            ('--validate', argsdict['validate']),
+            ('-b with --fields or --depth', argsdict['by_type'] and (
+                argsdict['fields'] or argsdict['depth'] is not None)),
+            ('--stream', argsdict['stream']),
+            ('-d', argsdict['delete_topic']),
+            ('-X', argsdict['export_topicmap']),
+            ('--load', argsdict['load']),
+            ('--mirror', argsdict['mirror']),
+            ('--query', argsdict['query']),
+            ('-XV', argsdict['export_vcards']),
+            ('-AU', argsdict['audit']),
+            ('-WA', argsdict['watch'])) if used]
+        if local_only:
+            parser.error('-H does not work with %s.' % ', '.join(local_only))
+
+    def run(function, *function_args):
+        if hosts:
+            return(client.fan_out(function.__name__, function_args, hosts,
+                                  argsdict['workers'], argsdict['merge']))
+        return(client.call_operation(function.__name__, function_args))
+
+    def show(data):
+        if hosts:
+            pretty_print(data)
+        else:
+            print(data)
+
+    def show_all(data):
+        if hosts:
+            pretty_print(data)
+        else:
+            for item in data:
+                print(item)
+
+    ## with --stream the responses of -SG, -t and -b are written as they come
+    if argsdict['stream'] and argsdict['output']:
+        stream = open(argsdict['output'], 'wb')
+    else:
+        stream = sys.stdout.buffer
+
+    if argsdict['validate']:
+        invalid = client.call_operation('validate_file', (argsdict['validate'], 'topic',
+                                                          argsdict['workers']))
+        for (number, errors) in invalid:
+            for error_message in errors:
+                print("ERROR! #%s %s" % (number, error_message))
+        if invalid:
+            sys.exit(1)
+        print("OK")
+
     if argsdict['file']:
-        ##
-        ## Todo: This function needs rewrinting! The logic of importing data from
-        ## json file should be in a separate function.
-        ##
-        if VERBOSE:
-            print("ARGSDICT FILE: Importing json data from file %s" % (argsdict['file']))
-        payload = read_file(str(argsdict['file']))
-        if VERBOSE:
-            print("JSON DATA FROM FILE:\n%s" % payload)
-        payload = json.loads(payload)
-        payload_len = len(payload)
         if argsdict['workspace']:
-            if payload_len > 0:
-                if VERBOSE:
-                    print("WORKSPACE: %s" % argsdict['workspace'])
-                data = send_data(payload, argsdict['workspace'])
-                print(data)
+            data = run(client.import_file, argsdict['file'], argsdict['workspace'],
+                       argsdict['workers'])
+            if data:
+                show_all(data)
             else:
                 print("ERROR! Missing data in file %s" % (argsdict['file']))
         else:
             print("ERROR! Missing workspace declaration.")
 
     if argsdict['import_vcard']:
-        if VERBOSE:
-            print("Importing vcard data from file %s" % (argsdict['import_vcard']))
+        LOG_MAIN.info("Importing vcard data from file %s", argsdict['import_vcard'])
         if argsdict['workspace']:
-            data = import_vcard(
+            data = run(
+                client.import_vcards,
                 argsdict['import_vcard'],
-                argsdict['workspace']
+                argsdict['workspace'],
+                argsdict['workers']
             )
-            print(data)
+            show_all(data)
+        else:
+            print("ERROR! Missing workspace declaration.")
+
+    if argsdict['import_edges']:
+        LOG_MAIN.info("Importing edge list from file %s", argsdict['import_edges'])
+        if argsdict['workspace']:
+            data = run(
+                client.import_edges,
+                argsdict['import_edges'],
+                argsdict['workspace'],
+                argsdict['topicmap_id'],
+                argsdict['workers']
+            )
+            pretty_print(data)
+        else:
+            print("ERROR! Missing workspace declaration.")
+
+    if argsdict['update']:
+        data = run(client.update_topics, argsdict['update'], argsdict['workspace'],
+                   argsdict['workers'])
+        show_all(data)
+
+    if argsdict['sync_notes']:
+        if argsdict['workspace']:
+            data = run(
+                client.sync_notes,
+                argsdict['sync_notes'],
+                argsdict['workspace'],
+                argsdict['manifest'],
+                argsdict['workers']
+            )
+            pretty_print(data)
         else:
             print("ERROR! Missing workspace declaration.")
 
+    if argsdict['batch']:
+        LOG_MAIN.info("Running batch file %s", argsdict['batch'])
+        data = run(client.run_batch, argsdict['batch'], argsdict['workers'])
+        pretty_print(data)
+
+    if argsdict['provision']:
+        LOG_MAIN.info("Provisioning spec %s", argsdict['provision'])
+        data = run(client.provision, argsdict['provision'], argsdict['workers'])
+        pretty_print(data)
+
     if argsdict['create_user']:
         if (argsdict['user'] and argsdict['password']):
-            data = create_user(argsdict['user'], argsdict['password'])
-            print(data)
+            data = run(create_user, argsdict['user'], argsdict['password'])
+            show(data)
         else:
             print("ERROR! Missing username or password.")
 
@@ -1392,32 +5508,64 @@ def main(args):
         ##
         argsdict['m_type'] = 'dmx.topicmaps.topicmap'
         if (argsdict['create_topicmap'] != None) and (argsdict['workspace'] != None):
-            data = create_topicmap(
+            data = run(
+                create_topicmap,
                 argsdict['create_topicmap'], argsdict['m_type'], argsdict['workspace']
             )
-            print(data)
+            show(data)
         else:
             print("ERROR! Missing name of new topicmap or missing workspace name.")
 
     if argsdict['create_note']:
         if argsdict['note_body'] and argsdict['workspace']:
-            data = create_note(
+            data = run(
+                create_note,
                 argsdict['create_note'], argsdict['note_body'], argsdict['workspace']
             )
-            print(data)
+            show(data)
         else:
             print("ERROR! Missing body of new note or missing workspace name.")
 
-    if argsdict['by_type']:
-        data = get_items(argsdict['by_type'])
+    ## only fetch and print the fields and levels of children asked for
+    if argsdict['fields']:
+        fields = tuple(argsdict['fields'].split(','))
+    else:
+        fields = None
+
+    if argsdict['by_type'] and (argsdict['stream'] or fields or argsdict['depth'] is not None):
+        client.call_operation('get_items', (argsdict['by_type'], stream,
+                                            argsdict['stream'] or 'raw', fields,
+                                            argsdict['depth']))
+    elif argsdict['by_type']:
+        data = run(get_items, argsdict['by_type'])
+        pretty_print(data)
+
+    if argsdict['get_related'] and argsdict['stream']:
+        client.call_operation('get_related', (
+            argsdict['get_related'], argsdict['assoc_type'], argsdict['my_role'],
+            argsdict['others_role'], argsdict['others_type'], argsdict['related_assocs'],
+            stream, argsdict['stream']))
+    elif argsdict['get_related']:
+        data = run(get_related, argsdict['get_related'], argsdict['assoc_type'],
+                   argsdict['my_role'], argsdict['others_role'], argsdict['others_type'],
+                   argsdict['related_assocs'])
         pretty_print(data)
 
-    if argsdict['get_related']:
-        data = get_related(argsdict['get_related'])
+    if argsdict['get_topic'] and argsdict['stream']:
+        client.call_operation('get_topic', (argsdict['get_topic'], stream, argsdict['stream'],
+                                            fields, argsdict['depth']))
+    elif argsdict['get_topic']:
+        data = run(get_topic, argsdict['get_topic'], None, 'raw', fields, argsdict['depth'])
         pretty_print(data)
 
-    if argsdict['get_topic']:
-        data = get_topic(argsdict['get_topic'])
+    if argsdict['get_topics']:
+        topic_ids = [topic_id.strip() for topic_id in argsdict['get_topics'].split(',')]
+        for topic_id in topic_ids:
+            if not topic_id.isdigit():
+                print("ERROR! Invalid topic id '%s' in %s." % (topic_id, argsdict['get_topics']))
+                sys.exit(1)
+        topic_ids = [int(topic_id) for topic_id in topic_ids]
+        data = run(client.get_topics, topic_ids, argsdict['workers'])
         pretty_print(data)
 
     if argsdict['workspace'] and (argsdict['ws_type']) and not argsdict['membership']:
@@ -1425,41 +5573,42 @@ def main(args):
         ## Does not work with 'private' for now!
         ##
         if argsdict['ws_type'] in ["confidential", "collaborative", "public", "common"]:
-            if VERBOSE:
-                print("Creating new %s workspace %s" %
-                      (argsdict['ws_type'], argsdict['workspace']))
-            data = create_ws(argsdict['workspace'], argsdict['ws_type'])
-            print(data)
+            LOG_MAIN.info("Creating new %s workspace %s",
+                          argsdict['ws_type'], argsdict['workspace'])
+            data = run(create_ws, argsdict['workspace'], argsdict['ws_type'])
+            show(data)
         elif argsdict['ws_type'] == "private":
             print("Sorry! %s is not working yet via scripting." % argsdict['ws_type'])
         else:
             print("ERROR! %s is not a valid workshop type." % argsdict['ws_type'])
 
     if argsdict['get_session_id']:
-        data = get_session_id()
-        print(data)
+        data = run(get_session_id)
+        show(data)
 
     if argsdict['membership']:
         if (argsdict['workspace'] != None) and (argsdict['new_member'] != None):
-            data = create_member(argsdict['workspace'], argsdict['new_member'])
-            print(data)
+            data = run(create_member, argsdict['workspace'], argsdict['new_member'])
+            show(data)
         else:
             print("ERROR! Missing username of new member or missing workspace name.")
 
-    if argsdict['send_get']:
-        data = send_get(argsdict['send_get'])
+    if argsdict['send_get'] and argsdict['stream']:
+        client.call_operation('send_get', (argsdict['send_get'], stream, argsdict['stream']))
+    elif argsdict['send_get']:
+        data = run(send_get, argsdict['send_get'])
         pretty_print(data)
 
     if argsdict['delete_topic']:
-        data = get_topic(argsdict['delete_topic'])
+        data = client.call_operation('get_topic', (argsdict['delete_topic'],))
         if (not (argsdict['yes']) and query_yes_no(
                 "Are you sure you want to delete topic id %s with value \"%s\"" %
                 (argsdict['delete_topic'], data['value']))):
             print('yes')
-            data = delete_topic(argsdict['delete_topic'])
+            data = client.call_operation('delete_topic', (argsdict['delete_topic'],))
             print(data)
         elif argsdict['yes']:
-            data = delete_topic(argsdict['delete_topic'])
+            data = client.call_operation('delete_topic', (argsdict['delete_topic'],))
             print(data)
         else:
             print('no')
@@ -1485,7 +5634,8 @@ def main(args):
                 topicmap_pinned = argsdict['topicmap_pinned']
             else:
                 topicmap_pinned = False
-            data = reveal_topic(
+            data = run(
+                reveal_topic,
                 workspace,
                 topicmap_id,
                 topic_id,
@@ -1493,11 +5643,106 @@ def main(args):
                 topicmap_y,
                 topicmap_pinned
             )
-            print(data)
+            show(data)
         else:
             print('ERROR! Missing topic_id or missing topicmap_id \
                    or missing workspace name.')
 
+    if argsdict['export_topicmap']:
+        if argsdict['output']:
+            output = open(argsdict['output'], 'w')
+        else:
+            output = sys.stdout
+        client.call_operation('export_topicmap', (
+            argsdict['export_topicmap'],
+            argsdict['export_format'],
+            output,
+            argsdict['export_children'],
+            argsdict['workers']
+        ))
+        if argsdict['output']:
+            output.close()
+
+    if argsdict['load']:
+        mix = {}
+        for item in argsdict['load'].split(','):
+            (name, _, weight) = item.partition('=')
+            mix[name.strip()] = float(weight or 1)
+        data = client.call_operation('load_test', (
+            mix,
+            argsdict['load_duration'],
+            argsdict['load_rate'],
+            argsdict['workers'],
+            argsdict['load_ramp_up'],
+            argsdict['workspace'],
+            argsdict['topicmap_id'],
+            argsdict['load_report']
+        ))
+        pretty_print(data)
+
+    if argsdict['mirror']:
+        if argsdict['mirror_types']:
+            topictypes = [topictype.strip() for topictype in argsdict['mirror_types'].split(',')]
+            data = client.call_operation('mirror', (argsdict['mirror'], topictypes,
+                                                    argsdict['workers'],
+                                                    bool(argsdict['mirror_full'])))
+            pretty_print(data)
+        else:
+            print("ERROR! Missing topic types of --mirror_types.")
+
+    if argsdict['query']:
+        for topic in query_mirror(
+                argsdict['query'],
+                argsdict['query_type'],
+                argsdict['query_value'],
+                argsdict['query_where'],
+                argsdict['query_related'],
+                argsdict['workspace']
+        ):
+            print(json.dumps(topic))
+
+    if argsdict['export_vcards']:
+        if argsdict['output']:
+            output = open(argsdict['output'], 'w', newline='')
+        else:
+            output = sys.stdout
+        client.call_operation('export_vcards', (argsdict['export_vcards'],
+                                                argsdict['workspace'], output,
+                                                argsdict['workers']))
+        if argsdict['output']:
+            output.close()
+
+    if argsdict['audit']:
+        if argsdict['output']:
+            output = open(argsdict['output'], 'w', newline='')
+        else:
+            output = sys.stdout
+        if re.match(r'^[\d, ]+$', argsdict['audit']):
+            topic_ids = [int(topic_id) for topic_id in argsdict['audit'].split(',')
+                         if topic_id.strip()]
+            client.call_operation('audit', (None, topic_ids, output, argsdict['audit_format'],
+                                            argsdict['workers']))
+        else:
+            client.call_operation('audit', (argsdict['audit'], None, output,
+                                            argsdict['audit_format'], argsdict['workers']))
+        if argsdict['output']:
+            output.close()
+
+    if argsdict['watch']:
+        try:
+            client.call_operation('watch', (
+                argsdict['watch'],
+                argsdict['workspace'],
+                argsdict['watch_interval'],
+                argsdict['watch_interval'] * 60,
+                argsdict['watch_children']
+            ))
+        except KeyboardInterrupt:
+            pass
+
+    if argsdict['stream'] and argsdict['output']:
+        stream.close()
+
     if len(sys.argv) < 2:
         parser.print_usage()
         print('Use -h or --help for more information.')
@@ -1510,10 +5755,8 @@ def main(args):
         pass
     else:
         end_time = timer()
-        if VERBOSE:
-            print("MAIN : Elapsed time:", timedelta(seconds=end_time-start_time))
-    if VERBOSE:
-        print("MAIN : Exit.")
+        LOG_MAIN.info("MAIN : Elapsed time: %s", timedelta(seconds=end_time-start_time))
+    LOG_MAIN.info("MAIN : Exit.")
 
 
 
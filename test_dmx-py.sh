@@ -1,12 +1,17 @@
 #!/bin/bash
 
-if [ "$1" == "-v" ]; then
-    VERBOSE='-v'
-else
-    VERBOSE=""
-fi
+VERBOSE=""
+OFFLINE=""
+for ARG in "$@"; do
+    case "${ARG}" in
+        -v) VERBOSE='-v' ;;
+        # run only the checks which do not need a server
+        -o) OFFLINE='-o' ;;
+    esac
+done
 
 PY4DMX='./dmx.py'
+PYTHON='python3'
 # NUNC="$( date +"%F_%T" )"
 # ':' in WS NAME is a problem when creating a topic!
 NUNC="$( date +"%F_%H-%M-%S" )"
@@ -128,6 +133,17 @@ delete_topic () {
     echo "${RESULT}"
 }
 
+import_edges () {
+    echo -e "--\n${FUNCNAME[0]}:"
+    EDGE_FILE="$( mktemp --suffix=.csv )"
+    echo "${NOTE_ID},${PERSON_ID},dmx.core.association" > ${EDGE_FILE}
+    if [ ${VERBOSE} ]; then
+        echo "INFO: Importing edge list ${EDGE_FILE} and revealing it on ${TOPICMAP} in workpace ${WORKSPACE}".
+    fi
+    RESULT="$( ${PY4DMX} ${VERBOSE} -l -u ${USER} -p ${PASS} -E ${EDGE_FILE} -o ${TOPICMAP_ID} -w ${WORKSPACE} )"
+    rm -f ${EDGE_FILE}
+    echo "${RESULT}"
+}
 
 import_vcard () {
     echo -e "--\n${FUNCNAME[0]}:"
@@ -138,7 +154,578 @@ import_vcard () {
     echo "${RESULT}"
 }
 
+### offline checks ###
+## These run the functions of dmx.py without a server and print OK or
+## fail with a traceback, which ends the test run.
+
+run_check () {
+    ## runs the python code of a check from stdin
+    echo -e "--\n${FUNCNAME[1]}:"
+    ${PYTHON} - || { echo "FAILED: ${FUNCNAME[1]}"; exit 1; }
+}
+
+check_player_refs () {
+    run_check <<'EOF'
+import dmx
+client = dmx.DMXClient()
+client.topic_id_cache['1984'] = 77
+assert client.get_player('12') == {'topicId': 12, 'roleTypeUri': 'dmx.core.default'}
+assert client.get_player('ref_id:5')['topicId'] == 5
+assert client.get_player('ref_uri:a.b')['topicUri'] == 'a.b'
+assert client.get_player('ref_name:1984')['topicId'] == 77
+assert dmx.ref_name('Berlin') == 'Berlin' and dmx.ref_name('12') is None
+print('OK')
+EOF
+}
+
+check_module_globals () {
+    run_check <<'EOF'
+import dmx
+assert (dmx.VERBOSE, dmx.AUTHTYPE, dmx.JSESSIONID) == (False, 'Basic', None)
+dmx.AUTHTYPE = 'LDAP'
+dmx.JSESSIONID = 'S1234'
+assert dmx.default_client.authtype == 'LDAP'
+assert dmx.get_session_id() == 'S1234'
+print('OK')
+EOF
+}
+
+check_watch_race () {
+    run_check <<'EOF'
+import io, json, urllib.error, dmx
+client = dmx.DMXClient()
+client.get_host_url = lambda: 'http://localhost/'
+polls = iter([[1], [1, 2], [1], [1, 3], [1, 3], [1, 3]])
+modified = iter([[], [], [], [], [{'id': 1, 'typeUri': 'dmx.notes.note'}]])
+failures = {3: [500]}
+def get_conditional(url, etag, last_modified):
+    return(json.dumps([{'id': i, 'value': 'v'} for i in next(polls)]).encode(), None, None)
+def open_request(url):
+    topic_id = int(url.split('/')[-1])
+    if topic_id == 2 or failures.get(topic_id):
+        code = 404 if topic_id == 2 else failures[topic_id].pop()
+        raise urllib.error.HTTPError(url, code, 'Error', {}, None)
+    return(io.BytesIO(json.dumps({'id': topic_id, 'value': 'v'}).encode()))
+client.get_conditional = get_conditional
+client.open_request = open_request
+client.read_request = lambda url: next(modified)
+output = io.StringIO()
+client.watch('dmx.notes.note', interval=0, max_interval=0, polls=6, output=output)
+## topic 2 is deleted before it is fetched and never reported, the failed
+## fetch of topic 3 is retried at the next poll and the child change of
+## topic 1 is found by its modification timestamp
+events = [(event['event'], event['id']) for event in map(json.loads, output.getvalue().splitlines())]
+assert events == [('created', 3), ('updated', 1)], events
+print('OK')
+EOF
+}
+
+check_export_topicmap () {
+    run_check <<'EOF'
+import io, json, dmx
+import xml.etree.ElementTree as ET
+client = dmx.DMXClient()
+hidden = {'dmx.topicmaps.visibility': False}
+client.get_topicmap = lambda map_id, children=False: {
+    'topic': {'value': 'Map'},
+    'topics': [{'id': 1, 'value': 'A'}, {'id': 2, 'value': 'B'},
+               {'id': 3, 'value': 'C', 'viewProps': hidden}],
+    'assocs': [{'id': 10, 'player1': {'topicId': 1}, 'player2': {'topicId': 2}},
+               {'id': 11, 'player1': {'assocId': 10}, 'player2': {'topicId': 1}},
+               {'id': 12, 'player1': {'topicId': 1}, 'player2': {'topicId': 3}},
+               {'id': 13, 'player1': {'assocId': 12}, 'player2': {'topicId': 2}}]}
+output = io.StringIO()
+client.export_topicmap(5, 'graphml', output)
+ns = {'g': 'http://graphml.graphdrawing.org/xmlns'}
+graph = ET.fromstring(output.getvalue()).find('g:graph', ns)
+nodes = set(node.get('id') for node in graph.findall('g:node', ns))
+edges = graph.findall('g:edge', ns)
+assert nodes == {'1', '2', '10'}, nodes
+assert [edge.get('id') for edge in edges] == ['10', '11']
+assert all(edge.get('source') in nodes and edge.get('target') in nodes for edge in edges)
+output = io.StringIO()
+client.export_topicmap(5, 'json', output)
+graph = json.loads(output.getvalue())['graph']
+assert set(graph['nodes']) == nodes and len(graph['edges']) == 2
+print('OK')
+EOF
+}
+
+check_session_retry () {
+    run_check <<'EOF'
+import urllib.error, dmx
+client = dmx.DMXClient()
+client.jsessionid = 'OLD'
+sent = []
+def open_url(opener, req, payload=None):
+    sent.append(req.get_method())
+    if len(sent) == 1:
+        raise urllib.error.HTTPError(req.full_url, 401, 'Unauthorized', {}, None)
+    return('response')
+client.open_url = open_url
+client.renew_session = lambda jsessionid: 'NEW'
+assert client.open_request('http://localhost/core/topic/1', method='PUT') == 'response'
+assert sent == ['PUT', 'PUT']
+sent.clear()
+try:
+    client.open_request('http://localhost/core/topic', b'{}', method='POST')
+    raise AssertionError('POST was sent again')
+except urllib.error.HTTPError as error:
+    assert error.code == 401 and sent == ['POST']
+print('OK')
+EOF
+}
+
+check_edge_validation () {
+    run_check <<'EOF'
+import os, tempfile, urllib.error, dmx
+client = dmx.DMXClient()
+## a failed type lookup is not cached
+calls = []
+def open_request(url, *args, **kwargs):
+    calls.append(url)
+    raise urllib.error.HTTPError(url, 500, 'Server Error', {}, None)
+client.get_host_url = lambda: 'http://localhost/'
+client.open_request = open_request
+for attempt in (1, 2):
+    try:
+        client.get_type('dmx.notes.note')
+    except urllib.error.HTTPError:
+        pass
+assert len(calls) == 2 and not client.type_cache
+## an invalid edge stops the import before anything is written
+client.validate_payloads = True
+client.validate_payload = lambda payload, kind: ['bad'] if payload['player2']['topicId'] == 3 else []
+created = []
+client.create_assoc = lambda payload, workspace: created.append(payload)
+with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as edge_file:
+    edge_file.write('1,2,dmx.core.association\n1,3,dmx.core.association\n')
+try:
+    client.import_edges(edge_file.name, 'ws')
+    raise AssertionError('invalid edge was imported')
+except SystemExit:
+    assert created == []
+os.remove(edge_file.name)
+print('OK')
+EOF
+}
+
+check_sync_notes_failure () {
+    run_check <<'EOF'
+import json, os, shutil, tempfile, time, dmx
+client = dmx.DMXClient()
+client.get_host_url = lambda: 'http://localhost/'
+directory = tempfile.mkdtemp()
+for name in ('a.md', 'b.md'):
+    with open(os.path.join(directory, name), 'w') as data_file:
+        data_file.write('# %s\n' % name)
+def create_note(title, body, workspace):
+    if title == 'a.md':
+        raise SystemExit(1)
+    time.sleep(0.2)
+    return(42)
+client.create_note = create_note
+try:
+    client.sync_notes(directory, 'ws', workers=2)
+    raise AssertionError('the failure was not raised')
+except SystemExit:
+    pass
+with open(os.path.join(directory, '.dmx_notes.json')) as data_file:
+    files = json.load(data_file)
+assert files['b.md']['id'] == 42 and 'a.md' not in files, files
+## a note deleted on the server is created again, a failed note is not counted
+for name in ('a.md', 'b.md'):
+    with open(os.path.join(directory, name), 'w') as data_file:
+        data_file.write('# %s\n\nchanged\n' % name)
+def update_note(topic_id, title, body, workspace):
+    raise SystemExit(1)
+client.update_note = update_note
+client.topic_exists = lambda topic_id: False
+try:
+    client.sync_notes(directory, 'ws', workers=2)
+    raise AssertionError('the failure was not raised')
+except SystemExit:
+    pass
+client.create_note = lambda title, body, workspace: 43
+assert client.sync_notes(directory, 'ws', workers=2) == {
+    'created': 1, 'updated': 0, 'deleted': 0, 'unchanged': 1}
+with open(os.path.join(directory, '.dmx_notes.json')) as data_file:
+    files = json.load(data_file)
+assert files['a.md']['id'] == 43 and files['b.md']['id'] == 42, files
+shutil.rmtree(directory)
+print('OK')
+EOF
+}
+
+check_update_topic_diff () {
+    run_check <<'EOF'
+import dmx
+client = dmx.DMXClient()
+name = {'id': 2, 'typeUri': 'dmx.person.person_name', 'value': 'John Doe', 'children': {
+    'dmx.person.first_name': {'id': 3, 'typeUri': 'dmx.person.first_name', 'value': 'John'},
+    'dmx.person.last_name': {'id': 4, 'typeUri': 'dmx.person.last_name', 'value': 'Doe'}}}
+client.get_topic = lambda topic_id: {'id': 1, 'value': 'John Doe',
+                                     'children': {'dmx.person.person_name': name}}
+sent = []
+client.write_request = lambda url, payload, workspace=None, method='POST': sent.append(payload)
+## an unchanged partial composite sends no request
+unchanged = {'dmx.person.person_name': {'dmx.person.first_name': 'John'}}
+assert dmx.diff_children({'dmx.person.person_name': name}, unchanged) == {}
+assert client.update_topic({'children': unchanged}, 1) == {} and sent == []
+## only the changed child of a composite is sent
+changed = {'dmx.person.person_name': {'dmx.person.first_name': 'Jim',
+                                      'dmx.person.last_name': 'Doe'}}
+client.update_topic({'children': changed}, 1)
+assert sent == [{'id': 1, 'children': {'dmx.person.person_name': {'dmx.person.first_name': 'Jim'}}}], sent
+print('OK')
+EOF
+}
+
+check_trace_redaction () {
+    run_check <<'EOF'
+import hashlib, io, json, os, tempfile, dmx
+client = dmx.DMXClient()
+client.tracer = dmx.Tracer()
+client.jsessionid = 'SESSION1234'
+client.get_host_url = lambda: 'http://localhost/'
+client.get_ws_id = lambda workspace: 7
+client.open_url = lambda opener, req, payload=None: io.BytesIO(b'{"id": 1}')
+client.get_session_id = lambda: 'SESSION5678'
+client.get_items = lambda topictype: {}
+client.config.read_string('[Connection]\nworkspace = ws\n')
+client.write_request('core/topic', {'children': {'dmx.accesscontrol.password': 'HASH0123'}}, 'ws')
+client.renew_session('SESSION1234')
+client.create_user('bob', 'SECRET99')
+trace_file = tempfile.NamedTemporaryFile(suffix='.json', delete=False).name
+client.tracer.write(trace_file)
+with open(trace_file) as data_file:
+    trace = data_file.read()
+os.remove(trace_file)
+names = [event['name'] for event in json.loads(trace)['traceEvents']]
+assert 'send_request' in names and 'renew_session' in names and 'create_user' in names
+for secret in ('HASH0123', 'SESSION1234', 'SESSION5678', 'SECRET99',
+               hashlib.sha256(b'SECRET99').hexdigest()):
+    assert secret not in trace, secret
+print('OK')
+EOF
+}
+
+check_log_filter () {
+    run_check <<'EOF'
+import logging, dmx
+dmx.add_secrets('SECRET99')
+assert dmx.redact('login with SECRET99') == 'login with ***'
+assert dmx.redact('{"password": "abc", "x": 1}') == '{"password": "***", "x": 1}'
+assert dmx.redact('Authorization: Basic YWRtaW46') == 'Authorization: Basic ***'
+log_filter = dmx.LogFilter(3)
+def record(level, message):
+    return(logging.LogRecord('dmx.http', level, __file__, 1, message, None, None))
+passed = [log_filter.filter(record(logging.DEBUG, 'debug')) for number in range(6)]
+assert passed.count(True) == 2, passed
+assert all(log_filter.filter(record(logging.WARNING, 'warning')) for number in range(6))
+debug = record(logging.DEBUG, 'JSESSIONID=ABC123')
+while not log_filter.filter(debug):
+    pass
+assert debug.getMessage() == 'JSESSIONID=***'
+print('OK')
+EOF
+}
+
+check_reframe_json () {
+    run_check <<'EOF'
+import json, dmx
+doc = '[ {"a" : "x, [y]\\" }", "b": [1, 2], "c": "\u00e4 \\\\"},\n {"d": {"e": null}} ]'.encode('utf-8')
+compact = json.dumps(json.loads(doc), separators=(',', ':'), ensure_ascii=False).encode('utf-8') + b'\n'
+for size in range(1, len(doc) + 1):
+    chunks = [doc[start:start + size] for start in range(0, len(doc), size)]
+    assert b''.join(dmx.reframe_json(chunks)) == compact, size
+    lines = b''.join(dmx.reframe_json(chunks, True)).splitlines()
+    assert [json.loads(line) for line in lines] == json.loads(doc), size
+## a number cut by the end of a chunk is not split into two lines
+doc = b'[1, -2500.0, "a\\\\"]'
+for size in range(1, len(doc) + 1):
+    chunks = [doc[start:start + size] for start in range(0, len(doc), size)]
+    lines = b''.join(dmx.reframe_json(chunks, True)).splitlines()
+    assert [json.loads(line) for line in lines] == json.loads(doc), (size, lines)
+print('OK')
+EOF
+}
+
+check_journal_resume () {
+    run_check <<'EOF'
+import json, os, tempfile, dmx
+filename = tempfile.NamedTemporaryFile(suffix='.journal', delete=False).name
+journal = dmx.Journal(filename)
+journal.record(('send_data', 'host', 'in.json', 0), 101)
+journal.record(('send_data', 'host', 'in.json', 57), 102)
+journal.close()
+## a crash tears the last line
+with open(filename, 'a') as journal_file:
+    journal_file.write('{"op": "send_data", "host": "host", "inp')
+client = dmx.DMXClient()
+client.journal = dmx.Journal(filename, resume=True)
+assert len(client.journal) == 2
+calls = []
+def create(number):
+    calls.append(number)
+    return(200 + number)
+source = ('host', 'in.json')
+results = [client.checkpoint('send_data', source, offset, create, offset)
+           for offset in (0, 57, 99)]
+assert results == [101, 102, 299] and calls == [99], (results, calls)
+client.journal.close()
+with open(filename) as journal_file:
+    lines = journal_file.read().splitlines()
+assert json.loads(lines[-1])['result'] == 299
+os.remove(filename)
+print('OK')
+EOF
+}
+
+check_bounded_map () {
+    run_check <<'EOF'
+import concurrent.futures, threading, time, dmx
+running = [0, 0]
+lock = threading.Lock()
+def work(number):
+    with lock:
+        running[0] += 1
+        running[1] = max(running[1], running[0])
+    time.sleep(0.001 * (number % 5))
+    with lock:
+        running[0] -= 1
+    return(number * 2)
+with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+    results = list(dmx.bounded_map(executor, work, range(100), 4,
+                                   lambda number: number % 10 == 0))
+assert results == [None if number % 10 == 0 else number * 2 for number in range(100)]
+assert running[1] <= 4, running
+print('OK')
+EOF
+}
+
+check_single_flight () {
+    run_check <<'EOF'
+import concurrent.futures, threading, dmx
+client = dmx.DMXClient()
+sent = []
+release = threading.Event()
+def send_request(url, payload=None, wsid=None, method='GET'):
+    sent.append(url)
+    release.wait(5)
+    return({'id': 1, 'children': {}})
+client.send_request = send_request
+with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+    futures = [executor.submit(client.get_response, 'core/topic/1') for number in range(8)]
+    while len(client.inflight) == 0:
+        pass
+    threading.Timer(0.2, release.set).start()
+    results = [future.result() for future in futures]
+assert sent == ['core/topic/1'], sent
+assert all(result == {'id': 1, 'children': {}} for result in results)
+## every caller gets its own copy
+results[0]['children']['x'] = 1
+assert results[1]['children'] == {} and not client.inflight
+print('OK')
+EOF
+}
+
+check_project () {
+    run_check <<'EOF'
+import dmx
+topic = {'id': 1, 'value': 'John Doe', 'typeUri': 'dmx.contacts.person', 'children': {
+    'dmx.contacts.person_name': {'id': 2, 'value': 'John Doe', 'children': {
+        'dmx.contacts.first_name': {'id': 3, 'value': 'John'}}},
+    'dmx.contacts.email_address': [{'id': 4, 'value': 'john@example.org'}]}}
+assert dmx.project(topic) == topic
+assert dmx.project(topic, ('id', 'value')) == {'id': 1, 'value': 'John Doe'}
+assert dmx.project(topic, depth=0) == {'id': 1, 'value': 'John Doe',
+                                       'typeUri': 'dmx.contacts.person'}
+assert dmx.project(topic, ('value', 'children'), 1) == {'value': 'John Doe', 'children': {
+    'dmx.contacts.person_name': {'value': 'John Doe'},
+    'dmx.contacts.email_address': [{'value': 'john@example.org'}]}}
+assert dmx.keeps_children(('children',)) and not dmx.keeps_children(('id',))
+print('OK')
+EOF
+}
+
+check_provision_lookups () {
+    run_check <<'EOF'
+import json, os, tempfile, dmx
+client = dmx.DMXClient()
+client.get_host_url = lambda: 'http://localhost/'
+client.config.read_string('[Connection]\nworkspace = ws\n')
+calls = []
+def get_items(topictype):
+    calls.append(topictype)
+    return({7: 'Team A'} if topictype == 'dmx.workspaces.workspace' else {})
+def read_request(url):
+    calls.append(url)
+    return([{'id': 5, 'value': 'Map'}] if url.startswith('workspace/8/') else [])
+def write_request(url, payload=None, workspace=None, expect_json=True):
+    calls.append(url.split('?')[0])
+    return({'id': 9})
+client.get_items = get_items
+client.read_request = read_request
+client.write_request = write_request
+client.iter_related = lambda *args, **kwargs: []
+spec_file = tempfile.NamedTemporaryFile(suffix='.json', delete=False).name
+with open(spec_file, 'w') as data_file:
+    json.dump({'users': [{'username': 'alice', 'password': 'x'}],
+               'workspaces': [{'name': 'Team A', 'topicmaps': ['Map']}]}, data_file)
+results = client.provision(spec_file, 2)
+os.remove(spec_file)
+assert results['map:Team A:Map'] == 9 and results['user:alice'] == 9, results
+## users and maps are looked up once up front, not again by every create
+assert sorted(calls) == sorted([
+    'dmx.workspaces.workspace', 'dmx.accesscontrol.username',
+    'workspace/7/topics/dmx.topicmaps.topicmap', 'workspace/7/topics/dmx.notes.note',
+    'access-control/user-account', 'topicmaps']), calls
+## only a map of the same workspace counts as existing
+client.get_ws_id = lambda workspace: 8
+assert client.create_topicmap('Map', workspace='Team B') == 5
+client.get_ws_id = lambda workspace: 7
+assert client.create_topicmap('Map', workspace='Team A') == 9
+print('OK')
+EOF
+}
+
+check_import_validation () {
+    run_check <<'EOF'
+import os, tempfile, dmx
+client = dmx.DMXClient()
+client.get_host_url = lambda: 'http://localhost/'
+client.validate_payloads = True
+client.validate_payload = lambda payload, kind: ['bad'] if payload['value'] == 'bad' else []
+created = []
+client.send_data = lambda payload, workspace: created.append(payload) or len(created)
+with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as data_file:
+    data_file.write('{"value": "good"}\n' * 50 + '{"value": "bad"}\n')
+## the invalid last record stops the import before the first one is sent
+try:
+    client.import_file(data_file.name, 'ws', 4)
+    raise AssertionError('invalid payload was imported')
+except SystemExit:
+    assert created == []
+client.validate_payloads = False
+assert len(client.import_file(data_file.name, 'ws', 4)) == 51
+os.remove(data_file.name)
+print('OK')
+EOF
+}
+
+check_trace_parents () {
+    run_check <<'EOF'
+import dmx
+client = dmx.DMXClient()
+client.tracer = dmx.Tracer()
+client.read_request = lambda url, *args: {'id': int(url.split('/')[-1].split('?')[0])}
+assert [topic['id'] for topic in client.get_topics([1, 2, 3], 2)] == [1, 2, 3]
+spans = dict((event['name'], event['args']) for event in client.tracer.events
+             if event['ph'] == 'X' and event['name'] == 'get_topics')
+## the spans of the worker threads are children of the span which started them
+children = [event['args'] for event in client.tracer.events if event['name'] == 'get_topic']
+assert len(children) == 3
+assert all(child['parent'] == spans['get_topics']['id'] for child in children), children
+assert client.tracer.current() is None
+print('OK')
+EOF
+}
+
+check_contact_index_lock () {
+    run_check <<'EOF'
+import threading, dmx
+client = dmx.DMXClient()
+started = threading.Event()
+release = threading.Event()
+calls = []
+def iter_list(url):
+    calls.append(url)
+    started.set()
+    release.wait(5)
+    yield {'id': 1, 'children': {'dmx.contacts.email_address': [{'value': 'john@example.org'}]}}
+client.iter_list = iter_list
+threads = [threading.Thread(target=client.get_contact_index) for number in range(3)]
+threads[0].start()
+started.wait(5)
+for thread in threads[1:]:
+    thread.start()
+## other lookups of the cache are not blocked while the persons are streamed
+assert client.cache_lock.acquire(timeout=1)
+client.cache_lock.release()
+release.set()
+for thread in threads:
+    thread.join()
+assert len(calls) == 1 and len(client.get_contact_index()) > 0
+print('OK')
+EOF
+}
+
+check_mirror_refresh () {
+    run_check <<'EOF'
+import json, os, tempfile, dmx
+client = dmx.DMXClient()
+fetched = []
+related = []
+client.get_data = lambda url, fields=None, depth=None: [{'id': i} for i in (1, 2, 3)]
+def get_conditional(url, etag, last_modified):
+    topic_id = int(url.split('/')[-1].split('?')[0])
+    fetched.append(topic_id)
+    return(json.dumps({'id': topic_id, 'typeUri': 'dmx.notes.note', 'value': len(fetched)}).encode(),
+           None, None)
+def read_request(url):
+    if url.endswith('/topics/modified'):
+        return([{'id': 2, 'typeUri': 'dmx.notes.note'}, {'id': 9, 'typeUri': 'dmx.notes.note'}])
+    return([{'id': 20, 'player1': {'topicId': 3}, 'player2': {'topicId': 7}}])
+def iter_related(topic_id):
+    related.append(topic_id)
+    return([])
+client.get_conditional = get_conditional
+client.read_request = read_request
+client.get_topic_ws = lambda topic_id: {'id': 5, 'value': 'ws'}
+client.iter_related = iter_related
+database = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+assert client.mirror(database, ['dmx.notes.note'], 2)['new'] == 3
+assert sorted(fetched) == [1, 2, 3] and sorted(related) == [1, 2, 3]
+## a refresh fetches only the modified topic and the player of the modified assoc
+del fetched[:], related[:]
+counts = client.mirror(database, ['dmx.notes.note'], 2)
+assert counts == {'new': 0, 'changed': 1, 'unchanged': 2, 'deleted': 0}, counts
+assert fetched == [2] and sorted(related) == [2, 3], (fetched, related)
+del fetched[:], related[:]
+client.mirror(database, ['dmx.notes.note'], 2, True)
+assert sorted(fetched) == [1, 2, 3] and sorted(related) == [1, 2, 3]
+os.remove(database)
+print('OK')
+EOF
+}
+
 ### main ###
+echo -e "\nRun Offline Checks:"
+check_player_refs
+check_module_globals
+check_watch_race
+check_export_topicmap
+check_session_retry
+check_edge_validation
+check_sync_notes_failure
+check_update_topic_diff
+check_trace_redaction
+check_log_filter
+check_reframe_json
+check_journal_resume
+check_bounded_map
+check_single_flight
+check_project
+check_provision_lookups
+check_import_validation
+check_trace_parents
+check_contact_index_lock
+check_mirror_refresh
+if [ ${OFFLINE} ]; then
+    exit
+fi
+
 echo -e "\nRun Tests:"
 create_user
 user_login
@@ -149,6 +736,7 @@ create_note_from_file
 create_person_from_file
 create_topicmap
 reveal_topic
+import_edges
 create_note_from_cmd
 delete_topic
 import_vcard